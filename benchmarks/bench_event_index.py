@@ -0,0 +1,91 @@
+"""
+Porównanie indeksu przedziałowego wydarzeń (modules/event_index.py) z dawnym rozwijaniem
+wydarzeń wielodniowych na kopie dla każdego dnia.
+
+Uruchomienie: python benchmarks/bench_event_index.py [liczba_wydarzeń]
+"""
+import os
+import sys
+import random
+import datetime
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.event_index import EventIndex
+
+MAX_UPCOMING = 8
+TODAY = datetime.date(2026, 3, 15)
+
+def make_calendar(count, seed=42):
+    """Generuje syntetyczny kalendarz: wydarzenia godzinowe, całodniowe i wielodniowe (do 30 dni)."""
+    rng = random.Random(seed)
+    events = []
+    for i in range(count):
+        start = TODAY + datetime.timedelta(days=rng.randint(-60, 300))
+        kind = rng.random()
+        if kind < 0.6:
+            hour = rng.randint(6, 21)
+            events.append({
+                'summary': f'Spotkanie {i}',
+                'start': {'dateTime': f'{start.isoformat()}T{hour:02d}:00:00+01:00'},
+                'end': {'dateTime': f'{start.isoformat()}T{hour + 1:02d}:00:00+01:00'}
+            })
+        else:
+            days = 1 if kind < 0.85 else rng.randint(2, 30)
+            events.append({
+                'summary': f'Wydarzenie {i}',
+                'start': {'date': start.isoformat()},
+                'end': {'date': (start + datetime.timedelta(days=days)).isoformat()}
+            })
+    return events
+
+def expand_per_day(events_raw):
+    """Dawny algorytm: rozwija każde wydarzenie na kopię dla każdego dnia, sortuje i przycina."""
+    all_events = []
+    for event_raw in events_raw:
+        start_info, end_info = event_raw['start'], event_raw['end']
+        start_str = start_info.get('dateTime', start_info.get('date'))
+        end_str = end_info.get('dateTime', end_info.get('date'))
+        start_dt = datetime.datetime.fromisoformat(start_str.split('T')[0])
+        end_dt = datetime.datetime.fromisoformat(end_str.split('T')[0])
+        if 'date' in start_info and 'date' in end_info:
+            end_dt -= datetime.timedelta(days=1)
+        current_dt = start_dt
+        while current_dt <= end_dt:
+            all_events.append({'summary': event_raw.get('summary'), 'start': current_dt.isoformat(), 'is_holiday': False})
+            current_dt += datetime.timedelta(days=1)
+    all_events.sort(key=lambda x: x['start'])
+    upcoming = [e for e in all_events if e['start'] >= TODAY.isoformat()][:MAX_UPCOMING]
+    event_dates = {e['start'][:10] for e in upcoming}
+    return upcoming, event_dates, len(all_events)
+
+def month_grid_days():
+    """Zwraca wszystkie dni widocznej siatki miesiąca."""
+    import calendar
+    return [day for week in calendar.Calendar().monthdatescalendar(TODAY.year, TODAY.month) for day in week]
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    events_raw = make_calendar(count)
+    grid_days = month_grid_days()
+    repeat = 5
+
+    _, old_dates, expanded = expand_per_day(events_raw)
+    index = EventIndex.from_google_events(events_raw)
+    new_dates = index.event_dates(grid_days[0], grid_days[-1])
+
+    t_old = min(timeit.repeat(lambda: expand_per_day(events_raw), number=1, repeat=repeat))
+    t_build = min(timeit.repeat(lambda: EventIndex.from_google_events(events_raw), number=1, repeat=repeat))
+    t_upcoming = min(timeit.repeat(lambda: index.upcoming(MAX_UPCOMING, TODAY), number=1000, repeat=repeat)) / 1000
+    t_grid = min(timeit.repeat(lambda: index.event_dates(grid_days[0], grid_days[-1]), number=100, repeat=repeat)) / 100
+
+    print(f"Wydarzenia: {count} (po rozwinięciu na dni: {expanded})")
+    print(f"Rozwijanie na dni + sortowanie:    {t_old * 1000:8.2f} ms")
+    print(f"Budowa indeksu przedziałowego:     {t_build * 1000:8.2f} ms")
+    print(f"upcoming({MAX_UPCOMING}):                       {t_upcoming * 1e6:8.2f} µs")
+    print(f"Dni z wydarzeniami w siatce ({len(grid_days)} dni): {t_grid * 1e6:8.2f} µs")
+    print(f"Dni z wydarzeniami w siatce: dawniej {len(old_dates)}, indeks {len(new_dates)}")
+
+if __name__ == '__main__':
+    main()
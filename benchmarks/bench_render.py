@@ -0,0 +1,224 @@
+"""
+Benchmarki ścieżki renderowania: rysowanie każdego panelu, generowanie pełnej klatki,
+renderowanie ikon SVG, kwantyzacja i pakowanie obrazu (EPD.getbuffer) oraz ścieżka danych
+sterownika (EPD.display / EPD.Clear) na atrapie SPI/GPIO z benchmarks/fake_epdconfig.py.
+
+Dane paneli pochodzą z plików w benchmarks/fixtures, a konfiguracja z config.yaml.example
+(z osobnym katalogiem cache), więc benchmark nie dotyka danych działającego dashboardu.
+
+Uruchomienie:
+    python benchmarks/bench_render.py                      # pomiar
+    python benchmarks/bench_render.py --save               # pomiar i zapis punktu odniesienia
+    python benchmarks/bench_render.py --compare            # porównanie z punktem odniesienia
+    python benchmarks/bench_render.py --compare --threshold 0.2 --filter panel.
+    python benchmarks/bench_render.py --scaling 4          # przyspieszenie rysowania przy 1-4 wątkach
+
+Przy --compare kod wyjścia 1 oznacza, że któryś pomiar jest wolniejszy od punktu odniesienia
+o więcej niż próg. Punkty odniesienia zależą od maszyny - porównuj wyniki z tego samego komputera.
+"""
+import os
+import sys
+import atexit
+import json
+import time
+import logging
+import argparse
+import platform
+import datetime
+import tempfile
+import statistics
+
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, 'baselines', 'render.json')
+DEFAULT_THRESHOLD = 0.15
+# Różnice mniejsze niż ta wartość (ms) są traktowane jako szum pomiaru.
+MIN_SIGNIFICANT_MS = 0.01
+
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+def _prepare_config():
+    """Tworzy konfigurację benchmarku z config.yaml.example z osobnym katalogiem cache."""
+    if os.environ.get('WAVESHARE_DASHBOARD_CONFIG'):
+        return
+    with open(os.path.join(REPO_DIR, 'config.yaml.example'), 'r', encoding='utf-8') as f:
+        bench_config = yaml.safe_load(f)
+    bench_config['app']['cache_dir'] = 'waveshare-dashboard-bench'
+    fd, config_path = tempfile.mkstemp(prefix='dashboard-bench-', suffix='.yaml')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(bench_config, f, allow_unicode=True)
+    os.environ['WAVESHARE_DASHBOARD_CONFIG'] = config_path
+    atexit.register(os.remove, config_path)
+
+_prepare_config()
+
+import fake_epdconfig
+fake_epdconfig.install()
+
+from modules.config_loader import config
+from modules import asset_manager, data_store, display, drawing_utils
+from waveshare_epd import epd7in5_V2
+
+def load_fixtures():
+    """Publikuje dane z benchmarks/fixtures w magazynie danych."""
+    for file_name in sorted(os.listdir(FIXTURES_DIR)):
+        name, ext = os.path.splitext(file_name)
+        if ext != '.json':
+            continue
+        with open(os.path.join(FIXTURES_DIR, file_name), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if name == 'weather':
+            feather_path = asset_manager.get_path('icons_feather_path')
+            for key in ('icon', 'forecast_icon'):
+                data[key] = os.path.join(feather_path, f"{data[key]}.svg")
+        data_store.publish(name, data)
+
+def build_cases(layout_config):
+    """Zwraca listę przypadków (nazwa, funkcja, liczba wywołań na pomiar)."""
+    data = display._load_panel_data()
+    fonts = drawing_utils.load_fonts()
+    icon_path = data['weather']['icon']
+    epd = epd7in5_V2.EPD()
+    frame = display.generate_image(layout_config)
+    packed = epd.getbuffer(frame)
+
+    def svg_cold():
+        drawing_utils.render_svg_with_cache.cache_clear()
+        drawing_utils.render_svg_with_cache(icon_path, 64)
+
+    cases = [(f'panel.{name}', lambda name=name: display._draw_layer(name, layout_config, data, fonts), 5) for name in display.LAYER_NAMES]
+    cases += [
+        ('svg.render_cold', svg_cold, 1),
+        ('svg.render_cached', lambda: drawing_utils.render_svg_with_cache(icon_path, 64), 1000),
+        ('frame.load_panel_data', display._load_panel_data, 100),
+        ('frame.generate_image', lambda: display.generate_image(layout_config), 2),
+        ('frame.compose_only', lambda: display.generate_image(layout_config, panels=()), 5),
+        ('frame.flip', lambda: frame.rotate(180), 20),
+        ('pack.getbuffer', lambda: epd.getbuffer(frame), 2),
+        ('driver.display', lambda: epd.display(packed), 2),
+        ('driver.clear', epd.Clear, 5),
+    ]
+    return cases
+
+def run_case(func, number, repeat):
+    """Mierzy czas jednego wywołania (ms): minimum i mediana z `repeat` pomiarów po `number` wywołań."""
+    func()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        samples.append((time.perf_counter() - start) / number * 1000)
+    return {'min_ms': round(min(samples), 6), 'median_ms': round(statistics.median(samples), 6)}
+
+def measure_driver_traffic(epd, packed):
+    """Zwraca liczbę komend, bajtów i odpytań BUSY dla jednego pełnego odświeżenia."""
+    fake_epdconfig.reset_counters()
+    epd.init()
+    epd.display(packed)
+    epd.sleep()
+    return dict(fake_epdconfig.counters)
+
+def measure_scaling(layout_config, repeat, max_workers):
+    """Mierzy pełne generowanie klatki przy 1..max_workers wątkach rysujących i wypisuje przyspieszenie."""
+    print(f"\nRysowanie równoległe (dostępne rdzenie: {display._available_cores()}):")
+    scaling = {}
+    for workers in range(1, max_workers + 1):
+        display.set_render_workers(workers)
+        scaling[workers] = run_case(lambda: display.generate_image(layout_config), 2, repeat)
+        speedup = scaling[1]['min_ms'] / scaling[workers]['min_ms']
+        print(f"  {workers} wątk(i/ów)   min {scaling[workers]['min_ms']:10.3f} ms   przyspieszenie x{speedup:.2f}")
+    display.set_render_workers(display.RENDER_WORKERS)
+    return scaling
+
+def run_benchmarks(repeat, name_filter=None, scaling_workers=None):
+    asset_manager.sync_assets_to_cache()
+    asset_manager.initialize_runtime_paths()
+    load_fixtures()
+    layout_config = config.get('panels', {})
+
+    results = {}
+    for name, func, number in build_cases(layout_config):
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = run_case(func, number, repeat)
+        print(f"{name:<28} min {results[name]['min_ms']:10.3f} ms   mediana {results[name]['median_ms']:10.3f} ms")
+
+    epd = epd7in5_V2.EPD()
+    traffic = measure_driver_traffic(epd, epd.getbuffer(display.generate_image(layout_config)))
+    print(f"Ruch SPI na pełne odświeżenie: {traffic}")
+    scaling = measure_scaling(layout_config, repeat, scaling_workers) if scaling_workers else None
+    return {
+        'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': f"{platform.node()} ({platform.machine()})",
+        'repeat': repeat,
+        'results': results,
+        'driver_traffic': traffic,
+        'render_scaling': scaling
+    }
+
+def compare(current, baseline, threshold):
+    """
+    Wypisuje raport porównania. Porównywane są minima pomiarów, które są mniej wrażliwe na
+    obciążenie maszyny niż mediany. Zwraca listę przypadków z regresją.
+    """
+    regressions = []
+    print(f"\nPorównanie z punktem odniesienia z {baseline.get('created_at')} ({baseline.get('machine')}), próg {threshold:.0%}:")
+    for name, result in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base:
+            print(f"  {name:<28} {result['min_ms']:10.3f} ms   (brak w punkcie odniesienia)")
+            continue
+        ratio = result['min_ms'] / base['min_ms'] if base['min_ms'] else 1.0
+        if abs(result['min_ms'] - base['min_ms']) < MIN_SIGNIFICANT_MS:
+            status = 'ok'
+        elif ratio > 1 + threshold:
+            status = 'REGRESJA'
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            status = 'poprawa'
+        else:
+            status = 'ok'
+        print(f"  {name:<28} {base['min_ms']:10.3f} -> {result['min_ms']:10.3f} ms   {ratio - 1:+7.1%}   {status}")
+    if current.get('driver_traffic', {}).get('bytes') != baseline.get('driver_traffic', {}).get('bytes'):
+        print(f"  Zmienił się ruch SPI: {baseline.get('driver_traffic')} -> {current.get('driver_traffic')}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarki renderowania i sterownika wyświetlacza")
+    parser.add_argument('--repeat', type=int, default=7, help='Liczba pomiarów każdego przypadku.')
+    parser.add_argument('--filter', dest='name_filter', help='Uruchamia tylko przypadki zawierające ten tekst.')
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, help='Zapisuje wyniki jako punkt odniesienia.')
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, help='Porównuje wyniki z punktem odniesienia.')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help='Dopuszczalny wzrost czasu (0.15 = 15%%).')
+    parser.add_argument('--scaling', type=int, metavar='N', help='Mierzy generowanie klatki przy 1..N wątkach rysujących.')
+    parser.add_argument('--verbose', action='store_true', help='Pokazuje logi aplikacji.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL)
+
+    current = run_benchmarks(args.repeat, args.name_filter, args.scaling)
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegresje wydajności: {', '.join(regressions)}")
+            exit_code = 1
+        else:
+            print("\nBrak regresji wydajności.")
+    if args.save:
+        os.makedirs(os.path.dirname(os.path.abspath(args.save)), exist_ok=True)
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=2, ensure_ascii=False)
+        print(f"Zapisano punkt odniesienia w {args.save}")
+    sys.exit(exit_code)
+
+if __name__ == '__main__':
+    main()
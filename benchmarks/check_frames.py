@@ -0,0 +1,284 @@
+"""
+Sprawdzenie klatek wzorcowych (golden frames): renderuje pełną klatkę (generate_image) dla
+zestawu scenariuszy danych i porównuje spakowany bufor wyświetlacza (EPD.getbuffer) z zapisanym
+wzorcem - bit w bit lub z dopuszczalną liczbą różnych pikseli. Dla każdego scenariusza
+sprawdzany jest też budżet czasu renderowania zapisany razem ze wzorcami.
+
+Scenariusze: zwykły dzień, błąd autoryzacji Google, dzisiejsze święto, długie tytuły wydarzeń,
+brak danych pogodowych, obraz obrócony i przesunięty (ochrona ekranu). Dane pochodzą
+z benchmarks/fixtures, zegar jest zamrożony (benchmarks/virtual_clock.py), a ikony SVG są
+zastępowane stałymi bitmapami (benchmarks/fake_icons.py), więc klatki nie zależą od biblioteki SVG.
+
+Uruchomienie:
+    python benchmarks/check_frames.py --update            # zapis wzorców i budżetów (benchmarks/goldens)
+    python benchmarks/check_frames.py                     # porównanie z wzorcami
+    python benchmarks/check_frames.py --tolerance 20 --budget-scale 3 --diff-dir /tmp/roznice
+
+Kod wyjścia 1 oznacza, że któraś klatka różni się od wzorca lub przekroczyła budżet czasu,
+a kod 2 - brak katalogu wzorców, manifestu lub wzorca któregoś scenariusza (błąd konfiguracji).
+Wzorce w benchmarks/goldens pochodzą z kodu sprzed optymalizacji renderowania, więc chronią przed
+zmianą wyglądu klatek (pochodzenie opisuje pole `source` w manifest.json). Scenariusz może mieć
+w manifeście własną tolerancję (`tolerance`, uzasadnioną w `tolerance_reason`) dla zamierzonej
+różnicy względem wzorca. Wzorce zależą od czcionek, a budżety od maszyny - na innym sprzęcie
+skaluj budżety opcją --budget-scale.
+"""
+import os
+import sys
+import copy
+import json
+import math
+import time
+import atexit
+import logging
+import argparse
+import platform
+import datetime
+import tempfile
+
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures')
+DEFAULT_GOLDENS_DIR = os.path.join(BENCH_DIR, 'goldens')
+MANIFEST_NAME = 'manifest.json'
+# Budżet czasu zapisywany przy --update to zmierzony czas z takim zapasem.
+BUDGET_HEADROOM = 1.5
+
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import virtual_clock
+
+def _prepare_config():
+    """Tworzy konfigurację z config.yaml.example z osobnym katalogiem cache."""
+    if os.environ.get('WAVESHARE_DASHBOARD_CONFIG'):
+        return
+    with open(os.path.join(REPO_DIR, 'config.yaml.example'), 'r', encoding='utf-8') as f:
+        check_config = yaml.safe_load(f)
+    check_config['app']['cache_dir'] = 'waveshare-dashboard-bench'
+    check_config['app']['state_dir'] = os.path.join(tempfile.gettempdir(), 'waveshare-dashboard-bench', 'state')
+    fd, config_path = tempfile.mkstemp(prefix='dashboard-goldens-', suffix='.yaml')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(check_config, f, allow_unicode=True)
+    os.environ['WAVESHARE_DASHBOARD_CONFIG'] = config_path
+    atexit.register(os.remove, config_path)
+
+_prepare_config()
+CLOCK = virtual_clock.install()
+
+import fake_epdconfig
+fake_epdconfig.install()
+
+from PIL import Image, ImageChops
+
+from modules.config_loader import config
+from modules import asset_manager, data_store, display
+from waveshare_epd import epd7in5_V2
+
+import fake_icons
+fake_icons.install()
+
+# Chwila, z której pochodzą dane w benchmarks/fixtures.
+FIXTURES_TIME = datetime.datetime(2026, 10, 19, 18, 47)
+
+def load_fixtures():
+    """Zwraca dane paneli z benchmarks/fixtures jako słownik {zbiór danych: dane}."""
+    data = {}
+    for file_name in sorted(os.listdir(FIXTURES_DIR)):
+        name, ext = os.path.splitext(file_name)
+        if ext != '.json':
+            continue
+        with open(os.path.join(FIXTURES_DIR, file_name), 'r', encoding='utf-8') as f:
+            data[name] = json.load(f)
+    feather_path = asset_manager.get_path('icons_feather_path')
+    for key in ('icon', 'forecast_icon'):
+        data['weather'][key] = os.path.join(feather_path, f"{data['weather'][key]}.svg")
+    return data
+
+def _auth_error(data):
+    data['calendar']['error'] = 'AUTH_ERROR'
+
+def _holiday_today(data):
+    data['time'] = {'time': '09:15', 'date': '01.11.2026', 'weekday': 'Niedziela'}
+    calendar_data = data['calendar']
+    # Święta listopada, tak jak zwraca je kalendarz świąt w listopadzie.
+    calendar_data['holiday_dates'] = ['2026-11-01', '2026-11-11']
+    calendar_data['upcoming_events'] = [event for event in calendar_data['upcoming_events'] if event['start'][:10] >= '2026-11-01']
+    calendar_data['unusual_holiday'] = 'Dzień Wegan'
+    calendar_data['unusual_holiday_desc'] = 'Święto promujące dietę roślinną.'
+
+def _long_summaries(data):
+    calendar_data = data['calendar']
+    for event in calendar_data['upcoming_events']:
+        event['summary'] = f"{event['summary']} - spotkanie organizacyjne z bardzo długim opisem, które nie mieści się w jednej linii"
+    calendar_data['unusual_holiday'] = 'Międzynarodowy Dzień Świadomości Zagrożeń Związanych z Bardzo Długimi Nazwami Świąt'
+    calendar_data['unusual_holiday_desc'] = ' '.join([calendar_data['unusual_holiday_desc']] * 3)
+
+def _missing_weather(data):
+    del data['weather']
+    del data['airly']
+
+def _flip(image):
+    return image.rotate(180)
+
+def _pixel_shift(image):
+    return display._shift_image(image, 2, -2)
+
+# Scenariusz: opis, modyfikacja danych z fixtures, chwila renderowania i przekształcenie klatki
+# wykonywane przed wysłaniem na wyświetlacz (jak w display.update_display i _execute_display_update).
+SCENARIOS = {
+    'normal': {'description': 'zwykły dzień', 'prepare': None, 'now': FIXTURES_TIME, 'transform': None},
+    'auth_error': {'description': 'błąd autoryzacji Google', 'prepare': _auth_error, 'now': FIXTURES_TIME, 'transform': None},
+    'holiday_today': {'description': 'dzisiejsze święto', 'prepare': _holiday_today, 'now': datetime.datetime(2026, 11, 1, 9, 15), 'transform': None},
+    'long_summaries': {'description': 'długie tytuły wydarzeń i święta', 'prepare': _long_summaries, 'now': FIXTURES_TIME, 'transform': None},
+    'missing_weather': {'description': 'brak danych pogodowych', 'prepare': _missing_weather, 'now': FIXTURES_TIME, 'transform': None},
+    'flipped': {'description': 'obraz obrócony o 180 stopni', 'prepare': None, 'now': FIXTURES_TIME, 'transform': _flip},
+    'pixel_shifted': {'description': 'przesunięcie pikseli (2, -2)', 'prepare': None, 'now': FIXTURES_TIME, 'transform': _pixel_shift}
+}
+
+def _publish(data):
+    """Zastępuje zawartość magazynu danych danymi scenariusza."""
+    with data_store._lock:
+        data_store._entries.clear()
+    for name, value in data.items():
+        data_store.publish(name, value)
+
+def render_scenario(scenario, fixtures, layout_config, epd, repeat):
+    """Renderuje klatkę scenariusza. Zwraca (klatka, spakowany bufor, najkrótszy czas renderowania w ms)."""
+    data = copy.deepcopy(fixtures)
+    if scenario['prepare']:
+        scenario['prepare'](data)
+    CLOCK.set_datetime(scenario['now'])
+    _publish(data)
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        frame = display.generate_image(layout_config)
+        if scenario['transform']:
+            frame = scenario['transform'](frame)
+        packed = bytes(epd.getbuffer(frame))
+        samples.append((time.perf_counter() - start) * 1000)
+    return frame, packed, min(samples)
+
+def count_different_pixels(packed, golden_packed):
+    """Zwraca liczbę pikseli różniących się między dwoma spakowanymi buforami (1 bit na piksel)."""
+    if len(packed) != len(golden_packed):
+        return len(packed) * 8
+    return int.from_bytes(bytes(a ^ b for a, b in zip(packed, golden_packed)), 'big').bit_count()
+
+def save_diff(diff_dir, name, frame, golden):
+    """Zapisuje obraz różnic (białe piksele = różnica) do katalogu `diff_dir`."""
+    os.makedirs(diff_dir, exist_ok=True)
+    diff = ImageChops.difference(frame.convert('1').convert('L'), golden.convert('L'))
+    diff_path = os.path.join(diff_dir, f"{name}_diff.png")
+    diff.save(diff_path)
+    frame.convert('1').save(os.path.join(diff_dir, f"{name}_current.png"))
+    return diff_path
+
+def _load_manifest(goldens_dir):
+    try:
+        with open(os.path.join(goldens_dir, MANIFEST_NAME), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'scenarios': {}}
+
+def find_missing_goldens(goldens_dir, names):
+    """Zwraca opis brakujących plików wzorców (katalog, manifest, klatki scenariuszy) lub pustą listę."""
+    if not os.path.isdir(goldens_dir):
+        return [f"katalog {goldens_dir}"]
+    if not os.path.exists(os.path.join(goldens_dir, MANIFEST_NAME)):
+        return [f"{MANIFEST_NAME} w {goldens_dir}"]
+    manifest = _load_manifest(goldens_dir)
+    return [
+        f"wzorzec scenariusza '{name}'" for name in names
+        if name not in manifest['scenarios'] or not os.path.exists(os.path.join(goldens_dir, f"{name}.png"))
+    ]
+
+def update_goldens(goldens_dir, names, fixtures, layout_config, epd, repeat):
+    """Zapisuje klatki wzorcowe i budżety czasu wskazanych scenariuszy."""
+    os.makedirs(goldens_dir, exist_ok=True)
+    manifest = _load_manifest(goldens_dir)
+    for name in names:
+        frame, packed, render_ms = render_scenario(SCENARIOS[name], fixtures, layout_config, epd, repeat)
+        frame.convert('1').save(os.path.join(goldens_dir, f"{name}.png"))
+        manifest['scenarios'][name] = {
+            'description': SCENARIOS[name]['description'],
+            'render_ms': round(render_ms, 2),
+            'budget_ms': math.ceil(render_ms * BUDGET_HEADROOM)
+        }
+        print(f"{name:<18} zapisano wzorzec, renderowanie {render_ms:8.1f} ms, budżet {manifest['scenarios'][name]['budget_ms']} ms")
+    manifest['source'] = 'check_frames.py --update'
+    manifest['created_at'] = datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds')
+    manifest['machine'] = f"{platform.node()} ({platform.machine()})"
+    with open(os.path.join(goldens_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    print(f"Zapisano wzorce w {goldens_dir}")
+
+def check_goldens(goldens_dir, names, fixtures, layout_config, epd, repeat, tolerance, budget_scale, diff_dir=None):
+    """Porównuje klatki scenariuszy ze wzorcami i budżetami czasu. Zwraca listę scenariuszy z błędami."""
+    manifest = _load_manifest(goldens_dir)
+    failures = []
+    for name in names:
+        golden_path = os.path.join(goldens_dir, f"{name}.png")
+        expected = manifest['scenarios'][name]
+        frame, packed, render_ms = render_scenario(SCENARIOS[name], fixtures, layout_config, epd, repeat)
+        with Image.open(golden_path) as golden_image:
+            golden = golden_image.convert('1')
+        different_pixels = count_different_pixels(packed, bytes(epd.getbuffer(golden)))
+        budget_ms = expected['budget_ms'] * budget_scale
+        allowed = max(tolerance, expected.get('tolerance', 0))
+
+        problems = []
+        if different_pixels > allowed:
+            problems.append(f"{different_pixels} różnych pikseli (tolerancja {allowed})")
+            if diff_dir:
+                problems[-1] += f", różnice: {save_diff(diff_dir, name, frame, golden)}"
+        if budget_scale and render_ms > budget_ms:
+            problems.append(f"przekroczony budżet czasu {budget_ms:.0f} ms")
+        status = 'ok' if not problems else 'BŁĄD: ' + '; '.join(problems)
+        print(f"{name:<18} piksele {different_pixels:6d}   renderowanie {render_ms:8.1f} ms / {budget_ms:6.0f} ms   {status}")
+        if problems:
+            failures.append(name)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Porównanie klatek z wzorcami (golden frames) i budżety czasu renderowania")
+    parser.add_argument('scenarios', nargs='*', help=f"Scenariusze do sprawdzenia (domyślnie wszystkie: {', '.join(SCENARIOS)}).")
+    parser.add_argument('--goldens', default=DEFAULT_GOLDENS_DIR, help='Katalog z wzorcami i plikiem manifest.json.')
+    parser.add_argument('--update', action='store_true', help='Zapisuje bieżące klatki jako wzorce i wyznacza budżety czasu.')
+    parser.add_argument('--tolerance', type=int, default=0, help='Dopuszczalna liczba różnych pikseli (0 = bit w bit).')
+    parser.add_argument('--budget-scale', type=float, default=1.0, help='Mnożnik budżetów czasu, np. dla wolniejszej maszyny (0 wyłącza budżety).')
+    parser.add_argument('--repeat', type=int, default=3, help='Liczba renderowań scenariusza (brany jest najkrótszy czas).')
+    parser.add_argument('--diff-dir', help='Zapisuje obrazy różnic klatek niezgodnych ze wzorcem.')
+    parser.add_argument('--verbose', action='store_true', help='Pokazuje logi aplikacji.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.CRITICAL, force=True)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Nieznane scenariusze: {', '.join(unknown)}")
+    names = args.scenarios or list(SCENARIOS)
+    missing = [] if args.update else find_missing_goldens(args.goldens, names)
+    if missing:
+        print(f"Brak wzorców: {', '.join(missing)}. Utwórz je przez --update lub wskaż katalog opcją --goldens.", file=sys.stderr)
+        sys.exit(2)
+
+    asset_manager.sync_assets_to_cache()
+    asset_manager.initialize_runtime_paths()
+    fixtures = load_fixtures()
+    layout_config = config.get('panels', {})
+    epd = epd7in5_V2.EPD()
+
+    if args.update:
+        update_goldens(args.goldens, names, fixtures, layout_config, epd, args.repeat)
+        return
+    failures = check_goldens(args.goldens, names, fixtures, layout_config, epd, args.repeat, args.tolerance, args.budget_scale, args.diff_dir)
+    if failures:
+        print(f"\nNiezgodne klatki lub przekroczone budżety: {', '.join(failures)}")
+        sys.exit(1)
+    print("\nWszystkie klatki zgodne ze wzorcami.")
+
+if __name__ == '__main__':
+    main()
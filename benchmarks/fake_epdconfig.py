@@ -0,0 +1,56 @@
+"""
+Atrapa warstwy SPI/GPIO sterownika Waveshare (waveshare_epd.epdconfig) do uruchamiania
+benchmarków na zwykłym komputerze z Linuksem. Zlicza komendy, wysłane bajty i odpytania
+linii BUSY; wyświetlacz jest od razu gotowy, a opóźnienia są pomijane.
+"""
+import sys
+import types
+
+RST_PIN = 17
+DC_PIN = 25
+CS_PIN = 8
+BUSY_PIN = 24
+PWR_PIN = 18
+
+counters = {'commands': 0, 'bytes': 0, 'busy_polls': 0, 'delay_ms': 0}
+
+def reset_counters():
+    for key in counters:
+        counters[key] = 0
+
+def digital_write(pin, value):
+    pass
+
+def digital_read(pin):
+    if pin == BUSY_PIN:
+        counters['busy_polls'] += 1
+    return 1
+
+def delay_ms(delaytime):
+    counters['delay_ms'] += delaytime
+
+def spi_writebyte(data):
+    counters['commands'] += 1
+    counters['bytes'] += len(data)
+
+def spi_writebyte2(data):
+    counters['bytes'] += len(data)
+
+def module_init(cleanup=False):
+    return 0
+
+def module_exit(cleanup=False):
+    pass
+
+def _writebytes2(data):
+    counters['bytes'] += len(data)
+
+SPI = types.SimpleNamespace(writebytes2=_writebytes2)
+
+def install():
+    """Podmienia waveshare_epd.epdconfig na tę atrapę. Należy wywołać przed importem modułów aplikacji."""
+    import waveshare_epd
+    module = sys.modules[__name__]
+    sys.modules['waveshare_epd.epdconfig'] = module
+    waveshare_epd.epdconfig = module
+    return module
@@ -0,0 +1,37 @@
+"""
+Atrapa renderowania ikon SVG (drawing_utils.render_svg_with_cache) dla klatek wzorcowych.
+Zamiast rasteryzować SVG zwraca stałą bitmapę zależną tylko od nazwy pliku i rozmiaru, więc
+klatki są identyczne niezależnie od tego, czy na maszynie działa cairosvg, svglib, czy żadna
+z nich. Położenie, rozmiar i przezroczystość ikon pozostają takie jak przy prawdziwym renderowaniu.
+"""
+import os
+import zlib
+
+from PIL import Image, ImageDraw
+
+BLACK = (0, 0, 0, 255)
+TRANSPARENT = (255, 255, 255, 0)
+# Wzór ikony: siatka GRID x GRID pól zapełnionych według sumy kontrolnej nazwy pliku.
+GRID = 4
+
+def render_icon(svg_path, size):
+    """Zwraca stałą ikonę RGBA dla pliku SVG lub None, gdy plik nie istnieje (jak render_svg_with_cache)."""
+    if not svg_path or not os.path.exists(svg_path):
+        return None
+    icon = Image.new('RGBA', (size, size), TRANSPARENT)
+    draw = ImageDraw.Draw(icon)
+    draw.rectangle((0, 0, size - 1, size - 1), outline=BLACK, width=max(1, size // 16))
+    pattern = zlib.crc32(os.path.basename(svg_path).encode('utf-8'))
+    cell = size // (GRID + 2)
+    for i in range(GRID * GRID):
+        if pattern >> i & 1:
+            x = cell * (1 + i % GRID)
+            y = cell * (1 + i // GRID)
+            draw.rectangle((x, y, x + cell - 1, y + cell - 1), fill=BLACK)
+    return icon
+
+def install():
+    """Podmienia drawing_utils.render_svg_with_cache na atrapę. Należy wywołać przed rysowaniem paneli."""
+    from modules import drawing_utils
+    drawing_utils.render_svg_with_cache = render_icon
+    return render_icon
@@ -0,0 +1,440 @@
+"""
+Odtworzenie pełnej doby pracy dashboardu w przyspieszonym czasie. Zadania z main.py
+(zegar, cogodzinna aktualizacja, głębokie odświeżenie, pobudka i przerysowania po zmianie
+danych) są wykonywane według wirtualnego zegara, więc 1440 minut trwa kilkadziesiąt sekund.
+
+Odpowiedzi AccuWeather i Airly serwuje lokalny serwer HTTP z nagranymi danymi
+z benchmarks/fixtures/replay, a Google Calendar jest podmieniony na atrapę klienta API
+(events().list i żądania wsadowe) zwracającą wydarzenia z calendar_events.json.
+Wyświetlacz działa na atrapie SPI/GPIO z benchmarks/fake_epdconfig.py.
+
+Na końcu wypisywany jest raport: liczba zapytań do każdego API, rodzaje odświeżeń ekranu,
+zapisane bajty, czasy etapów oraz czas procesora potrzebny na dobę pracy.
+
+Uruchomienie:
+    python benchmarks/replay_day.py                              # doba od północy 2026-03-16
+    python benchmarks/replay_day.py --date 2026-03-31 --start 06:00 --minutes 180
+    python benchmarks/replay_day.py --report replay.json --frames /tmp/klatki
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import shutil
+import types
+import logging
+import argparse
+import datetime
+import tempfile
+import functools
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+REPLAY_FIXTURES_DIR = os.path.join(BENCH_DIR, 'fixtures', 'replay')
+TIMEZONE = 'Europe/Warsaw'
+DEFAULT_DATE = '2026-03-16'
+
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+import virtual_clock
+
+def _prepare_config(cache_dir):
+    """Tworzy konfigurację odtworzenia z config.yaml.example z tymczasowym katalogiem cache."""
+    with open(os.path.join(REPO_DIR, 'config.yaml.example'), 'r', encoding='utf-8') as f:
+        replay_config = yaml.safe_load(f)
+    replay_config['app']['cache_dir'] = cache_dir
+    replay_config['app']['state_dir'] = os.path.join(cache_dir, 'state')
+    replay_config['location'].update({'latitude': 52.2297, 'longitude': 21.0122})
+    replay_config['api_keys']['accuweather'] = 'replay'
+    replay_config['api_keys']['airly'] = 'replay'
+    replay_config['api_keys']['accuweather_location_key'] = 'replay'
+    fd, config_path = tempfile.mkstemp(prefix='dashboard-replay-', suffix='.yaml')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        yaml.safe_dump(replay_config, f, allow_unicode=True)
+    os.environ['WAVESHARE_DASHBOARD_CONFIG'] = config_path
+    atexit.register(os.remove, config_path)
+
+CACHE_DIR = tempfile.mkdtemp(prefix='dashboard-replay-cache-')
+_prepare_config(CACHE_DIR)
+CLOCK = virtual_clock.install(TIMEZONE)
+os.environ.setdefault('NO_PROXY', '127.0.0.1,localhost')
+
+import fake_epdconfig
+fake_epdconfig.install()
+
+from apscheduler.triggers.cron import CronTrigger
+
+import main as app
+from modules.config_loader import config
+from modules import (accuweather, airly, google_calendar, display, asset_manager, render_scheduler, scheduling,
+                     json_writer, metrics, refresh_ledger, refresh_policy, quota, network_utils, clock_prerender,
+                     display_worker, state_journal)
+
+def _load_fixture(name):
+    with open(os.path.join(REPLAY_FIXTURES_DIR, name), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+# --- Lokalny serwer z nagranymi odpowiedziami AccuWeather i Airly ----------------------------
+
+class FixtureServer:
+    """Serwer HTTP na 127.0.0.1 zwracający nagrane odpowiedzi i nagłówki limitów zapytań."""
+
+    ROUTES = {
+        '/accuweather/current': ('accuweather', 'accuweather_current.json'),
+        '/accuweather/forecast': ('accuweather', 'accuweather_forecast.json'),
+        '/airly/measurements': ('airly', 'airly_measurements.json')
+    }
+    DAILY_LIMITS = {'accuweather': 50, 'airly': 100}
+
+    def __init__(self):
+        self.responses = {path: _load_fixture(file_name) for path, (_, file_name) in self.ROUTES.items()}
+        self.calls = {provider: 0 for provider in self.DAILY_LIMITS}
+        self.total_calls = dict(self.calls)
+        self._day = None
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.handle(self)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, name="FixtureServerThread", daemon=True).start()
+
+    def handle(self, request):
+        path = request.path.split('?', 1)[0]
+        route = self.ROUTES.get(path)
+        if route is None:
+            request.send_error(404)
+            return
+        provider = route[0]
+        with self._lock:
+            today = datetime.date.today()
+            if self._day != today:
+                self._day = today
+                self.calls = {name: 0 for name in self.DAILY_LIMITS}
+            self.calls[provider] += 1
+            self.total_calls[provider] += 1
+            remaining = max(0, self.DAILY_LIMITS[provider] - self.calls[provider])
+        body = json.dumps(self.responses[path], ensure_ascii=False).encode('utf-8')
+        request.send_response(200)
+        request.send_header('Content-Type', 'application/json; charset=utf-8')
+        request.send_header('Content-Length', str(len(body)))
+        if provider == 'accuweather':
+            request.send_header('RateLimit-Limit', str(self.DAILY_LIMITS[provider]))
+            request.send_header('RateLimit-Remaining', str(remaining))
+        else:
+            request.send_header('X-RateLimit-Limit-day', str(self.DAILY_LIMITS[provider]))
+            request.send_header('X-RateLimit-Remaining-day', str(remaining))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def shutdown(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+# --- Atrapa klienta Google Calendar ----------------------------------------------------------
+
+def _parse_rfc3339(value):
+    return datetime.datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+def _event_bound(bound):
+    if 'dateTime' in bound:
+        return _parse_rfc3339(bound['dateTime'])
+    # Wydarzenia całodniowe zaczynają się o lokalnej północy.
+    return datetime.datetime.fromisoformat(bound['date']).astimezone()
+
+class FakeCalendarService:
+    """
+    Zastępuje obiekt usługi googleapiclient: obsługuje events().list(...).execute()
+    i new_batch_http_request(), licząc zapytania i żądania HTTP.
+    """
+
+    def __init__(self, events_by_calendar):
+        self.events_by_calendar = events_by_calendar
+        self.stats = {'calls': 0, 'http_requests': 0, 'batches': 0}
+
+    def events(self):
+        return self
+
+    def list(self, calendarId, timeMin, timeMax=None, maxResults=250, **kwargs):
+        return _FakeListRequest(self, calendarId, timeMin, timeMax, maxResults)
+
+    def new_batch_http_request(self, callback=None):
+        return _FakeBatch(self, callback)
+
+    def query(self, calendar_id, time_min, time_max, max_results):
+        time_min = _parse_rfc3339(time_min)
+        time_max = _parse_rfc3339(time_max) if time_max else None
+        items = [
+            event for event in self.events_by_calendar.get(calendar_id, [])
+            if _event_bound(event['end']) > time_min and (time_max is None or _event_bound(event['start']) < time_max)
+        ]
+        items.sort(key=lambda event: _event_bound(event['start']))
+        return {'kind': 'calendar#events', 'items': items[:max_results]}
+
+class _FakeListRequest:
+    def __init__(self, service, calendar_id, time_min, time_max, max_results):
+        self.service = service
+        self.args = (calendar_id, time_min, time_max, max_results)
+
+    def execute(self):
+        self.service.stats['calls'] += 1
+        self.service.stats['http_requests'] += 1
+        return self.service.query(*self.args)
+
+class _FakeBatch:
+    def __init__(self, service, callback):
+        self.service = service
+        self.callback = callback
+        self.requests = []
+
+    def add(self, request, request_id=None):
+        self.requests.append((request_id, request))
+
+    def execute(self):
+        self.service.stats['batches'] += 1
+        self.service.stats['http_requests'] += 1
+        for request_id, request in self.requests:
+            self.service.stats['calls'] += 1
+            self.callback(request_id, self.service.query(*request.args), None)
+
+# --- Harmonogram wirtualnego czasu -----------------------------------------------------------
+
+class VirtualScheduler:
+    """
+    Minimalny odpowiednik harmonogramu APScheduler wykonujący zadania synchronicznie
+    w kolejności wirtualnego czasu. Obsługuje wyzwalacze 'cron', 'date' i 'interval'.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self.runs = {}
+
+    def add_job(self, func, trigger, id=None, kwargs=None, replace_existing=False, **fields):
+        job_id = id or f"{func.__module__}.{func.__qualname__}"
+        fields.pop('misfire_grace_time', None)
+        if trigger == 'cron':
+            cron = CronTrigger(timezone=TIMEZONE, **fields)
+            job = {'cron': cron, 'next': self._next_cron(cron, CLOCK.timestamp())}
+        elif trigger == 'date':
+            job = {'next': fields['run_date'].timestamp()}
+        elif trigger == 'interval':
+            interval = datetime.timedelta(**fields).total_seconds()
+            job = {'interval': interval, 'next': CLOCK.timestamp() + interval}
+        else:
+            raise ValueError(f"Nieobsługiwany wyzwalacz: {trigger}")
+        job.update({'id': job_id, 'func': func, 'kwargs': kwargs or {}})
+        with self._lock:
+            self._jobs[job_id] = job
+        return job
+
+    def get_jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get_job(self, job_id):
+        """Zwraca zadanie z polem `next_run_time` (jak w APScheduler) lub None."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return None
+        next_run_time = datetime.datetime.fromtimestamp(job['next'], datetime.timezone.utc) if job['next'] is not None else None
+        return types.SimpleNamespace(id=job_id, next_run_time=next_run_time)
+
+    def remove_job(self, job_id):
+        with self._lock:
+            del self._jobs[job_id]
+
+    @staticmethod
+    def _next_cron(cron, after):
+        now = datetime.datetime.fromtimestamp(after, cron.timezone)
+        fire_time = cron.get_next_fire_time(None, now)
+        return fire_time.timestamp() if fire_time else None
+
+    def run_until(self, end_timestamp):
+        """Wykonuje zadania w kolejności czasu aż do `end_timestamp`."""
+        while True:
+            with self._lock:
+                due = [job for job in self._jobs.values() if job['next'] is not None and job['next'] <= end_timestamp]
+                if not due:
+                    break
+                job = min(due, key=lambda job: job['next'])
+                fire_time = job['next']
+                if 'cron' in job:
+                    job['next'] = self._next_cron(job['cron'], fire_time + 1)
+                elif 'interval' in job:
+                    job['next'] = fire_time + job['interval']
+                else:
+                    del self._jobs[job['id']]
+            CLOCK.set(fire_time)
+            self.runs[job['id']] = self.runs.get(job['id'], 0) + 1
+            try:
+                job['func'](**job['kwargs'])
+            except Exception as e:
+                logging.error(f"Błąd zadania '{job['id']}': {e}", exc_info=True)
+        CLOCK.set(end_timestamp)
+
+# --- Odtworzenie doby ------------------------------------------------------------------------
+
+def install_fakes(server, frames_dir=None):
+    """Kieruje klientów API na lokalne atrapy i zlicza zapisywane klatki."""
+    accuweather.CURRENT_CONDITIONS_URL = f"{server.base_url}/accuweather/current"
+    accuweather.DAILY_FORECAST_URL = f"{server.base_url}/accuweather/forecast"
+    airly.API_URL = f"{server.base_url}/airly/measurements"
+
+    calendar_ids = config['google_calendar']['calendar_ids']
+    events = _load_fixture('calendar_events.json')
+    service = FakeCalendarService({calendar_ids[role]: items for role, items in events.items()})
+    google_calendar.get_google_creds = lambda: object()
+    google_calendar.build = lambda *args, **kwargs: service
+
+    frames = {'count': 0, 'png_bytes': 0}
+    execute_display_update = display._execute_display_update
+
+    @functools.wraps(execute_display_update)
+    def recorded_display_update(img, flip, **kwargs):
+        displayed = execute_display_update(img, flip, **kwargs)
+        if displayed:
+            frames['count'] += 1
+            if frames_dir:
+                frame_path = os.path.join(frames_dir, f"{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}_{frames['count']:04d}.png")
+                img.save(frame_path)
+                frames['png_bytes'] += os.path.getsize(frame_path)
+        return displayed
+
+    display._execute_display_update = recorded_display_update
+    return service, frames
+
+def replay(start, minutes, frames_dir=None):
+    """Odtwarza `minutes` minut pracy od `start` (lokalny czas) i zwraca raport."""
+    CLOCK.set(start.timestamp())
+    server = FixtureServer()
+    service, frames = install_fakes(server, frames_dir)
+
+    asset_manager.sync_assets_to_cache()
+    asset_manager.initialize_runtime_paths()
+    layout_config = config.get('panels', {})
+    refresh_intervals = config.get('refresh_intervals', {})
+    last_update_times = {source: datetime.datetime.min for source in ('accuweather', 'airly', 'google_calendar')}
+    scheduler = VirtualScheduler()
+    scheduling.set_scheduler(scheduler)
+    app.should_flip = False
+    args = argparse.Namespace(draw_borders=False, verbose=False, profile_memory=False)
+
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        render_scheduler.start(lambda panels: display.update_display(
+            layout_config, force_full_refresh=False, apply_pixel_shift=False, flip=False, quiet=True, panels=panels))
+        # Zimny start bez ekranu powitalnego, jak w main.main().
+        app.revalidate_and_render(layout_config, refresh_intervals, last_update_times, force_full_refresh=True, apply_pixel_shift=True)
+        app.schedule_jobs(scheduler, layout_config, refresh_intervals, last_update_times, args)
+        scheduler.run_until(start.timestamp() + minutes * 60)
+    finally:
+        server.shutdown()
+    wall_seconds = time.perf_counter() - wall_start
+    cpu_seconds = time.process_time() - cpu_start
+    refresh_ledger.save()
+    metrics.write_textfile()
+    state_journal.flush()
+
+    json_stats = json_writer.get_write_stats()
+    metrics_bytes = os.path.getsize(metrics.TEXTFILE_PATH) if metrics.TEXTFILE_PATH and os.path.exists(metrics.TEXTFILE_PATH) else 0
+    return {
+        'simulated': {
+            'start': start.isoformat(timespec='minutes'),
+            'end': datetime.datetime.now().isoformat(timespec='minutes'),
+            'minutes': minutes
+        },
+        'wall_seconds': round(wall_seconds, 2),
+        'cpu_seconds': round(cpu_seconds, 2),
+        'speedup': round(minutes * 60 / wall_seconds) if wall_seconds else None,
+        'jobs': dict(sorted(scheduler.runs.items())),
+        'api_calls': {
+            'accuweather': server.total_calls['accuweather'],
+            'airly': server.total_calls['airly'],
+            'google_calendar': dict(service.stats)
+        },
+        'quota': quota.get_quota_metrics(),
+        'breakers': {source: state['state'] for source, state in network_utils.get_source_states().items()},
+        'refreshes': refresh_ledger.get_days(),
+        'refresh_policy': refresh_policy.get_daily_stats()['counts'],
+        'frames': frames['count'],
+        'clock_prerender': clock_prerender.get_stats(),
+        'display_worker': display_worker.get_stats(),
+        'bytes_written': {
+            'json': json_stats['bytes_written'],
+            'json_writes': json_stats['writes'],
+            'json_skipped': json_stats['skipped'],
+            'json_files': json_stats['files'],
+            'metrics_textfile': metrics_bytes,
+            'frames_png': frames['png_bytes']
+        },
+        'render_latency_seconds': render_scheduler.get_latency_stats(),
+        'stage_seconds': metrics.get_stage_stats()
+    }
+
+def print_report(report):
+    simulated = report['simulated']
+    print(f"Odtworzono {simulated['minutes']} min ({simulated['start']} - {simulated['end']}) w {report['wall_seconds']}s "
+          f"(CPU {report['cpu_seconds']}s, przyspieszenie x{report['speedup']}).")
+    gcal = report['api_calls']['google_calendar']
+    print(f"Zapytania do API: AccuWeather {report['api_calls']['accuweather']}, Airly {report['api_calls']['airly']}, "
+          f"Google Calendar {gcal['calls']} (żądania HTTP: {gcal['http_requests']}).")
+    print(f"Zadania: {report['jobs']}")
+    print(f"Polityka odświeżania: {report['refresh_policy']}")
+    print(f"Przygotowane klatki zegara: {report['clock_prerender']}")
+    print(f"Kolejka wyświetlacza: {report['display_worker']}")
+    for day, counters in report['refreshes'].items():
+        print(f"Odświeżenia {refresh_ledger.format_day(day, counters)}")
+    written = report['bytes_written']
+    print(f"Zapisy: JSON {written['json'] / 1024:.1f} KiB w {written['json_writes']} zapisach (pominięte: {written['json_skipped']}), "
+          f"metryki {written['metrics_textfile'] / 1024:.1f} KiB, klatki PNG {written['frames_png'] / 1024:.1f} KiB.")
+    latency = report['render_latency_seconds']
+    if latency.get('count'):
+        print(f"Opóźnienie zmiana danych -> ekran: p50 {latency['p50']:.0f}s, max {latency['max']:.0f}s ({latency['count']} razy).")
+    print("Etapy (p50 / p90 / max, ms):")
+    for stage, stats in sorted(report['stage_seconds'].items()):
+        print(f"  {stage:<28} {stats['p50'] * 1000:9.1f} {stats['p90'] * 1000:9.1f} {stats['max'] * 1000:9.1f}   ({stats['count']}x)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Odtworzenie doby pracy dashboardu w przyspieszonym czasie")
+    parser.add_argument('--date', default=DEFAULT_DATE, help='Data odtwarzanej doby (RRRR-MM-DD).')
+    parser.add_argument('--start', default='00:00', help='Godzina startu aplikacji (GG:MM).')
+    parser.add_argument('--minutes', type=int, default=1440, help='Liczba odtwarzanych minut.')
+    parser.add_argument('--report', help='Zapisuje raport w formacie JSON do tego pliku.')
+    parser.add_argument('--frames', help='Zapisuje każdą wysłaną na wyświetlacz klatkę jako PNG w tym katalogu.')
+    parser.add_argument('--keep-cache', action='store_true', help='Nie usuwa tymczasowego katalogu cache po zakończeniu.')
+    parser.add_argument('--verbose', action='store_true', help='Pokazuje logi aplikacji.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.CRITICAL,
+                        format='%(asctime)s [%(module)s][%(levelname)s] %(message)s', force=True)
+
+    if args.keep_cache:
+        print(f"Katalog cache odtworzenia: {CACHE_DIR}")
+    else:
+        atexit.register(shutil.rmtree, CACHE_DIR, True)
+    if args.frames:
+        os.makedirs(args.frames, exist_ok=True)
+
+    start = datetime.datetime.combine(datetime.date.fromisoformat(args.date), datetime.time.fromisoformat(args.start))
+    report = replay(start, args.minutes, args.frames)
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Zapisano raport w {args.report}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Wirtualny zegar dla narzędzi w benchmarks/: podmienia datetime.datetime, datetime.date
+i time.time, aby aplikacja widziała ustawiony czas (zamrożony lub przesuwany przez narzędzie).
+time.monotonic i time.perf_counter pozostają rzeczywiste, więc pomiary czasu działają normalnie.
+
+install() trzeba wywołać przed importem modułów aplikacji, bo część z nich pobiera
+`datetime.datetime` i `time.time` w chwili importu.
+"""
+import os
+import time
+import datetime
+import threading
+
+_real_datetime = datetime.datetime
+_real_date = datetime.date
+_real_time = time.time
+
+class VirtualClock:
+    """Wspólny dla wszystkich wątków czas wirtualny (znacznik czasu UNIX)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._timestamp = _real_time()
+
+    def timestamp(self):
+        with self._lock:
+            return self._timestamp
+
+    def set(self, timestamp):
+        with self._lock:
+            self._timestamp = timestamp
+
+    def set_datetime(self, value):
+        """Ustawia zegar na podany czas (naiwny czas lokalny lub czas ze strefą)."""
+        self.set(value.timestamp())
+
+CLOCK = VirtualClock()
+
+class _VirtualMeta(type):
+    # Obiekty utworzone przed podmianą (lub przez biblioteki w C) są nadal rozpoznawane przez isinstance.
+    def __instancecheck__(cls, obj):
+        return isinstance(obj, cls.__bases__[0])
+
+    def __subclasscheck__(cls, subclass):
+        return issubclass(subclass, cls.__bases__[0])
+
+class VirtualDateTime(_real_datetime, metaclass=_VirtualMeta):
+    @classmethod
+    def now(cls, tz=None):
+        return cls.fromtimestamp(CLOCK.timestamp(), tz)
+
+    @classmethod
+    def today(cls):
+        return cls.now()
+
+    @classmethod
+    def utcnow(cls):
+        return cls.utcfromtimestamp(CLOCK.timestamp())
+
+class VirtualDate(_real_date, metaclass=_VirtualMeta):
+    @classmethod
+    def today(cls):
+        return cls.fromtimestamp(CLOCK.timestamp())
+
+def install(timezone='Europe/Warsaw'):
+    """Ustawia strefę czasową procesu i podmienia datetime.datetime, datetime.date oraz time.time."""
+    os.environ['TZ'] = timezone
+    time.tzset()
+    datetime.datetime = VirtualDateTime
+    datetime.date = VirtualDate
+    time.time = CLOCK.timestamp
+    return CLOCK
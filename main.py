@@ -4,9 +4,8 @@ import argparse
 import os
 import sys
 import datetime
-import json
 from apscheduler.schedulers.blocking import BlockingScheduler
-from modules import time, weather, google_calendar, display, path_manager, startup_screens, asset_manager, airly, accuweather
+from modules import time, weather, google_calendar, display, path_manager, startup_screens, asset_manager, airly, accuweather, data_store, json_writer, render_scheduler, scheduling, network_utils, freshness, quota, refresh_policy, state_journal, metrics, refresh_ledger, memory_profiler, clock_prerender, display_worker, panel_registry
 from modules.config_loader import config
 
 class CenteredFormatter(logging.Formatter):
@@ -22,89 +21,213 @@ class CenteredFormatter(logging.Formatter):
 
 should_flip = False
 
+# Maksymalny czas oczekiwania na odświeżenie danych przed renderowaniem. Po jego upływie
+# ekran jest rysowany z ostatnich poprawnych danych, a nowe dane zostaną dorysowane po ich nadejściu.
+REVALIDATE_WAIT_SECONDS = config.get('freshness', {}).get('revalidate_wait_seconds', 20)
+_revalidation_thread = None
+# Szybki start: jeśli ostatnia klatka jest na ekranie nie dłużej niż tyle minut, pomijany jest ekran
+# powitalny i czyszczenie ekranu (0 wyłącza szybki start).
+WARM_START_MAX_AGE_MINUTES = config.get('display', {}).get('warm_start_max_age_minutes', 30)
+
+def _next_regular_update_time():
+    """Zwraca czas (sekundy epoki) najbliższej cogodzinnej aktualizacji - granicę ponowień po błędach pobierania."""
+    next_run = scheduling.get_next_run_time('main_update_job')
+    if next_run is None:
+        # Przed uruchomieniem harmonogramu: najbliższa pełna godzina (jak w zadaniu main_update_job).
+        next_hour = datetime.datetime.now().replace(minute=0, second=5, microsecond=0) + datetime.timedelta(hours=1)
+        next_run = next_hour.timestamp()
+    return next_run
+
 def update_all_data_sources(refresh_intervals, last_update_times, verbose_mode=False):
+    with metrics.cycle('fetch'):
+        try:
+            _update_all_data_sources(refresh_intervals, last_update_times, verbose_mode)
+        finally:
+            # Dziennik stanu trafia na kartę SD raz na cykl, a nie po każdym zapytaniu.
+            state_journal.flush()
+
+def _update_all_data_sources(refresh_intervals, last_update_times, verbose_mode=False):
     logging.info("Rozpoczynanie aktualizacji wszystkich źródeł danych...")
     now = datetime.datetime.now()
+    # Pobierane są tylko źródła, z których korzysta przynajmniej jeden włączony panel.
+    required_sources = panel_registry.get_required_sources()
+    skipped_sources = sorted(set(state_journal.SOURCE_DATA) - required_sources)
+    if skipped_sources:
+        logging.info(f"Pominięto źródła, z których nie korzysta żaden włączony panel: {', '.join(skipped_sources)}.")
+    # Ponowienia po błędach nie wykraczają poza kolejny regularny cykl aktualizacji.
+    retry_until = _next_regular_update_time()
 
-    # AccuWeather
-    accuweather_interval = datetime.timedelta(minutes=refresh_intervals.get('accuweather_minutes', 30))
-    if now - last_update_times.get('accuweather', datetime.datetime.min) >= accuweather_interval:
-        accuweather_thread = threading.Thread(target=accuweather.update_accuweather_data, args=(verbose_mode,))
-        accuweather_thread.start()
-        accuweather_thread.join()
+    # AccuWeather i Airly - odstęp między pobraniami wynika z pozostałego dziennego limitu zapytań,
+    # a interwał z konfiguracji jest odstępem minimalnym.
+    accuweather_due, accuweather_interval = quota.is_due('accuweather', last_update_times.get('accuweather', datetime.datetime.min), refresh_intervals.get('accuweather_minutes', 30), accuweather.get_calls_per_update(), now)
+    if accuweather_due and 'accuweather' in required_sources:
+        accuweather_thread = threading.Thread(target=network_utils.run_with_breaker, args=('accuweather', accuweather.update_accuweather_data, (verbose_mode,)), kwargs={'retry_until': retry_until, 'quota_calls': accuweather.get_calls_per_update()})
+        with metrics.timer('fetch.accuweather'):
+            accuweather_thread.start()
+            accuweather_thread.join()
         last_update_times['accuweather'] = now
-    else:
-        logging.info(f"Pominięto aktualizację AccuWeather. Następna aktualizacja za {(accuweather_interval - (now - last_update_times.get('accuweather', datetime.datetime.min))).total_seconds() / 60:.1f} minut.")
-
-    # Airly
-    airly_interval = datetime.timedelta(minutes=refresh_intervals.get('airly_minutes', 15))
-    if now - last_update_times.get('airly', datetime.datetime.min) >= airly_interval:
-        airly_thread = threading.Thread(target=airly.update_airly_data, args=(verbose_mode,))
-        airly_thread.start()
-        airly_thread.join()
+    elif 'accuweather' in required_sources:
+        logging.info(f"Pominięto aktualizację AccuWeather. Następna aktualizacja za {accuweather_interval - (now - last_update_times.get('accuweather', datetime.datetime.min)).total_seconds() / 60:.1f} minut.")
+
+    airly_due, airly_interval = quota.is_due('airly', last_update_times.get('airly', datetime.datetime.min), refresh_intervals.get('airly_minutes', 15), 1, now)
+    if airly_due and 'airly' in required_sources:
+        airly_thread = threading.Thread(target=network_utils.run_with_breaker, args=('airly', airly.update_airly_data, (verbose_mode,)), kwargs={'retry_until': retry_until, 'quota_calls': 1})
+        with metrics.timer('fetch.airly'):
+            airly_thread.start()
+            airly_thread.join()
         last_update_times['airly'] = now
-    else:
-        logging.info(f"Pominięto aktualizację Airly. Następna aktualizacja za {(airly_interval - (now - last_update_times.get('airly', datetime.datetime.min))).total_seconds() / 60:.1f} minut.")
+    elif 'airly' in required_sources:
+        logging.info(f"Pominięto aktualizację Airly. Następna aktualizacja za {airly_interval - (now - last_update_times.get('airly', datetime.datetime.min)).total_seconds() / 60:.1f} minut.")
 
     # Google Calendar
     google_calendar_interval = datetime.timedelta(minutes=refresh_intervals.get('google_calendar_minutes', 1))
-    if now - last_update_times.get('google_calendar', datetime.datetime.min) >= google_calendar_interval:
-        google_calendar_thread = threading.Thread(target=google_calendar.update_calendar_data, args=(verbose_mode,))
-        google_calendar_thread.start()
-        google_calendar_thread.join()
+    google_calendar_due = now - last_update_times.get('google_calendar', datetime.datetime.min) >= google_calendar_interval
+    if google_calendar_due and 'google_calendar' in required_sources:
+        google_calendar_thread = threading.Thread(target=network_utils.run_with_breaker, args=('google_calendar', google_calendar.update_calendar_data, (verbose_mode,)), kwargs={'retry_until': retry_until})
+        with metrics.timer('fetch.google_calendar'):
+            google_calendar_thread.start()
+            google_calendar_thread.join()
         last_update_times['google_calendar'] = now
-    else:
+    elif 'google_calendar' in required_sources:
         logging.info(f"Pominięto aktualizację Google Calendar. Następna aktualizacja za {(google_calendar_interval - (now - last_update_times.get('google_calendar', datetime.datetime.min))).total_seconds() / 60:.1f} minut.")
 
     time.update_time_data()
     weather.update_weather_data()
+    unhealthy_sources = {source: state['state'] for source, state in network_utils.get_source_states().items() if state['state'] != network_utils.CLOSED}
+    if unhealthy_sources:
+        logging.warning(f"Źródła danych z otwartym obwodem: {unhealthy_sources}")
+    freshness.log_source_ages()
+    logging.info(f"Limity zapytań do API: {quota.get_quota_metrics()}")
     logging.info("Zakończono aktualizację wszystkich źródeł danych.")
 
-def deep_refresh_job(layout_config, refresh_intervals, last_update_times, draw_borders_flag=False, verbose_mode=False):
-    try:
-        logging.info("Rozpoczynanie zaplanowanego, głębokiego odświeżenia ekranu.")
-        update_all_data_sources(refresh_intervals, last_update_times, verbose_mode)
+def start_revalidation(refresh_intervals, last_update_times, verbose_mode=False):
+    """Uruchamia odświeżanie danych w wątku w tle. Zwraca wątek lub None, jeśli poprzednie odświeżanie wciąż trwa."""
+    global _revalidation_thread
+    if _revalidation_thread is not None and _revalidation_thread.is_alive():
+        logging.warning("Poprzednie odświeżanie danych wciąż trwa. Renderuję z ostatnich danych.")
+        return None
+    _revalidation_thread = threading.Thread(target=update_all_data_sources, args=(refresh_intervals, last_update_times, verbose_mode), name="RevalidationThread", daemon=True)
+    _revalidation_thread.start()
+    return _revalidation_thread
+
+def wait_for_revalidation(revalidation_thread):
+    """Czeka na odświeżenie danych najwyżej REVALIDATE_WAIT_SECONDS."""
+    if revalidation_thread is None:
+        return
+    revalidation_thread.join(REVALIDATE_WAIT_SECONDS)
+    if revalidation_thread.is_alive():
+        logging.warning(f"Odświeżanie danych trwa dłużej niż {REVALIDATE_WAIT_SECONDS}s. Renderuję z ostatnich danych.")
+
+def revalidate_and_render(layout_config, refresh_intervals, last_update_times, draw_borders_flag=False, verbose_mode=False, force_full_refresh=False, apply_pixel_shift=False):
+    """
+    Odświeża dane w tle i renderuje ekran najpóźniej po REVALIDATE_WAIT_SECONDS.
+    Jeśli pobieranie trwa dłużej, ekran jest rysowany z ostatnich poprawnych danych,
+    a zmienione panele zostaną przerysowane po nadejściu nowych danych.
+    """
+    with render_scheduler.hold():
+        wait_for_revalidation(start_revalidation(refresh_intervals, last_update_times, verbose_mode))
+        pending = render_scheduler.take_pending()
         display.update_display(
             layout_config,
-            force_full_refresh=True,
+            force_full_refresh=force_full_refresh,
             draw_borders=draw_borders_flag,
-            apply_pixel_shift=True,
+            apply_pixel_shift=apply_pixel_shift,
             flip=should_flip
         )
+    render_scheduler.record_displayed(pending)
+
+def deep_refresh_job(layout_config, refresh_intervals, last_update_times, draw_borders_flag=False, verbose_mode=False):
+    try:
+        logging.info("Rozpoczynanie zaplanowanego, głębokiego odświeżenia ekranu.")
+        yesterday = datetime.date.today() - datetime.timedelta(days=1)
+        logging.info(f"Odświeżenia wyświetlacza - {refresh_ledger.format_day(yesterday.isoformat(), refresh_ledger.get_day(yesterday))}")
+        revalidate_and_render(layout_config, refresh_intervals, last_update_times, draw_borders_flag, verbose_mode, force_full_refresh=True, apply_pixel_shift=True)
+        refresh_policy.record('deep_refresh')
     except Exception as e:
         logging.error(f"Błąd podczas głębokiego odświeżenia: {e}", exc_info=True)
 
 def main_update_job(layout_config, refresh_intervals, last_update_times, draw_borders_flag=False, verbose_mode=False):
+    if not refresh_policy.is_update_due():
+        logging.info(f"Pominięto cogodzinną aktualizację (okres: {refresh_policy.get_active_period()['name']}).")
+        refresh_policy.record('update_skipped')
+        return
     try:
         logging.info("Rozpoczynanie cogodzinnej, standardowej aktualizacji.")
-        update_all_data_sources(refresh_intervals, last_update_times, verbose_mode)
-        display.update_display(
-            layout_config,
-            force_full_refresh=False,
-            draw_borders=draw_borders_flag,
-            apply_pixel_shift=False,
-            flip=should_flip
-        )
+        revalidate_and_render(layout_config, refresh_intervals, last_update_times, draw_borders_flag, verbose_mode)
+        refresh_policy.record('update')
     except Exception as e:
         logging.error(f"Błąd podczas głównej aktualizacji: {e}", exc_info=True)
 
+def wake_up_refresh_job(layout_config, refresh_intervals, last_update_times, draw_borders_flag=False, verbose_mode=False):
+    try:
+        logging.info("Rozpoczynanie pełnego odświeżenia przed pobudką.")
+        revalidate_and_render(layout_config, refresh_intervals, last_update_times, draw_borders_flag, verbose_mode, force_full_refresh=True)
+        refresh_policy.record('wake_up_refresh')
+        logging.info(f"Statystyki odświeżania (dzisiaj): {refresh_policy.get_daily_stats()['counts']}")
+    except Exception as e:
+        logging.error(f"Błąd podczas odświeżenia przed pobudką: {e}", exc_info=True)
+
 def time_update_job(layout_config, draw_borders_flag=False):
     now = datetime.datetime.now()
+    minute_start = now.replace(second=0, microsecond=0)
     if now.hour == 21 and now.minute == 37:
         logging.info("Aktywacja Easter Egga...")
         try:
-            startup_screens.display_easter_egg(display.EPD_LOCK, flip=should_flip)
+            startup_screens.display_easter_egg(flip=should_flip)
         except Exception as e:
             logging.error(f"Błąd podczas wyświetlania Easter Egga: {e}", exc_info=True)
+    elif not refresh_policy.is_clock_due(now):
+        logging.debug(f"Pominięto odświeżenie zegara (okres: {refresh_policy.get_active_period(now)['name']}).")
+        refresh_policy.record('clock_skipped')
     else:
         logging.debug("Uruchamianie częściowej aktualizacji ekranu (tylko czas)...")
         try:
             time.update_time_data()
-            display.partial_update_time(layout_config, draw_borders=draw_borders_flag, flip=should_flip)
+            # Oczekujące zmiany danych są wyświetlane razem z zegarem, bez dodatkowego odświeżenia.
+            # Panele, których dane właśnie się zestarzały (lub odświeżyły), dostają aktualny wskaźnik.
+            pending = render_scheduler.take_pending()
+            extra_panels = set(pending) | display.get_panels_with_outdated_staleness()
+            prerendered = clock_prerender.take(data_store.get('time'), extra_panels, draw_borders=draw_borders_flag, flip=should_flip) if clock_prerender.ENABLED else None
+            if prerendered:
+                display.display_prerendered(prerendered)
+            else:
+                display.partial_update_time(layout_config, draw_borders=draw_borders_flag, flip=should_flip, extra_panels=extra_panels)
+            clock_prerender.observe_skew(minute_start)
+            render_scheduler.record_displayed(pending)
+            refresh_policy.record('clock')
         except Exception as e:
             logging.error(f"Błąd podczas częściowej aktualizacji: {e}", exc_info=True)
 
+def clock_prerender_job(layout_config, draw_borders_flag=False):
+    """Przygotowuje klatkę z zegarem następnej minuty, jeśli w tej minucie zegar będzie odświeżany."""
+    next_minute = datetime.datetime.now().replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+    if (next_minute.hour == 21 and next_minute.minute == 37) or not refresh_policy.is_clock_due(next_minute):
+        return
+    try:
+        clock_prerender.prepare(layout_config, draw_borders=draw_borders_flag, flip=should_flip)
+    except Exception as e:
+        logging.error(f"Błąd podczas przygotowywania klatki zegara: {e}", exc_info=True)
+
+def schedule_jobs(scheduler, layout_config, refresh_intervals, last_update_times, args):
+    """Dodaje do harmonogramu cykliczne zadania aplikacji (zegar, aktualizacje, głębokie odświeżenie)."""
+    if clock_prerender.ENABLED:
+        # Klatka następnej minuty jest gotowa wcześniej, więc zegar może być odświeżany dokładnie na początku minuty.
+        scheduler.add_job(clock_prerender_job, 'cron', minute='*', second=clock_prerender.PRERENDER_SECOND, id='clock_prerender_job', kwargs={'layout_config': layout_config, 'draw_borders_flag': args.draw_borders})
+    scheduler.add_job(time_update_job, 'cron', minute='*', second=0 if clock_prerender.ENABLED else 1, id='time_update_job', kwargs={'layout_config': layout_config, 'draw_borders_flag': args.draw_borders})
+    scheduler.add_job(main_update_job, 'cron', hour='0-2,4-23', minute=0, second=5, id='main_update_job', kwargs={'layout_config': layout_config, 'draw_borders_flag': args.draw_borders, 'verbose_mode': args.verbose, 'refresh_intervals': refresh_intervals, 'last_update_times': last_update_times})
+    scheduler.add_job(deep_refresh_job, 'cron', hour=0, minute=0, second=5, id='deep_refresh_job', kwargs={'layout_config': layout_config, 'draw_borders_flag': args.draw_borders, 'verbose_mode': args.verbose, 'refresh_intervals': refresh_intervals, 'last_update_times': last_update_times})
+    if refresh_policy.WAKE_UP_REFRESH:
+        scheduler.add_job(wake_up_refresh_job, 'cron', hour=refresh_policy.WAKE_UP_REFRESH.hour, minute=refresh_policy.WAKE_UP_REFRESH.minute, second=5, id='wake_up_refresh_job', kwargs={'layout_config': layout_config, 'draw_borders_flag': args.draw_borders, 'verbose_mode': args.verbose, 'refresh_intervals': refresh_intervals, 'last_update_times': last_update_times})
+    if args.profile_memory:
+        scheduler.add_job(memory_profiler.report, 'interval', minutes=memory_profiler.INTERVAL_MINUTES, id='memory_profile_job')
+
+def log_time_to_first_frame(started_at, mode):
+    """Loguje czas od uruchomienia aplikacji do wyświetlenia pierwszej klatki z danymi."""
+    elapsed = (datetime.datetime.now() - started_at).total_seconds()
+    logging.info(f"Czas do pierwszej użytecznej klatki: {elapsed:.1f}s ({mode}).")
+
 def main():
+    started_at = datetime.datetime.now()
     parser = argparse.ArgumentParser(description="Waveshare E-Paper Dashboard")
     parser.add_argument('--draw-borders', action='store_true', help='Rysuje granice wokół paneli.')
     parser.add_argument('--service', action='store_true', help='Optymalizuje logowanie dla systemd.')
@@ -112,6 +235,7 @@ def main():
     parser.add_argument('--no-splash', action='store_true', help='Pomija ekran powitalny.')
     parser.add_argument('--verbose', action='store_true', help='Włącza logowanie DEBUG.')
     parser.add_argument('--flip', action='store_true', help='Obraca obraz o 180 stopni.')
+    parser.add_argument('--profile-memory', action='store_true', help='Włącza profilowanie pamięci (tracemalloc, RSS, zrzut różnicy po SIGUSR1).')
     args = parser.parse_args()
 
     log_format = '[%(module_centered)s][%(levelname_centered)s] %(message)s' if args.service else '%(asctime)s [%(module_centered)s][%(levelname_centered)s] %(message)s'
@@ -129,6 +253,8 @@ def main():
         logging.getLogger('apscheduler.scheduler').setLevel(logging.WARNING)
 
     logging.info("--- Inicjalizacja Dashboardu Waveshare ---")
+    if args.profile_memory:
+        memory_profiler.start()
 
     layout_config = config.get('panels', {})
     if not layout_config:
@@ -144,48 +270,6 @@ def main():
             'google_calendar_minutes': 1
         }
 
-    LAST_UPDATE_TIMES_FILE = os.path.join(path_manager.CACHE_DIR, 'last_update_times.json')
-
-    def _save_last_update_times(last_update_times_data):
-        logger.info("Zapisywanie czasów ostatniej aktualizacji...")
-        try:
-            serializable_times = {k: v.isoformat() for k, v in last_update_times_data.items()}
-            with open(LAST_UPDATE_TIMES_FILE, 'w', encoding='utf-8') as f:
-                json.dump(serializable_times, f, ensure_ascii=False, indent=4)
-            logger.info("Pomyślnie zapisano czasy ostatniej aktualizacji.")
-        except Exception as e:
-            logger.error(f"Błąd podczas zapisywania czasów ostatniej aktualizacji: {e}", exc_info=True)
-
-    def _load_last_update_times():
-        logger.info("Wczytywanie czasów ostatniej aktualizacji...")
-        if os.path.exists(LAST_UPDATE_TIMES_FILE):
-            try:
-                with open(LAST_UPDATE_TIMES_FILE, 'r', encoding='utf-8') as f:
-                    loaded_times_str = json.load(f)
-                loaded_times = {}
-                for k, v in loaded_times_str.items():
-                    try:
-                        # Try parsing with microseconds
-                        loaded_times[k] = datetime.datetime.strptime(v, "%Y-%m-%dT%H:%M:%S.%f")
-                    except ValueError:
-                        # If microseconds are not present, try parsing without them
-                        loaded_times[k] = datetime.datetime.strptime(v, "%Y-%m-%dT%H:%M:%S")
-                logger.info("Pomyślnie wczytano czasy ostatniej aktualizacji.")
-                return loaded_times
-            except (FileNotFoundError, json.JSONDecodeError, ValueError) as e:
-                logger.warning(f"Nie można wczytać lub przetworzyć pliku czasów ostatniej aktualizacji ({e}). Zostaną użyte domyślne wartości.")
-                return {}
-        logger.info("Plik czasów ostatniej aktualizacji nie istnieje. Zostaną użyte domyślne wartości.")
-        return {}
-
-    # Load last update times or initialize
-    loaded_times = _load_last_update_times()
-    last_update_times = {
-        'accuweather': loaded_times.get('accuweather', datetime.datetime.min),
-        'airly': loaded_times.get('airly', datetime.datetime.min),
-        'google_calendar': loaded_times.get('google_calendar', datetime.datetime.min)
-    }
-
     try:
         os.makedirs(path_manager.CACHE_DIR, exist_ok=True)
         asset_manager.sync_assets_to_cache()
@@ -197,37 +281,89 @@ def main():
         logging.critical(f"Błąd krytyczny podczas inicjalizacji zasobów: {e}.", exc_info=True)
         sys.exit(1)
 
-    global should_flip
-    should_flip = config['app'].get('flip_display', False) or args.flip
+    # Dane z poprzedniego uruchomienia są używane dla źródeł, których jeszcze nie trzeba odświeżać.
+    data_store.load_snapshots()
+    data_store.subscribe(weather.on_source_changed)
 
-    splash_thread = None
-    if args.show_easter_egg_on_start:
-        splash_thread = threading.Thread(target=startup_screens.display_easter_egg, args=(display.EPD_LOCK, should_flip), name="EasterEggThread")
-    elif not args.no_splash:
-        splash_thread = threading.Thread(target=startup_screens.display_splash_screen, args=(display.EPD_LOCK, should_flip), name="SplashThread")
-    
-    if splash_thread:
-        splash_thread.start()
+    # Dziennik stanu pozwala po awarii lub restarcie pominąć źródła, których dane są wciąż aktualne.
+    loaded_times = state_journal.get_last_update_times()
+    last_update_times = {
+        'accuweather': loaded_times.get('accuweather', datetime.datetime.min),
+        'airly': loaded_times.get('airly', datetime.datetime.min),
+        'google_calendar': loaded_times.get('google_calendar', datetime.datetime.min)
+    }
+    if loaded_times:
+        resumed = ', '.join(f"{source}: {fetched_at.strftime('%H:%M:%S')}" for source, fetched_at in loaded_times.items())
+        logging.info(f"Wznowiono stan z dziennika (ostatnie udane pobranie): {resumed}")
+    quota.restore_state()
+    google_calendar.restore_state()
 
-    update_all_data_sources(refresh_intervals, last_update_times, args.verbose)
+    # Harmonogram jest tworzony przed pierwszym pobraniem danych, aby można było w nim planować ponowienia.
+    scheduler = BlockingScheduler(timezone="Europe/Warsaw")
+    scheduling.set_scheduler(scheduler)
 
-    if splash_thread:
-        logging.info("Oczekiwanie na zakończenie ekranu powitalnego...")
-        splash_thread.join()
+    global should_flip
+    should_flip = config['app'].get('flip_display', False) or args.flip
 
-    logging.info("Wykonywanie pierwszego, pełnego renderowania ekranu...")
-    display.update_display(
+    # Przerysowywanie po zmianie danych jest włączane przed pierwszym pobraniem, aby dane,
+    # które nadejdą po pierwszym renderowaniu, zostały dorysowane.
+    render_scheduler.start(lambda panels: display.update_display(
         layout_config,
-        force_full_refresh=True,
+        force_full_refresh=False,
         draw_borders=args.draw_borders,
-        apply_pixel_shift=True,
-        flip=should_flip)
-    logging.info("Pierwsze renderowanie zakończone.")
+        apply_pixel_shift=False,
+        flip=should_flip,
+        quiet=True,
+        panels=panels))
 
-    scheduler = BlockingScheduler(timezone="Europe/Warsaw")
-    scheduler.add_job(time_update_job, 'cron', minute='*', second=1, id='time_update_job', kwargs={'layout_config': layout_config, 'draw_borders_flag': args.draw_borders})
-    scheduler.add_job(main_update_job, 'cron', hour='0-2,4-23', minute=0, second=5, id='main_update_job', kwargs={'layout_config': layout_config, 'draw_borders_flag': args.draw_borders, 'verbose_mode': args.verbose, 'refresh_intervals': refresh_intervals, 'last_update_times': last_update_times})
-    scheduler.add_job(deep_refresh_job, 'cron', hour=0, minute=0, second=5, id='deep_refresh_job', kwargs={'layout_config': layout_config, 'draw_borders_flag': args.draw_borders, 'verbose_mode': args.verbose, 'refresh_intervals': refresh_intervals, 'last_update_times': last_update_times})
+    warm_frame = None
+    if WARM_START_MAX_AGE_MINUTES and not args.show_easter_egg_on_start:
+        warm_frame = display.get_warm_start_frame(WARM_START_MAX_AGE_MINUTES * 60, should_flip)
+
+    if warm_frame:
+        # Ostatnia klatka wciąż jest na ekranie: od razu rysujemy ją z zapisanych danych bez ekranu
+        # powitalnego i czyszczenia, a pobrane dane zostaną dorysowane przez render_scheduler po ich nadejściu.
+        logging.info(f"Szybki start: ostatnia klatka sprzed {warm_frame['age'] / 60:.0f} min jest na ekranie. Pomijam ekran powitalny i czyszczenie.")
+        time.update_time_data()
+        weather.update_weather_data()
+        display.update_display(
+            layout_config,
+            force_full_refresh=False,
+            draw_borders=args.draw_borders,
+            apply_pixel_shift=True,
+            flip=should_flip)
+        log_time_to_first_frame(started_at, "szybki start")
+        start_revalidation(refresh_intervals, last_update_times, args.verbose)
+    else:
+        splash_thread = None
+        if args.show_easter_egg_on_start:
+            splash_thread = threading.Thread(target=startup_screens.display_easter_egg, args=(should_flip,), name="EasterEggThread")
+        elif not args.no_splash:
+            splash_thread = threading.Thread(target=startup_screens.display_splash_screen, args=(should_flip,), name="SplashThread")
+
+        with render_scheduler.hold():
+            if splash_thread:
+                splash_thread.start()
+
+            revalidation_thread = start_revalidation(refresh_intervals, last_update_times, args.verbose)
+
+            if splash_thread:
+                logging.info("Oczekiwanie na zakończenie ekranu powitalnego...")
+                splash_thread.join()
+            wait_for_revalidation(revalidation_thread)
+
+            logging.info("Wykonywanie pierwszego, pełnego renderowania ekranu...")
+            render_scheduler.take_pending()
+            display.update_display(
+                layout_config,
+                force_full_refresh=True,
+                draw_borders=args.draw_borders,
+                apply_pixel_shift=True,
+                flip=should_flip)
+            logging.info("Pierwsze renderowanie zakończone.")
+            log_time_to_first_frame(started_at, "zimny start")
+    schedule_jobs(scheduler, layout_config, refresh_intervals, last_update_times, args)
+    logging.info(f"Polityka odświeżania: {refresh_policy.describe()}")
 
     logging.info("--- Harmonogram uruchomiony. Aplikacja działa poprawnie. ---")
     try:
@@ -237,7 +373,19 @@ def main():
         display.clear_display()
         logging.info("Aplikacja zamknięta.")
     finally:
-        _save_last_update_times(last_update_times)
+        data_store.flush()
+        refresh_ledger.save()
+        metrics.write_textfile()
+        state_journal.flush()
+        logging.info(f"Statystyki zapisów plików JSON: {json_writer.get_write_stats()}")
+        logging.info(f"Opóźnienie zmiana danych -> ekran: {render_scheduler.get_latency_stats()}")
+        logging.info(f"Statystyki odświeżania (dzisiaj): {refresh_policy.get_daily_stats()['counts']}")
+        logging.info(f"Czasy etapów (p50/p90/max): {metrics.get_stage_stats()}")
+        logging.info(f"Przygotowane klatki zegara: {clock_prerender.get_stats()}")
+        logging.info(f"Kolejka wyświetlacza: {display_worker.get_stats()}")
+        logging.info(f"Odświeżenia wyświetlacza - {refresh_ledger.format_day(datetime.date.today().isoformat(), refresh_ledger.get_day())}")
+        if args.profile_memory:
+            memory_profiler.report()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,11 +1,9 @@
 import requests
-import json
-import os
 import logging
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
 
 from modules.config_loader import config
-from modules import path_manager
+from modules import data_store, quota
 
 logger = logging.getLogger(__name__)
 
@@ -14,15 +12,38 @@ API_BASE_URL = "http://dataservice.accuweather.com"
 ACCUWEATHER_CONFIG = config['api_keys']
 CURRENT_CONDITIONS_URL = f"{API_BASE_URL}/currentconditions/v1/{ACCUWEATHER_CONFIG['accuweather_location_key']}"
 DAILY_FORECAST_URL = f"{API_BASE_URL}/forecasts/v1/daily/1day/{ACCUWEATHER_CONFIG['accuweather_location_key']}"
+# Prognoza dzienna zmienia się rzadko, więc jest pobierana rzadziej niż bieżące warunki.
+FORECAST_HOURS = config.get('quota', {}).get('accuweather', {}).get('forecast_hours', 6)
+
 def _fetch_accuweather_data(url, params):
     """Pomocnicza funkcja do pobierania danych z API AccuWeather."""
     logger.info(f"Pobieranie danych z API AccuWeather: {url}")
     response = requests.get(url, params=params, timeout=10)
+    quota.record_call('accuweather', response.headers)
     response.raise_for_status()
     return response.json()
 
+def _get_cached_forecast():
+    """Zwraca ostatnią prognozę dzienną, jeśli dotyczy dzisiaj i nie jest starsza niż FORECAST_HOURS."""
+    previous_data = data_store.get('accuweather')
+    forecast = previous_data.get('forecast')
+    forecast_timestamp = previous_data.get('forecast_timestamp')
+    if not forecast or not forecast_timestamp:
+        return None
+    fetched_at = datetime.fromisoformat(forecast_timestamp)
+    if fetched_at.astimezone().date() != date.today() or datetime.now(timezone.utc) - fetched_at > timedelta(hours=FORECAST_HOURS):
+        return None
+    return forecast
+
+def get_calls_per_update():
+    """Zwraca liczbę zapytań do API, które wykona najbliższa aktualizacja."""
+    return 1 if _get_cached_forecast() else 2
+
 def update_accuweather_data(verbose_mode=False):
-    """Pobiera i zapisuje dane pogodowe z AccuWeather."""
+    """
+    Pobiera dane pogodowe z AccuWeather i publikuje je w magazynie danych.
+    Zwraca True po udanym pobraniu, False po błędzie i None, gdy brak kluczy API.
+    """
     api_key = ACCUWEATHER_CONFIG.get('accuweather')
     location_key = ACCUWEATHER_CONFIG.get('accuweather_location_key')
 
@@ -34,7 +55,7 @@ def update_accuweather_data(verbose_mode=False):
         location_key
     ]):
         logger.error("Brak skonfigurowanego klucza API lub klucza lokalizacji AccuWeather.")
-        return
+        return None
 
     try:
         common_params = {
@@ -45,23 +66,30 @@ def update_accuweather_data(verbose_mode=False):
         }
 
         current_conditions = _fetch_accuweather_data(CURRENT_CONDITIONS_URL, common_params)
-        daily_forecast = _fetch_accuweather_data(DAILY_FORECAST_URL, common_params)
-
         logger.debug(f"Pobrane bieżące warunki: {current_conditions}")
-        logger.debug(f"Pobrana prognoza dzienna: {daily_forecast}")
 
-        if current_conditions and daily_forecast:
+        forecast = _get_cached_forecast()
+        forecast_timestamp = data_store.get('accuweather').get('forecast_timestamp')
+        if forecast is None:
+            daily_forecast = _fetch_accuweather_data(DAILY_FORECAST_URL, common_params)
+            logger.debug(f"Pobrana prognoza dzienna: {daily_forecast}")
+            forecast = daily_forecast['DailyForecasts'][0] if daily_forecast else None
+            forecast_timestamp = datetime.now(timezone.utc).isoformat()
+        else:
+            logger.info(f"Prognoza dzienna jest aktualna (odświeżana co {FORECAST_HOURS} h). Pobieram tylko bieżące warunki.")
+
+        if current_conditions and forecast:
             data_to_save = {
                 "current": current_conditions[0],
-                "forecast": daily_forecast['DailyForecasts'][0],
+                "forecast": forecast,
+                "forecast_timestamp": forecast_timestamp,
                 "timestamp": datetime.now(timezone.utc).isoformat()
             }
-            file_path = os.path.join(path_manager.CACHE_DIR, 'accuweather.json')
-            with open(file_path, 'w', encoding='utf-8') as f:
-                json.dump(data_to_save, f, ensure_ascii=False, indent=4)
-            logger.info("Pomyślnie zaktualizowano i zapisano dane AccuWeather.")
+            data_store.publish('accuweather', data_to_save)
+            logger.info("Pomyślnie zaktualizowano i opublikowano dane AccuWeather.")
+            return True
         else:
-            logger.warning("Pobrane dane AccuWeather są puste lub niekompletne. Nie zapisano pliku accuweather.json.")
+            logger.warning("Pobrane dane AccuWeather są puste lub niekompletne. Pozostawiono poprzednie dane.")
 
     except requests.exceptions.HTTPError as e:
         logger.error(f"Błąd HTTP podczas pobierania danych z AccuWeather: Status {e.response.status_code}, Odpowiedź: {e.response.text}")
@@ -71,7 +99,9 @@ def update_accuweather_data(verbose_mode=False):
         logger.warning(f"Błąd sieci podczas pobierania danych z AccuWeather: {e}.")
     except Exception as e:
         logger.error(f"Wystąpił nieoczekiwany, krytyczny błąd w module AccuWeather: {e}", exc_info=True)
+    return False
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
     update_accuweather_data()
+    data_store.flush()
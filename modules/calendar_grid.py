@@ -0,0 +1,51 @@
+import logging
+import calendar
+import datetime
+from functools import lru_cache
+from typing import NamedTuple
+
+logger = logging.getLogger(__name__)
+
+class CalendarDay(NamedTuple):
+    """Pojedyncza komórka siatki kalendarza."""
+    date: datetime.date
+    day: int
+    is_today: bool
+    is_weekend: bool
+    is_holiday: bool
+    has_event: bool
+    is_current_month: bool
+
+@lru_cache(maxsize=4)
+def build_month_grid(today, holiday_dates, event_dates):
+    """
+    Generuje siatkę bieżącego miesiąca jako krotkę tygodni (krotek `CalendarDay`).
+    Wynik zależy tylko od argumentów (dzisiejsza data i zbiory dat ISO), więc jest zapamiętywany
+    i przeliczany jedynie po zmianie daty, świąt lub dni z wydarzeniami.
+    """
+    logger.debug("Budowanie siatki kalendarza...")
+    holiday_dates_set = {datetime.date.fromisoformat(d) for d in holiday_dates}
+    event_dates_set = {datetime.date.fromisoformat(d) for d in event_dates}
+    return tuple(
+        tuple(
+            CalendarDay(
+                date=day_date,
+                day=day_date.day,
+                is_today=day_date == today,
+                is_weekend=day_date.weekday() >= 5,
+                is_holiday=day_date in holiday_dates_set,
+                has_event=day_date in event_dates_set,
+                is_current_month=day_date.month == today.month
+            )
+            for day_date in week
+        )
+        for week in calendar.Calendar().monthdatescalendar(today.year, today.month)
+    )
+
+def get_month_grid(calendar_data, today=None):
+    """Zwraca siatkę miesiąca dla danych kalendarza z magazynu danych."""
+    return build_month_grid(
+        today or datetime.date.today(),
+        frozenset(calendar_data.get('holiday_dates', [])),
+        frozenset(calendar_data.get('event_dates', []))
+    )
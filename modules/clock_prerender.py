@@ -0,0 +1,89 @@
+import logging
+import datetime
+import threading
+
+from modules.config_loader import config
+from modules import data_store, display, metrics, time
+
+logger = logging.getLogger(__name__)
+
+DISPLAY_CONFIG = config.get('display', {})
+ENABLED = DISPLAY_CONFIG.get('clock_prerender', True)
+# Sekunda bieżącej minuty, w której przygotowywana jest klatka następnej minuty.
+PRERENDER_SECOND = DISPLAY_CONFIG.get('clock_prerender_second', 40)
+
+_lock = threading.Lock()
+_prepared = None
+_stats = {'hits': 0, 'misses': {}}
+
+def _data_versions():
+    """Zwraca wersje zbiorów danych, od których zależy klatka (poza danymi czasu)."""
+    return {name: version for name, version in data_store.get_versions().items() if name != 'time'}
+
+def prepare(layout_config, draw_borders=False, flip=False, now=None):
+    """
+    Renderuje, kwantyzuje i pakuje klatkę z zegarem następnej minuty. Wywoływane w czasie bezczynności,
+    aby na początku minuty pozostał tylko transfer SPI i odświeżenie. Zwraca True, jeśli klatka jest gotowa.
+    """
+    global _prepared
+    now = now or datetime.datetime.now()
+    next_minute = now.replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+    time_data = time.build_time_data(next_minute)
+    # Wersje są odczytywane przed renderowaniem - zmiana danych w trakcie unieważni klatkę.
+    versions = _data_versions()
+    with metrics.timer('clock.prerender'):
+        prerendered = display.prerender_time_frame(layout_config, time_data, draw_borders=draw_borders, flip=flip)
+    if prerendered is None:
+        logger.debug("Warstwy paneli nie są jeszcze gotowe. Pomijam przygotowanie klatki zegara.")
+        return False
+    prerendered.update({'time_data': time_data, 'versions': versions, 'draw_borders': draw_borders})
+    with _lock:
+        _prepared = prerendered
+    logger.debug(f"Przygotowano klatkę zegara na {time_data['time']}.")
+    return True
+
+def _miss(reason):
+    with _lock:
+        _stats['misses'][reason] = _stats['misses'].get(reason, 0) + 1
+    logger.debug(f"Przygotowana klatka zegara nie zostanie użyta ({reason}). Renderuję na bieżąco.")
+
+def take(time_data, extra_panels=(), draw_borders=False, flip=False):
+    """
+    Zwraca przygotowaną klatkę, jeśli pokazuje podany czas, od jej przygotowania nie zmieniły się
+    inne dane i nie trzeba przerysować innych paneli. W przeciwnym razie zwraca None.
+    Przygotowana klatka jest zużywana przy każdym wywołaniu.
+    """
+    global _prepared
+    with _lock:
+        prepared, _prepared = _prepared, None
+    if prepared is None:
+        _miss('brak klatki')
+    elif prepared['time_data'] != time_data:
+        _miss('inna minuta')
+    elif extra_panels:
+        _miss('oczekujące panele')
+    elif prepared['versions'] != _data_versions():
+        _miss('zmiana danych')
+    elif prepared['flip'] != flip or prepared['draw_borders'] != draw_borders:
+        _miss('inne ustawienia')
+    else:
+        with _lock:
+            _stats['hits'] += 1
+        return prepared
+    return None
+
+def observe_skew(minute_start):
+    """Mierzy opóźnienie rozpoczęcia odświeżenia względem początku minuty (etap 'clock.skew')."""
+    started_at = display.get_last_refresh_started_at()
+    boundary = minute_start.timestamp()
+    if started_at is None or started_at < boundary:
+        return None
+    skew = started_at - boundary
+    metrics.observe('clock.skew', skew)
+    logger.debug(f"Odświeżenie zegara rozpoczęte {skew:.2f}s po początku minuty.")
+    return skew
+
+def get_stats():
+    """Zwraca liczbę użytych przygotowanych klatek i powody renderowania na bieżąco."""
+    with _lock:
+        return {'hits': _stats['hits'], 'misses': dict(_stats['misses'])}
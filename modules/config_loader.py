@@ -2,7 +2,8 @@
 import yaml
 import os
 
-CONFIG_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
+# Ścieżkę do pliku konfiguracyjnego można nadpisać zmienną środowiskową (np. w benchmarkach).
+CONFIG_PATH = os.environ.get('WAVESHARE_DASHBOARD_CONFIG') or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config.yaml')
 
 def load_config():
     if not os.path.exists(CONFIG_PATH):
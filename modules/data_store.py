@@ -0,0 +1,174 @@
+import os
+import json
+import time
+import logging
+import threading
+
+from modules import path_manager, json_writer
+
+logger = logging.getLogger(__name__)
+
+# Zbiory danych zapisywane jako migawki JSON w CACHE_DIR (odtwarzanie po awarii, debugowanie).
+# Dane czasu są wyliczane z zegara systemowego, więc nie są zapisywane na dysk.
+SNAPSHOT_FILES = {
+    'airly': 'airly.json',
+    'accuweather': 'accuweather.json',
+    'weather': 'weather.json',
+    'calendar': 'calendar.json'
+}
+
+_lock = threading.RLock()
+_entries = {}
+_subscribers = []
+
+_dirty = set()
+_writing = set()
+_dirty_cond = threading.Condition()
+_writer_thread = None
+
+def _store(name, data):
+    """Zapisuje dane pod blokadą. Zwraca (wersja, czas zmiany) lub (wersja, None), gdy dane się nie zmieniły."""
+    entry = _entries.get(name)
+    if entry is not None and entry['data'] == data:
+        logger.debug(f"Dane '{name}' nie zmieniły się (wersja {entry['version']}).")
+        return entry['version'], None
+    version = entry['version'] + 1 if entry else 1
+    updated_at = time.time()
+    _entries[name] = {'version': version, 'data': data, 'updated_at': updated_at}
+    logger.debug(f"Opublikowano dane '{name}' w wersji {version}.")
+    return version, updated_at
+
+def _notify(name, version, updated_at):
+    """Zapisuje migawkę i powiadamia subskrybentów o zmianie danych (poza blokadą)."""
+    if name in SNAPSHOT_FILES:
+        _schedule_snapshot(name)
+    with _lock:
+        subscribers = list(_subscribers)
+    for callback in subscribers:
+        try:
+            callback(name, version, updated_at)
+        except Exception as e:
+            logger.error(f"Błąd w obsłudze zmiany danych '{name}': {e}", exc_info=True)
+
+def publish(name, data):
+    """
+    Publikuje nową wersję zbioru danych. Wersja jest zwiększana tylko wtedy,
+    gdy dane różnią się od poprzednich. Zwraca aktualny numer wersji.
+    """
+    with _lock:
+        version, updated_at = _store(name, data)
+    if updated_at is not None:
+        _notify(name, version, updated_at)
+    return version
+
+def subscribe(callback):
+    """
+    Rejestruje funkcję wywoływaną po każdej zmianie danych jako callback(name, version, changed_at).
+    Funkcja jest wywoływana w wątku, który opublikował dane.
+    """
+    with _lock:
+        if callback not in _subscribers:
+            _subscribers.append(callback)
+
+def update(name, partial_data):
+    """Atomowo łączy częściową aktualizację z bieżącymi danymi i publikuje wynik."""
+    with _lock:
+        data = dict(get(name, {}))
+        data.update(partial_data)
+        version, updated_at = _store(name, data)
+    if updated_at is not None:
+        _notify(name, version, updated_at)
+    return version
+
+def get(name, default_data=None):
+    """
+    Zwraca bieżące dane zbioru (lub dane domyślne, gdy jeszcze ich nie ma).
+    Zwrócony obiekt jest współdzielony i nie może być modyfikowany.
+    """
+    with _lock:
+        entry = _entries.get(name)
+    if entry is None:
+        return default_data if default_data is not None else {}
+    return entry['data']
+
+def get_version(name):
+    """Zwraca numer wersji zbioru danych (0, jeśli dane nie zostały jeszcze opublikowane)."""
+    with _lock:
+        entry = _entries.get(name)
+    return entry['version'] if entry else 0
+
+def get_updated_at(name):
+    """Zwraca czas (sekundy epoki) ostatniej zmiany zbioru danych lub None."""
+    with _lock:
+        entry = _entries.get(name)
+    return entry['updated_at'] if entry else None
+
+def get_versions():
+    """Zwraca słownik z numerami wersji wszystkich zbiorów danych."""
+    with _lock:
+        return {name: entry['version'] for name, entry in _entries.items()}
+
+def load_snapshots():
+    """Wczytuje ostatnie migawki JSON z CACHE_DIR (np. po restarcie lub awarii)."""
+    for name, file_name in SNAPSHOT_FILES.items():
+        file_path = os.path.join(path_manager.CACHE_DIR, file_name)
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            continue
+        except (IOError, json.JSONDecodeError) as e:
+            logger.warning(f"Nie można odczytać migawki {file_path}: {e}. Pomijam.")
+            continue
+        with _lock:
+            if name not in _entries:
+                _entries[name] = {'version': 1, 'data': data, 'updated_at': os.path.getmtime(file_path)}
+                logger.info(f"Wczytano migawkę danych '{name}' z {file_path}.")
+
+def _schedule_snapshot(name):
+    """Oznacza zbiór danych do zapisu i budzi wątek zapisujący migawki."""
+    global _writer_thread
+    with _dirty_cond:
+        _dirty.add(name)
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(target=_snapshot_writer, name="SnapshotWriterThread", daemon=True)
+            _writer_thread.start()
+        _dirty_cond.notify_all()
+
+def _write_snapshot(name):
+    """Zapisuje migawkę pojedynczego zbioru danych do pliku JSON."""
+    file_path = os.path.join(path_manager.CACHE_DIR, SNAPSHOT_FILES[name])
+    data = get(name)
+    try:
+        if json_writer.write_json(file_path, data):
+            logger.debug(f"Zapisano migawkę danych '{name}' w {file_path}")
+    except (OSError, TypeError, ValueError) as e:
+        logger.error(f"Nie udało się zapisać migawki danych '{name}' do {file_path}: {e}")
+
+def _snapshot_writer():
+    """Wątek w tle zapisujący migawki zmienionych zbiorów danych."""
+    while True:
+        with _dirty_cond:
+            while not _dirty:
+                _dirty_cond.wait()
+            # Czyścimy znaczniki przed zapisem, aby zmiana w trakcie zapisu wymusiła kolejny zapis.
+            names = list(_dirty)
+            _dirty.clear()
+            _writing.update(names)
+        for name in names:
+            _write_snapshot(name)
+        with _dirty_cond:
+            _writing.clear()
+            _dirty_cond.notify_all()
+
+def flush(timeout=10):
+    """Czeka, aż wszystkie oczekujące migawki zostaną zapisane na dysk."""
+    deadline = time.monotonic() + timeout
+    with _dirty_cond:
+        while _dirty or _writing:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Upłynął limit czasu oczekiwania na zapis migawek danych.")
+                return False
+            _dirty_cond.wait(remaining)
+    return True
@@ -1,15 +1,18 @@
 import logging
 import os
-import json
 import sys
+import json
+import time
+import hashlib
 import textwrap
 import random
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image, ImageDraw, ImageChops
 from filelock import FileLock
 
 from modules.config_loader import config
-from modules import path_manager, drawing_utils, asset_manager
+from modules import path_manager, drawing_utils, asset_manager, data_store, calendar_grid, polish_holidays, freshness, json_writer, metrics, refresh_ledger, display_worker, panel_registry
 from modules.panels import time_panel, weather_panel, events_panel, calendar_panel
 
 # Zmieniono na sterownik dla wyświetlacza czarno-białego
@@ -21,9 +24,17 @@ EPD_HEIGHT = epd7in5_V2.EPD_HEIGHT
 # Używamy jednego pliku cache dla obrazu w skali szarości
 IMAGE_PATH = os.path.join(path_manager.CACHE_DIR, 'image.png')
 IMAGE_LOCK_PATH = os.path.join(path_manager.CACHE_DIR, 'image.lock')
+# Metadane ostatniej klatki wysłanej na wyświetlacz (czas, skrót obrazu) - podstawa szybkiego startu.
+FRAME_META_PATH = os.path.join(path_manager.CACHE_DIR, 'last_frame.json')
+
+DISPLAY_CONFIG = config.get('display', {})
+# Liczba wątków rysujących warstwy paneli (1 = rysowanie szeregowe, 'auto' = liczba dostępnych rdzeni).
+RENDER_WORKERS = DISPLAY_CONFIG.get('render_workers', 1)
 
-EPD_LOCK = threading.Lock()
 _FLIP_LOGGED = False
+_saved_seq = 0
+# Czas (sekundy epoki) rozpoczęcia ostatniego pełnego odświeżenia (wysłania obrazu do wyświetlacza).
+_last_refresh_started_at = None
 
 def _shift_image(image, dx, dy):
     """Przesuwa obraz o (dx, dy) pikseli, wypełniając tło białym kolorem."""
@@ -31,196 +42,458 @@ def _shift_image(image, dx, dy):
     shifted_image.paste(image, (dx, dy))
     return shifted_image
 
-def safe_read_json(file_name, default_data=None):
-    """Bezpiecznie wczytuje dane z pliku JSON."""
-    if default_data is None:
-        default_data = {}
-    file_path = os.path.join(path_manager.CACHE_DIR, file_name)
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (IOError, json.JSONDecodeError) as e:
-        logging.warning(f"Nie można odczytać pliku {file_path}: {e}. Używam danych domyślnych.")
+def read_data(name, default_data):
+    """Zwraca dane z magazynu danych lub dane domyślne, jeśli nie zostały jeszcze opublikowane."""
+    if not data_store.get_version(name):
+        logging.warning(f"Brak danych '{name}' w magazynie danych. Używam danych domyślnych.")
         return default_data
+    return data_store.get(name)
 
-def generate_image(layout_config, draw_borders=False):
-    """Generuje obraz w skali szarości do wyświetlenia."""
-    time_data = safe_read_json('time.json', {'time': '??:??', 'date': 'Brak daty', 'weekday': 'Brak dnia'})
-    weather_data = safe_read_json('weather.json', {
-        'icon': asset_manager.get_path('icon_sync_problem'),
-        'temp_real': '??', 'sunrise': '--:--', 'sunset': '--:--',
-        'humidity': '--', 'pressure': '--'
-    })
-    airly_data = safe_read_json('airly.json', {
-        "current": {"indexes": [{"name": "AIRLY_CAQI", "value": 0, "level": "UNKNOWN", "description": "Brak danych"}]}
-    })
-    calendar_data = safe_read_json('calendar.json', {
-        'upcoming_events': [],
-        'unusual_holiday': '', 'unusual_holiday_desc': '',
-        'month_calendar': []
-    })
-
-    # Tworzymy jeden obraz w trybie 'L' (skala szarości)
-    image = Image.new('L', (EPD_WIDTH, EPD_HEIGHT), drawing_utils.WHITE)
-    draw = ImageDraw.Draw(image)
+# Każdy panel jest rysowany na osobnej warstwie - wycinku obejmującym narysowane przez niego piksele
+# ({'image', 'box', 'stale'}). Po zmianie danych przerysowywane są tylko zależne warstwy, a obraz jest
+# składany z warstw zapamiętanych wcześniej w kolejności rysowania paneli (LAYER_NAMES).
+LAYER_NAMES = tuple(panel_registry.PANELS)
+_layers = {}
+_layers_ready = False
+_layers_lock = threading.Lock()
+# Numer ostatniej złożonej klatki. Kolejka wyświetlacza pomija klatki starsze niż już wyświetlona.
+_frame_seq = 0
+STALE_ICON_SIZE = 20
 
-    fonts = drawing_utils.load_fonts()
+def _default_data(name):
+    """Zwraca dane domyślne zbioru, rysowane zanim zostaną opublikowane prawdziwe dane."""
+    if name == 'time':
+        return {'time': '??:??', 'date': 'Brak daty', 'weekday': 'Brak dnia'}
+    if name == 'weather':
+        return {
+            'icon': asset_manager.get_path('icon_sync_problem'),
+            'temp_real': '??', 'sunrise': '--:--', 'sunset': '--:--',
+            'humidity': '--', 'pressure': '--'
+        }
+    if name == 'calendar':
+        return {'upcoming_events': [], 'unusual_holiday': '', 'unusual_holiday_desc': ''}
+    return {}
 
-    # Przekazujemy ten sam obiekt `draw` do wszystkich paneli.
-    # Panele muszą zostać zaktualizowane, aby używać kolorów z `drawing_utils`.
-    if layout_config.get('time', {}).get('enabled', True):
-        time_panel.draw_panel(image, draw, time_data, weather_data, fonts, layout_config['time'])
-    else:
-        logging.info("Panel 'time' jest wyłączony w konfiguracji. Pomijanie.")
-
-    if layout_config.get('weather_and_air', {}).get('enabled', True):
-        weather_panel.draw_panel(image, draw, weather_data, airly_data, fonts, layout_config['weather_and_air'])
-    else:
-        logging.info("Panel 'weather_and_air' jest wyłączony w konfiguracji. Pomijanie.")
-
-    if calendar_data.get('error') == 'AUTH_ERROR':
-        error_message = "Błąd autoryzacji Kalendarza Google. Uruchom skrypt `modules/google_calendar.py` ręcznie."
-        if layout_config.get('calendar', {}).get('enabled', True):
-            drawing_utils.draw_error_message(draw, error_message, fonts, layout_config['calendar'])
-        if layout_config.get('events', {}).get('enabled', True):
+def _load_panel_data(panels=LAYER_NAMES):
+    """Pobiera z magazynu danych zbiory danych, z których korzystają podane panele (według rejestru paneli)."""
+    data = {name: read_data(name, _default_data(name)) for name in sorted(panel_registry.get_required_data(panels))}
+    if 'calendar' in data:
+        calendar_data = data['calendar'] = dict(data['calendar'])
+        # Święta obliczone lokalnie są dostępne od razu po starcie i podczas braku sieci.
+        calendar_data['holiday_dates'] = polish_holidays.merge_holiday_dates(calendar_data.get('holiday_dates', []))
+    return data
+
+def _draw_unusual_holiday(draw, calendar_data, fonts):
+    """Rysuje nietypowe święto w dolnej części ekranu. Zwraca False, jeśli nie ma czego rysować."""
+    unusual_holiday_title = calendar_data.get('unusual_holiday', '')
+    unusual_holiday_desc = calendar_data.get('unusual_holiday_desc', '')
+
+    if not unusual_holiday_title or "Brak nietypowych świąt" in unusual_holiday_title:
+        return False
+
+    logging.debug(f"Rysowanie nietypowego święta: '{unusual_holiday_title}'")
+    font_title = fonts.get('small_bold')
+    font_desc = fonts.get('small')
+    y_start_area = 400
+    area_height = EPD_HEIGHT - y_start_area
+    y_center_area = y_start_area + area_height // 2
+    max_width_chars_title = 45
+    max_width_chars_desc = 55
+    wrapped_title = textwrap.wrap(unusual_holiday_title, width=max_width_chars_title)
+    title_line_height = font_title.getbbox("A")[3] - font_title.getbbox("A")[1] + 5
+    total_title_height = len(wrapped_title) * title_line_height
+    wrapped_desc = []
+    total_desc_height = 0
+    if unusual_holiday_desc:
+        wrapped_desc = textwrap.wrap(unusual_holiday_desc, width=max_width_chars_desc)
+        desc_line_height = font_desc.getbbox("A")[3] - font_desc.getbbox("A")[1] + 4
+        total_desc_height = len(wrapped_desc) * desc_line_height + 5
+    total_block_height = total_title_height + total_desc_height
+    current_y = y_center_area - total_block_height // 2 + 10
+    for line in wrapped_title:
+        draw.text((EPD_WIDTH // 2, current_y), line, font=font_title, fill=drawing_utils.BLACK, anchor="mt")
+        current_y += title_line_height
+    if wrapped_desc:
+        current_y += 5
+        for line in wrapped_desc:
+            draw.text((EPD_WIDTH // 2, current_y), line, font=font_desc, fill=drawing_utils.BLACK, anchor="mt")
+            current_y += desc_line_height
+    return True
+
+def _draw_stale_indicator(image, panel_config):
+    """Rysuje małą ikonę nieaktualnych danych w prawym dolnym rogu panelu."""
+    icon = drawing_utils.render_svg_with_cache(asset_manager.get_path('icon_sync_problem'), size=STALE_ICON_SIZE)
+    if icon is None:
+        return
+    rect = panel_config['rect']
+    image.paste(icon, (rect[2] - STALE_ICON_SIZE - 4, rect[3] - STALE_ICON_SIZE - 4), mask=icon)
+
+def get_panels_with_outdated_staleness():
+    """Zwraca panele, których wskaźnik nieaktualnych danych nie odpowiada już wiekowi danych."""
+    with _layers_lock:
+        drawn = {name: layer['stale'] for name, layer in _layers.items() if layer is not None}
+    return {panel for panel in drawn if panel in freshness.PANEL_SOURCES and freshness.is_panel_stale(panel) != drawn[panel]}
+
+def _draw_panel(name, image, layout_config, data, fonts, stale):
+    """Rysuje panel na obrazie `image`. Zwraca False, jeśli nie ma czego rysować."""
+    draw = ImageDraw.Draw(image)
+    calendar_data = data.get('calendar', {})
+    auth_error = calendar_data.get('error') == 'AUTH_ERROR'
+    error_message = "Błąd autoryzacji Kalendarza Google. Uruchom skrypt `modules/google_calendar.py` ręcznie."
+
+    if name == 'time':
+        time_panel.draw_panel(image, draw, data['time'], data['weather'], fonts, layout_config['time'])
+    elif name == 'weather_and_air':
+        weather_panel.draw_panel(image, draw, data['weather'], data['airly'], fonts, layout_config['weather_and_air'])
+    elif name == 'events':
+        if auth_error:
             drawing_utils.draw_error_message(draw, error_message, fonts, layout_config['events'])
-    else:
-        if layout_config.get('events', {}).get('enabled', True):
+        else:
             events_panel.draw_panel(image, draw, calendar_data, fonts, layout_config['events'])
-        if layout_config.get('calendar', {}).get('enabled', True):
-            calendar_panel.draw_panel(draw, calendar_data, fonts, layout_config['calendar'])
+    elif name == 'calendar':
+        if auth_error:
+            drawing_utils.draw_error_message(draw, error_message, fonts, layout_config['calendar'])
+        else:
+            calendar_panel.draw_panel(draw, calendar_grid.get_month_grid(calendar_data), fonts, layout_config['calendar'])
+    elif name == 'unusual_holiday':
+        if not _draw_unusual_holiday(draw, calendar_data, fonts):
+            return False
 
-    if draw_borders:
-        logging.info("Rysowanie granic paneli (tryb deweloperski).")
-        for panel_name, panel_config in layout_config.items():
-            if panel_config.get('enabled', True) and 'rect' in panel_config:
-                draw.rectangle(panel_config['rect'], outline=drawing_utils.BLACK)
+    if stale:
+        _draw_stale_indicator(image, layout_config[name])
+    return True
 
-    unusual_holiday_title = calendar_data.get('unusual_holiday', '')
-    unusual_holiday_desc = calendar_data.get('unusual_holiday_desc', '')
+def _draw_layer(name, layout_config, data, fonts):
+    """Rysuje pojedynczą warstwę panelu. Zwraca None, jeśli warstwa jest pusta lub panel wyłączony."""
+    if not panel_registry.is_enabled(name, layout_config):
+        logging.info(f"Panel '{name}' jest wyłączony w konfiguracji. Pomijanie.")
+        return None
 
-    if unusual_holiday_title and "Brak nietypowych świąt" not in unusual_holiday_title:
-        logging.debug(f"Rysowanie nietypowego święta: '{unusual_holiday_title}'")
-        font_title = fonts.get('small_bold')
-        font_desc = fonts.get('small')
-        y_start_area = 400
-        area_height = EPD_HEIGHT - y_start_area
-        y_center_area = y_start_area + area_height // 2
-        max_width_chars_title = 45
-        max_width_chars_desc = 55
-        wrapped_title = textwrap.wrap(unusual_holiday_title, width=max_width_chars_title)
-        title_line_height = font_title.getbbox("A")[3] - font_title.getbbox("A")[1] + 5
-        total_title_height = len(wrapped_title) * title_line_height
-        wrapped_desc = []
-        total_desc_height = 0
-        if unusual_holiday_desc:
-            wrapped_desc = textwrap.wrap(unusual_holiday_desc, width=max_width_chars_desc)
-            desc_line_height = font_desc.getbbox("A")[3] - font_desc.getbbox("A")[1] + 4
-            total_desc_height = len(wrapped_desc) * desc_line_height + 5
-        total_block_height = total_title_height + total_desc_height
-        current_y = y_center_area - total_block_height // 2 + 10
-        for line in wrapped_title:
-            draw.text((EPD_WIDTH // 2, current_y), line, font=font_title, fill=drawing_utils.BLACK, anchor="mt")
-            current_y += title_line_height
-        if wrapped_desc:
-            current_y += 5
-            for line in wrapped_desc:
-                draw.text((EPD_WIDTH // 2, current_y), line, font=font_desc, fill=drawing_utils.BLACK, anchor="mt")
-                current_y += desc_line_height
+    image = Image.new('L', (EPD_WIDTH, EPD_HEIGHT), drawing_utils.WHITE)
+    stale = freshness.is_panel_stale(name)
+    if not _draw_panel(name, image, layout_config, data, fonts, stale):
+        return None
+    box = ImageChops.invert(image).getbbox()
+    if box is None:
+        return None
+    return {'image': image.crop(box), 'box': box, 'stale': stale}
+
+_render_pool = None
+_render_pool_size = None
+
+def _available_cores():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+def set_render_workers(workers):
+    """Ustawia liczbę wątków rysujących warstwy ('auto' lub liczba). Przy jednym wątku warstwy są rysowane szeregowo."""
+    global _render_pool, _render_pool_size
+    size = _available_cores() if workers == 'auto' else max(1, int(workers))
+    if size == _render_pool_size:
+        return
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=True)
+    _render_pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="RenderWorker") if size > 1 else None
+    _render_pool_size = size
+    logging.debug(f"Rysowanie warstw paneli: {size} wątk(i/ów).")
+
+def _draw_layer_timed(name, layout_config, data):
+    start = time.perf_counter()
+    layer = _draw_layer(name, layout_config, data, drawing_utils.load_thread_fonts())
+    return layer, time.perf_counter() - start
+
+def _draw_layers(names, layout_config, data, fonts):
+    """
+    Rysuje podane warstwy - szeregowo lub, przy `display.render_workers` > 1, każdą w osobnym wątku puli.
+    """
+    if _render_pool_size is None:
+        set_render_workers(RENDER_WORKERS)
+    if _render_pool is None or len(names) < 2:
+        layers = {}
+        for name in names:
+            with metrics.timer(f'draw.{name}'):
+                layers[name] = _draw_layer(name, layout_config, data, fonts)
+        return layers
+    futures = {name: _render_pool.submit(_draw_layer_timed, name, layout_config, data) for name in names}
+    layers = {}
+    for name, future in futures.items():
+        layers[name], seconds = future.result()
+        # Czas jest zapisywany w wątku wywołującym, aby trafił do podsumowania bieżącego cyklu.
+        metrics.observe(f'draw.{name}', seconds)
+    return layers
+
+def generate_image(layout_config, draw_borders=False, panels=None):
+    """
+    Generuje obraz w skali szarości do wyświetlenia.
+    Jeśli podano `panels`, przerysowywane są tylko te warstwy, a pozostałe są brane z poprzedniego obrazu.
+    """
+    return _generate_frame(layout_config, draw_borders, panels)[0]
+
+def _generate_frame(layout_config, draw_borders=False, panels=None):
+    """Jak generate_image, ale zwraca też numer klatki - większy numer oznacza obraz złożony z nowszych warstw."""
+    global _layers_ready, _frame_seq
+    fonts = drawing_utils.load_fonts()
+
+    with _layers_lock:
+        if panels is None or not _layers_ready:
+            names_to_draw = LAYER_NAMES
+        else:
+            names_to_draw = [name for name in LAYER_NAMES if name in panels]
+        data = _load_panel_data(names_to_draw)
+        _layers.update(_draw_layers(names_to_draw, layout_config, data, fonts))
+        _layers_ready = True
+
+        if draw_borders:
+            logging.info("Rysowanie granic paneli (tryb deweloperski).")
+        image = _compose_layers(_layers, layout_config, data, fonts, draw_borders)
+        _frame_seq += 1
+        seq = _frame_seq
+    return image, seq
+
+# Granice paneli (tryb deweloperski) są rysowane przed tą warstwą - jak w kolejności rysowania paneli.
+BORDERS_BEFORE_LAYER = 'unusual_holiday'
+
+def _compose_layers(layers, layout_config, data, fonts, draw_borders=False):
+    """
+    Składa obraz z warstw w kolejności rysowania paneli. Warstwa trafiająca na puste (białe) tło jest
+    wklejana, a warstwa nachodząca na piksele narysowane wcześniej (np. pasek dzisiejszego święta panelu
+    wydarzeń na dacie panelu czasu) jest rysowana na nowo bezpośrednio na składanym obrazie. Wynik jest
+    więc taki sam jak przy rysowaniu wszystkich paneli na jednym obrazie. Panele nie mogą rysować
+    białym kolorem poza obszarem swoich niebiałych pikseli.
+    """
+    with metrics.timer('frame.compose'):
+        image = Image.new('L', (EPD_WIDTH, EPD_HEIGHT), drawing_utils.WHITE)
+        for name in LAYER_NAMES:
+            if draw_borders and name == BORDERS_BEFORE_LAYER:
+                _draw_borders(image, layout_config)
+            layer = layers.get(name)
+            if layer is None:
+                continue
+            box = layer['box']
+            if image.crop(box).getextrema()[0] == drawing_utils.WHITE:
+                image.paste(layer['image'], box[:2])
+                continue
+            logging.debug(f"Warstwa '{name}' nachodzi na wcześniejsze panele. Rysowanie bezpośrednio na obrazie.")
+            panel_data = _load_panel_data((name,))
+            panel_data.update(data)
+            _draw_panel(name, image, layout_config, panel_data, fonts, layer['stale'])
     return image
 
-def _execute_display_update(img, mode, flip, clear_screen=False, rect=None, quiet=False):
+def _draw_borders(image, layout_config):
+    draw = ImageDraw.Draw(image)
+    for panel_name, panel_config in layout_config.items():
+        if panel_config.get('enabled', True) and 'rect' in panel_config:
+            draw.rectangle(panel_config['rect'], outline=drawing_utils.BLACK)
+
+def prerender_time_frame(layout_config, time_data, draw_borders=False, flip=False):
     """
-    Prywatna funkcja pomocnicza do obsługi komunikacji z wyświetlaczem E-Ink.
+    Rysuje warstwę zegara z podanymi danymi czasu, składa klatkę z pozostałych zapamiętanych warstw
+    i pakuje ją do bufora wyświetlacza. Zapamiętane warstwy nie są zmieniane - klatka trafia na ekran
+    dopiero w display_prerendered. Zwraca None, jeśli warstwy nie zostały jeszcze narysowane.
     """
-    global _FLIP_LOGGED
-    logging.debug(f"_execute_display_update: Rozpoczęcie dla trybu: {mode}, flip: {flip}, rect: {rect}")
+    data = _load_panel_data(('time',))
+    data['time'] = time_data
+    fonts = drawing_utils.load_fonts()
+
+    with _layers_lock:
+        if not _layers_ready:
+            return None
+        layers = dict(_layers)
+    with metrics.timer('draw.time'):
+        layers['time'] = _draw_layer('time', layout_config, data, fonts)
+    image = _compose_layers(layers, layout_config, data, fonts, draw_borders)
+    with metrics.timer('epd.getbuffer'):
+        packed = epd7in5_V2.EPD().getbuffer(image.rotate(180) if flip else image)
+    return {'image': image, 'packed': packed, 'time_layer': layers['time'], 'flip': flip}
+
+def _image_hash(img):
+    """Zwraca skrót SHA-1 pikseli obrazu."""
+    return hashlib.sha1(img.tobytes()).hexdigest()
+
+def _record_frame(img=None, flip=False, cleared=False):
+    """Zapisuje metadane klatki, która jest teraz na wyświetlaczu."""
+    frame_meta = {
+        'displayed_at': time.time(),
+        'image_sha1': _image_hash(img) if img is not None else None,
+        'flip': flip,
+        'cleared': cleared
+    }
     try:
-        with EPD_LOCK:
-            if mode == 'full':
-                log_level = logging.DEBUG if quiet else logging.INFO
-                logging.log(log_level, f"Rozpoczynanie aktualizacji wyświetlacza (tryb: {mode}).")
-            elif mode == 'partial':
-                log_level = logging.DEBUG
-                logging.log(log_level, f"Rozpoczynanie aktualizacji wyświetlacza (tryb: {mode}). Obszar: {rect}")
-            else:
-                raise ValueError(f"Nieznany tryb aktualizacji: {mode}")
-
-            if flip:
-                if not _FLIP_LOGGED:
-                    logging.info("Obracanie obrazu o 180 stopni.")
-                    _FLIP_LOGGED = True
-                else:
-                    logging.debug("Obracanie obrazu o 180 stopni.")
-                img_display = img.rotate(180)
+        json_writer.write_json(FRAME_META_PATH, frame_meta)
+    except OSError as e:
+        logging.warning(f"Nie udało się zapisać metadanych ostatniej klatki: {e}")
+
+def get_warm_start_frame(max_age_seconds, flip=False):
+    """
+    Zwraca metadane ostatniej klatki, jeśli nadal jest na wyświetlaczu i jest na tyle świeża,
+    że można pominąć ekran powitalny i czyszczenie ekranu. W przeciwnym razie zwraca None.
+    """
+    try:
+        with open(FRAME_META_PATH, 'r', encoding='utf-8') as f:
+            frame_meta = json.load(f)
+    except (IOError, json.JSONDecodeError):
+        return None
+
+    age = time.time() - frame_meta.get('displayed_at', 0)
+    if frame_meta.get('cleared') or frame_meta.get('flip') != flip or not 0 <= age <= max_age_seconds:
+        logging.info(f"Ostatnia klatka nie nadaje się do szybkiego startu (wiek: {age:.0f}s, wyczyszczony ekran: {frame_meta.get('cleared')}).")
+        return None
+    try:
+        with FileLock(IMAGE_LOCK_PATH), Image.open(IMAGE_PATH) as last_image:
+            if _image_hash(last_image) != frame_meta.get('image_sha1'):
+                logging.info("Zapisany obraz nie odpowiada ostatniej klatce. Szybki start niemożliwy.")
+                return None
+    except (IOError, OSError):
+        return None
+    frame_meta['age'] = age
+    return frame_meta
+
+def _execute_display_update(img, flip, clear_screen=False, quiet=False, packed=None):
+    """
+    Prywatna funkcja pomocnicza wykonująca pełne odświeżenie wyświetlacza E-Ink, wywoływana tylko
+    z wątku wyświetlacza (display_worker). `packed` to bufor przygotowany wcześniej (już obrócony) - pomija obracanie i pakowanie obrazu.
+    Zwraca True, jeśli obraz został wysłany na wyświetlacz.
+    """
+    global _FLIP_LOGGED, _last_refresh_started_at
+    logging.debug(f"_execute_display_update: Rozpoczęcie, flip: {flip}")
+    try:
+        log_level = logging.DEBUG if quiet else logging.INFO
+        logging.log(log_level, "Rozpoczynanie aktualizacji wyświetlacza.")
+
+        if packed is not None:
+            img_display = None
+        elif flip:
+            if not _FLIP_LOGGED:
+                logging.info("Obracanie obrazu o 180 stopni.")
+                _FLIP_LOGGED = True
             else:
-                img_display = img
-            
-            epd = epd7in5_V2.EPD()
-            if mode == 'full':
-                epd.init()
-                if clear_screen:
-                    logging.debug("Czyszczenie ekranu przed pełnym odświeżeniem.")
-                    epd.Clear()
-                epd.display(epd.getbuffer(img_display))
-            elif mode == 'partial':
-                epd.init_part()
-                # display_Partial expects x, y, w, h
-                # Transform rect if display is flipped
-                if flip:
-                    transformed_rect = (
-                        EPD_WIDTH - rect[2],
-                        EPD_HEIGHT - rect[3],
-                        EPD_WIDTH - rect[0],
-                        EPD_HEIGHT - rect[1]
-                    )
-                    logging.debug(f"Oryginalny rect: {rect}, Transformed rect: {transformed_rect}")
-                    epd.display_Partial(epd.getbuffer(img_display), transformed_rect[0], transformed_rect[1], transformed_rect[2]-transformed_rect[0], transformed_rect[3]-transformed_rect[1])
-                else:
-                    epd.display_Partial(epd.getbuffer(img_display), rect[0], rect[1], rect[2]-rect[0], rect[3]-rect[1])
-            
-            epd.sleep()
-            logging.debug(f"_execute_display_update: Zakończenie dla trybu: {mode}")
-            logging.log(log_level, f"Aktualizacja wyświetlacza (tryb: {mode}) zakończona.")
+                logging.debug("Obracanie obrazu o 180 stopni.")
+            img_display = img.rotate(180)
+        else:
+            img_display = img
+
+        epd = refresh_ledger.instrument_epd(metrics.instrument_epd(epd7in5_V2.EPD()))
+        epd.init()
+        if clear_screen:
+            logging.debug("Czyszczenie ekranu przed pełnym odświeżeniem.")
+            epd.Clear()
+        if packed is None:
+            with metrics.timer('epd.getbuffer'):
+                packed = epd.getbuffer(img_display)
+        _last_refresh_started_at = time.time()
+        epd.display(packed)
+        epd.sleep()
+        refresh_ledger.save_if_due()
+        logging.log(log_level, "Aktualizacja wyświetlacza zakończona.")
+        return True
     except Exception as e:
         logging.error(f"Wystąpił błąd podczas komunikacji z wyświetlaczem: {e}", exc_info=True)
+    return False
 
-def update_display(layout_config, force_full_refresh=False, draw_borders=False, apply_pixel_shift=False, flip=False, quiet=False):
-    """Generuje nowy obraz i wykonuje pełne odświeżenie wyświetlacza."""
+def update_display(layout_config, force_full_refresh=False, draw_borders=False, apply_pixel_shift=False, flip=False, quiet=False, panels=None):
+    """
+    Generuje nowy obraz i wykonuje pełne odświeżenie wyświetlacza.
+    `panels` ogranicza przerysowanie do wskazanych paneli (None = wszystkie).
+    Zwraca True, jeśli obraz został wyświetlony (False także wtedy, gdy zastąpiła go nowsza klatka).
+    """
     logging.debug("update_display: Rozpoczęcie.")
+    displayed = False
     try:
-        log_level = logging.DEBUG if quiet else logging.INFO
-        logging.log(log_level, "Generowanie nowego obrazu do pełnego odświeżenia.")
-        img = generate_image(layout_config, draw_borders=draw_borders)
-        if apply_pixel_shift:
-            max_shift = 2
-            dx = random.randint(-max_shift, max_shift)
-            dy = random.randint(-max_shift, max_shift)
-            logging.info(f"Stosowanie przesunięcia pikseli o ({dx}, {dy}) w celu ochrony ekranu.")
-            img = _shift_image(img, dx, dy)
-        with FileLock(IMAGE_LOCK_PATH):
-            img.save(IMAGE_PATH, "PNG")
-        _execute_display_update(img, mode='full', flip=flip, clear_screen=force_full_refresh, quiet=quiet)
+        with metrics.cycle('display'):
+            log_level = logging.DEBUG if quiet else logging.INFO
+            logging.log(log_level, "Generowanie nowego obrazu do pełnego odświeżenia.")
+            img, seq = _generate_frame(layout_config, draw_borders=draw_borders, panels=panels)
+            if apply_pixel_shift:
+                max_shift = 2
+                dx = random.randint(-max_shift, max_shift)
+                dy = random.randint(-max_shift, max_shift)
+                logging.info(f"Stosowanie przesunięcia pikseli o ({dx}, {dy}) w celu ochrony ekranu.")
+                img = _shift_image(img, dx, dy)
+            _save_image(img, seq)
+            # Klatka trafia do kolejki wyświetlacza; oczekująca starsza klatka zostanie przez nią zastąpiona.
+            displayed = _frame_result(display_worker.submit_frame(img, seq, flip=flip, clear_screen=force_full_refresh, quiet=quiet).wait(), seq)
     except Exception as e:
         logging.error(f"Wystąpił błąd podczas przygotowywania pełnej aktualizacji: {e}", exc_info=True)
     logging.debug("update_display: Zakończenie.")
+    return displayed
+
+def display_prerendered(prerendered, quiet=True):
+    """
+    Wysyła na wyświetlacz klatkę przygotowaną przez prerender_time_frame i zapamiętuje jej warstwę zegara.
+    Zwraca True, jeśli obraz został wyświetlony.
+    """
+    global _frame_seq
+    displayed = False
+    try:
+        with metrics.cycle('display'):
+            img = prerendered['image']
+            # Dane czasu następnej minuty są już opublikowane, więc kolejne klatki i tak narysują tę samą warstwę zegara.
+            with _layers_lock:
+                _layers['time'] = prerendered['time_layer']
+                _frame_seq += 1
+                seq = _frame_seq
+            ticket = display_worker.submit_frame(img, seq, flip=prerendered['flip'], quiet=quiet, packed=prerendered['packed'])
+            # Zapis obrazu w trakcie odświeżenia, aby nie opóźniać zmiany minuty na ekranie.
+            _save_image(img, seq)
+            displayed = _frame_result(ticket.wait(), seq)
+    except Exception as e:
+        logging.error(f"Wystąpił błąd podczas wyświetlania przygotowanej klatki: {e}", exc_info=True)
+    return displayed
+
+def _frame_result(result, seq):
+    """Zamienia wynik kolejki wyświetlacza na True/False; klatka pominięta na rzecz nowszej nie jest wyświetlona."""
+    if result == display_worker.DROPPED:
+        logging.debug(f"Klatka {seq} nie została wyświetlona - na ekranie jest już nowsza.")
+        return False
+    return bool(result)
 
-def partial_update_time(layout_config, draw_borders=False, flip=False):
-    """Wyświetlacz czarno-biały nie wspiera szybkiej aktualizacji. Wykonywane jest pełne odświeżenie."""
+def _save_image(img, seq):
+    """Zapisuje obraz do IMAGE_PATH, chyba że zapisano już obraz nowszej klatki."""
+    global _saved_seq
+    with metrics.timer('image.save'), FileLock(IMAGE_LOCK_PATH):
+        if seq < _saved_seq:
+            return
+        img.save(IMAGE_PATH, "PNG")
+        _saved_seq = seq
+
+def _show_frame(img, flip, clear_screen, quiet, packed):
+    """Wysyła klatkę z kolejki na wyświetlacz (pełne odświeżenie) i zapisuje jej metadane (wywoływane w wątku wyświetlacza)."""
+    displayed = _execute_display_update(img, flip=flip, clear_screen=clear_screen, quiet=quiet, packed=packed)
+    if displayed:
+        _record_frame(img, flip)
+    return displayed
+
+display_worker.set_frame_executor(_show_frame)
+
+def get_last_refresh_started_at():
+    """Zwraca czas (sekundy epoki) rozpoczęcia ostatniego pełnego odświeżenia lub None."""
+    return _last_refresh_started_at
+
+def partial_update_time(layout_config, draw_borders=False, flip=False, extra_panels=()):
+    """
+    Przerysowuje panel czasu (oraz ewentualne panele z oczekującymi zmianami danych).
+    Wyświetlacz czarno-biały nie wspiera szybkiej aktualizacji. Wykonywane jest pełne odświeżenie.
+    """
     logging.debug("Wyświetlacz nie wspiera częściowej aktualizacji. Wykonywanie pełnego odświeżenia (tryb cichy).")
-    update_display(layout_config, force_full_refresh=False, draw_borders=draw_borders, apply_pixel_shift=False, flip=flip, quiet=True)
+    panels = panel_registry.get_panels_with_cadence(panel_registry.MINUTE) | set(extra_panels)
+    update_display(layout_config, force_full_refresh=False, draw_borders=draw_borders, apply_pixel_shift=False, flip=flip, quiet=True, panels=panels)
+
+def _clear():
+    logging.info("Czyszczenie wyświetlacza e-ink...")
+    epd = refresh_ledger.instrument_epd(epd7in5_V2.EPD())
+    epd.init()
+    epd.Clear()
+    epd.sleep()
+    refresh_ledger.save_if_due()
+    logging.info("Wyświetlacz wyczyszczony.")
+    _record_frame(cleared=True)
+    return True
 
 def clear_display():
-    """Inicjalizuje wyświetlacz i czyści jego zawartość."""
+    """Inicjalizuje wyświetlacz i czyści jego zawartość (po klatkach już oczekujących w kolejce)."""
     logging.debug("clear_display: Rozpoczęcie.")
-    try:
-        with EPD_LOCK:
-            logging.info("Czyszczenie wyświetlacza e-ink...")
-            epd = epd7in5_V2.EPD()
-            epd.init()
-            epd.Clear()
-            epd.sleep()
-            logging.info("Wyświetlacz wyczyszczony.")
-    except Exception as e:
-        logging.error(f"Wystąpił błąd podczas czyszczenia wyświetlacza: {e}", exc_info=True)
+    if not display_worker.submit_exclusive(_clear, "czyszczenie ekranu").wait():
+        logging.error("Nie udało się wyczyścić wyświetlacza.")
     logging.debug("clear_display: Zakończenie.")
\ No newline at end of file
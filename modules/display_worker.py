@@ -0,0 +1,157 @@
+import time
+import logging
+import threading
+from collections import deque
+
+from modules.config_loader import config
+
+logger = logging.getLogger(__name__)
+
+DISPLAY_CONFIG = config.get('display', {})
+# Czas od zgłoszenia, po którym klatka jest liczona jako spóźniona (ostrzeżenie i licznik 'late'), jeśli zgłaszający nie podał własnego terminu.
+DEFAULT_DEADLINE_SECONDS = DISPLAY_CONFIG.get('frame_deadline_seconds', 60)
+# Maksymalny czas oczekiwania zgłaszającego na wyświetlenie klatki.
+WAIT_TIMEOUT_SECONDS = 120
+
+FRAME = 'frame'
+EXCLUSIVE = 'exclusive'
+# Wynik klatki pominiętej, bo na ekranie jest już nowsza (odróżnia ją od wyświetlonej i od błędu).
+DROPPED = 'dropped'
+
+class Ticket:
+    """
+    Potwierdzenie zgłoszenia. `wait()` zwraca True, gdy na ekranie jest ta klatka (lub zastępująca ją
+    w kolejce nowsza), DROPPED, gdy klatkę pominięto, bo wyświetlono już nowszą, albo False po błędzie.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.result = False
+
+    def resolve(self, result):
+        self.result = result
+        self._event.set()
+
+    def wait(self, timeout=WAIT_TIMEOUT_SECONDS):
+        if not self._event.wait(timeout):
+            logger.warning(f"Przekroczono czas oczekiwania ({timeout}s) na wyświetlenie klatki.")
+            return False
+        return self.result
+
+class _Request:
+    def __init__(self, kind, **fields):
+        self.kind = kind
+        self.seq = fields.get('seq', 0)
+        self.image = fields.get('image')
+        self.packed = fields.get('packed')
+        self.flip = fields.get('flip', False)
+        self.clear_screen = fields.get('clear_screen', False)
+        self.quiet = fields.get('quiet', False)
+        self.deadline = fields.get('deadline')
+        self.func = fields.get('func')
+        self.description = fields.get('description', kind)
+        self.tickets = [Ticket()]
+
+_cond = threading.Condition()
+_queue = deque()
+_thread = None
+_frame_executor = None
+_last_displayed_seq = -1
+_stats = {'submitted': 0, 'displayed': 0, 'dropped': 0, 'coalesced': 0, 'late': 0, 'exclusive': 0}
+
+def set_frame_executor(executor):
+    """Rejestruje funkcję `executor(image, flip, clear_screen, quiet, packed)` wysyłającą klatkę na wyświetlacz."""
+    global _frame_executor
+    _frame_executor = executor
+
+def _ensure_started_locked():
+    global _thread
+    if _thread is None:
+        _thread = threading.Thread(target=_worker, name="DisplayWorkerThread", daemon=True)
+        _thread.start()
+
+def _merge_locked(pending, request):
+    """Łączy nową klatkę z oczekującą (wymaga trzymania blokady): nowsza zastępuje starszą. Zwraca klatkę do kolejki."""
+    newer = request if request.seq >= pending.seq else pending
+    _stats['coalesced'] += 1
+    newer.clear_screen = pending.clear_screen or request.clear_screen
+    newer.quiet = pending.quiet and request.quiet
+    newer.deadline = min(pending.deadline, request.deadline)
+    newer.tickets = pending.tickets + request.tickets
+    return newer
+
+def submit_frame(image, seq, flip=False, clear_screen=False, quiet=False, packed=None, deadline=None):
+    """
+    Zgłasza klatkę do wyświetlenia. Klatka oczekująca w kolejce jest zastępowana nowszą (większy `seq`).
+    `packed` to gotowy bufor wyświetlacza (już obrócony). Zwraca Ticket.
+    """
+    request = _Request(FRAME, image=image, seq=seq, flip=flip, clear_screen=clear_screen, quiet=quiet,
+                       packed=packed, deadline=deadline or time.time() + DEFAULT_DEADLINE_SECONDS)
+    with _cond:
+        _stats['submitted'] += 1
+        if _queue and _queue[-1].kind == FRAME:
+            _queue[-1] = _merge_locked(_queue[-1], request)
+            logger.debug(f"Połączono klatkę {seq} z oczekującą w kolejce wyświetlacza.")
+        else:
+            _queue.append(request)
+        _ensure_started_locked()
+        _cond.notify()
+    return request.tickets[-1]
+
+def submit_exclusive(func, description):
+    """
+    Zgłasza zadanie z wyłącznym dostępem do wyświetlacza (np. ekran powitalny, czyszczenie).
+    Zadania nie są łączone i wykonują się w kolejności zgłoszenia. Zwraca Ticket z wynikiem `func()`.
+    """
+    request = _Request(EXCLUSIVE, func=func, description=description)
+    with _cond:
+        _queue.append(request)
+        _ensure_started_locked()
+        _cond.notify()
+    return request.tickets[0]
+
+def _run_frame(request):
+    global _last_displayed_seq
+    if request.seq < _last_displayed_seq:
+        logger.debug(f"Pominięto nieaktualną klatkę {request.seq} (wyświetlono już klatkę {_last_displayed_seq}).")
+        with _cond:
+            _stats['dropped'] += 1
+        return DROPPED
+    start = time.time()
+    if start > request.deadline:
+        with _cond:
+            _stats['late'] += 1
+        logger.warning(f"Klatka {request.seq} trafia na ekran {start - request.deadline:.1f}s po terminie.")
+    displayed = _frame_executor(request.image, request.flip, request.clear_screen, request.quiet, request.packed)
+    if displayed:
+        _last_displayed_seq = max(_last_displayed_seq, request.seq)
+        with _cond:
+            _stats['displayed'] += 1
+    return displayed
+
+def _worker():
+    while True:
+        with _cond:
+            while not _queue:
+                _cond.wait()
+            request = _queue.popleft()
+        try:
+            if request.kind == FRAME:
+                result = _run_frame(request)
+            else:
+                logger.debug(f"Wyłączny dostęp do wyświetlacza: {request.description}.")
+                with _cond:
+                    _stats['exclusive'] += 1
+                result = request.func()
+        except Exception as e:
+            logger.error(f"Błąd w wątku wyświetlacza ({request.description}): {e}", exc_info=True)
+            result = False
+        for ticket in request.tickets:
+            ticket.resolve(result)
+
+def get_stats():
+    """Zwraca liczniki kolejki: zgłoszone, wyświetlone, porzucone (nieaktualne), połączone w kolejce i spóźnione klatki."""
+    with _cond:
+        stats = dict(_stats)
+        stats['queued'] = len(_queue)
+    return stats
@@ -2,6 +2,7 @@ import logging
 import os
 import io
 import textwrap
+import threading
 from functools import lru_cache
 from PIL import Image, ImageFont
 
@@ -59,6 +60,20 @@ def load_fonts():
         fonts['weather_temp'] = ImageFont.load_default()
     return fonts
 
+_thread_fonts = threading.local()
+# Renderowanie SVG (przy braku w pamięci podręcznej) nie jest bezpieczne wielowątkowo w svglib/reportlab.
+_svg_lock = threading.Lock()
+
+def load_thread_fonts():
+    """
+    Zwraca czcionki wczytane osobno dla bieżącego wątku. Obiekty czcionek FreeType nie mogą być
+    używane równocześnie przez kilka wątków, więc każdy wątek puli renderującej ma własny zestaw.
+    """
+    fonts = getattr(_thread_fonts, 'fonts', None)
+    if fonts is None:
+        fonts = _thread_fonts.fonts = load_fonts.__wrapped__()
+    return fonts
+
 @lru_cache(maxsize=128)
 def render_svg_with_cache(svg_path, size):
     """
@@ -75,9 +90,10 @@ def render_svg_with_cache(svg_path, size):
             png_data = svg2png(url=svg_path, output_width=size, output_height=size)
             return Image.open(io.BytesIO(png_data)).convert("RGBA")
         else:
-            drawing = svg2rlg(svg_path)
-            in_memory_file = io.BytesIO()
-            renderPM.drawToFile(drawing, in_memory_file, fmt="PNG", bg=0xFFFFFF, configPIL={'transparent': 1})
+            with _svg_lock:
+                drawing = svg2rlg(svg_path)
+                in_memory_file = io.BytesIO()
+                renderPM.drawToFile(drawing, in_memory_file, fmt="PNG", bg=0xFFFFFF, configPIL={'transparent': 1})
             in_memory_file.seek(0)
             return Image.open(in_memory_file).resize((size, size), Image.Resampling.LANCZOS).convert("RGBA")
     except Exception as e:
@@ -0,0 +1,90 @@
+import os
+import json
+import logging
+import datetime
+import threading
+
+from modules.config_loader import config
+from modules import path_manager, json_writer
+
+logger = logging.getLogger(__name__)
+
+EPHEMERIS_PATH = os.path.join(path_manager.CACHE_DIR, 'ephemeris.json')
+TIMEZONE_NAME = "Europe/Warsaw"
+EVENTS = ('dawn', 'sunrise', 'noon', 'sunset', 'dusk')
+
+_table = None
+_lock = threading.Lock()
+
+def _build_table(latitude, longitude, year):
+    """
+    Oblicza tabelę zjawisk słonecznych na cały rok. Czasy są zapisywane jako minuty
+    od północy czasu lokalnego (None, gdy zjawisko danego dnia nie występuje).
+    """
+    # Ciężkie importy są potrzebne tylko przy przebudowie tabeli.
+    from astral import LocationInfo
+    from astral import sun as astral_sun
+    from dateutil import tz
+
+    logger.info(f"Obliczanie tabeli wschodów i zachodów słońca na rok {year}...")
+    loc = LocationInfo("Warsaw", "Poland", TIMEZONE_NAME, latitude, longitude)
+    local_tz = tz.gettz(TIMEZONE_NAME)
+    first_day = datetime.date(year, 1, 1)
+    days = (datetime.date(year + 1, 1, 1) - first_day).days
+
+    table = {'latitude': latitude, 'longitude': longitude, 'year': year, 'timezone': TIMEZONE_NAME}
+    table.update({event: [] for event in EVENTS})
+    for day_index in range(days):
+        day = first_day + datetime.timedelta(days=day_index)
+        for event in EVENTS:
+            try:
+                event_time = getattr(astral_sun, event)(loc.observer, date=day).astimezone(local_tz)
+                table[event].append(event_time.hour * 60 + event_time.minute)
+            except ValueError:
+                table[event].append(None)
+    return table
+
+def _is_valid(table, latitude, longitude, year):
+    """Sprawdza, czy tabela dotyczy bieżącej lokalizacji i roku."""
+    return (
+        table is not None
+        and table.get('latitude') == latitude
+        and table.get('longitude') == longitude
+        and table.get('year') == year
+        and all(event in table for event in EVENTS)
+    )
+
+def _load_table(latitude, longitude, year):
+    """Zwraca tabelę z pamięci lub z pliku w CACHE_DIR, przebudowując ją w razie potrzeby."""
+    global _table
+    with _lock:
+        if _is_valid(_table, latitude, longitude, year):
+            return _table
+
+        try:
+            with open(EPHEMERIS_PATH, 'r', encoding='utf-8') as f:
+                table = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            table = None
+
+        if not _is_valid(table, latitude, longitude, year):
+            table = _build_table(latitude, longitude, year)
+            try:
+                json_writer.write_json(EPHEMERIS_PATH, table)
+                logger.info(f"Zapisano tabelę wschodów i zachodów słońca w {EPHEMERIS_PATH}")
+            except OSError as e:
+                logger.warning(f"Nie udało się zapisać tabeli wschodów i zachodów słońca: {e}")
+        _table = table
+        return _table
+
+def get_sun_times(day=None):
+    """Zwraca słownik {zjawisko: 'HH:MM'} dla podanego dnia (domyślnie dzisiaj)."""
+    day = day or datetime.date.today()
+    location_config = config['location']
+    table = _load_table(location_config['latitude'], location_config['longitude'], day.year)
+    day_index = day.timetuple().tm_yday - 1
+    sun_times = {}
+    for event in EVENTS:
+        minutes = table[event][day_index]
+        sun_times[event] = f"{minutes // 60:02d}:{minutes % 60:02d}" if minutes is not None else "--:--"
+    return sun_times
@@ -0,0 +1,113 @@
+import datetime
+import logging
+from bisect import bisect_left, bisect_right
+
+logger = logging.getLogger(__name__)
+
+def _parse_event(event_raw, holidays_calendar_id):
+    """
+    Zamienia surowe wydarzenie Google Calendar na krotkę (początek, koniec, podsumowanie, czy_święto).
+    Początek i koniec to numery dni (date.toordinal), koniec włącznie. Zwraca None dla niepełnych wydarzeń.
+    """
+    start_info = event_raw.get('start')
+    end_info = event_raw.get('end')
+    if not start_info or not end_info:
+        return None
+
+    start_str = start_info.get('dateTime', start_info.get('date'))
+    end_str = end_info.get('dateTime', end_info.get('date'))
+    if not start_str or not end_str:
+        return None
+
+    start_day = datetime.date.fromisoformat(start_str[:10]).toordinal()
+    end_day = datetime.date.fromisoformat(end_str[:10]).toordinal()
+
+    # Wydarzenia całodniowe (i wydarzenia kończące się o północy) kończą się o północy dnia następnego.
+    if end_day > start_day and ('date' in end_info or end_str[11:19] == '00:00:00'):
+        end_day -= 1
+
+    is_holiday = holidays_calendar_id is not None and event_raw.get('organizer', {}).get('email') == holidays_calendar_id
+    return (start_day, max(start_day, end_day), event_raw.get('summary', 'Brak tytułu'), is_holiday)
+
+def _day_start(day_ordinal):
+    """Zwraca początek dnia w formacie ISO (YYYY-MM-DDT00:00:00), tak jak dotychczasowe dane kalendarza."""
+    return datetime.datetime.fromordinal(day_ordinal).isoformat()
+
+class EventIndex:
+    """
+    Indeks przedziałowy wydarzeń.
+
+    Wydarzenia są posortowane według dnia początku (w ramach dnia w kolejności pobrania), a `_max_ends[i]` przechowuje największy dzień
+    końca spośród pierwszych i+1 wydarzeń. Dzięki temu pytanie "czy dzień D ma wydarzenie" to jedno
+    wyszukiwanie binarne, a wydarzenia wielodniowe nie są rozwijane na kopie dla każdego dnia.
+    """
+
+    def __init__(self, events):
+        self._events = sorted(events, key=lambda event: event[0])
+        self._starts = [event[0] for event in self._events]
+        self._max_ends = []
+        max_end = None
+        for event in self._events:
+            max_end = event[1] if max_end is None else max(max_end, event[1])
+            self._max_ends.append(max_end)
+
+    @classmethod
+    def from_google_events(cls, events_raw, holidays_calendar_id=None):
+        """Buduje indeks z listy surowych wydarzeń zwróconych przez `events().list`."""
+        events = []
+        for event_raw in events_raw:
+            try:
+                event = _parse_event(event_raw, holidays_calendar_id)
+            except ValueError as e:
+                logger.warning(f"Nie udało się przetworzyć daty wydarzenia '{event_raw.get('summary')}': {e}")
+                continue
+            if event is not None:
+                events.append(event)
+        return cls(events)
+
+    def __len__(self):
+        return len(self._events)
+
+    def has_event_on(self, day):
+        """Sprawdza, czy w danym dniu trwa jakiekolwiek wydarzenie."""
+        day_ordinal = day.toordinal()
+        i = bisect_right(self._starts, day_ordinal)
+        return i > 0 and self._max_ends[i - 1] >= day_ordinal
+
+    def event_dates(self, first_day, last_day):
+        """Zwraca posortowaną listę dat (ISO) z przedziału [first_day, last_day], w których trwa wydarzenie."""
+        dates = []
+        day = first_day
+        while day <= last_day:
+            if self.has_event_on(day):
+                dates.append(day.isoformat())
+            day += datetime.timedelta(days=1)
+        return dates
+
+    def upcoming(self, limit, today=None):
+        """
+        Zwraca do `limit` nadchodzących wydarzeń jako słowniki {'summary', 'start', 'is_holiday'}.
+        `start` to początek dnia wydarzenia (YYYY-MM-DDT00:00:00). Wydarzenie wielodniowe, które
+        już trwa, pojawia się raz z dniem przyciętym do dzisiaj.
+        """
+        today = today or datetime.date.today()
+        today_ordinal = today.toordinal()
+        first_future = bisect_left(self._starts, today_ordinal)
+
+        # Wydarzenia rozpoczęte wcześniej, które trwają dzisiaj. Przeszukiwanie wstecz kończy się,
+        # gdy żadne z wcześniejszych wydarzeń nie sięga już dzisiejszego dnia.
+        ongoing = []
+        i = first_future - 1
+        while i >= 0 and self._max_ends[i] >= today_ordinal:
+            if self._events[i][1] >= today_ordinal:
+                ongoing.append(self._events[i])
+            i -= 1
+        ongoing.reverse()
+
+        upcoming_events = [
+            {'summary': summary, 'start': _day_start(today_ordinal), 'is_holiday': is_holiday}
+            for _, _, summary, is_holiday in ongoing[:limit]
+        ]
+        for start_day, _, summary, is_holiday in self._events[first_future:first_future + limit - len(upcoming_events)]:
+            upcoming_events.append({'summary': summary, 'start': _day_start(start_day), 'is_holiday': is_holiday})
+        return upcoming_events
@@ -0,0 +1,79 @@
+import time
+import logging
+from datetime import datetime
+
+from modules.config_loader import config
+from modules import data_store, network_utils, state_journal, panel_registry
+
+logger = logging.getLogger(__name__)
+
+FRESHNESS_CONFIG = config.get('freshness', {})
+MAX_AGE_MINUTES = {
+    'airly': 60,
+    'accuweather': 120,
+    'google_calendar': 120
+}
+MAX_AGE_MINUTES.update(FRESHNESS_CONFIG.get('max_age_minutes', {}))
+
+SOURCE_DATA = state_journal.SOURCE_DATA
+
+# Źródła, od których zależy aktualność danego panelu (z rejestru paneli).
+PANEL_SOURCES = panel_registry.STALE_PANEL_SOURCES
+
+def _parse_timestamp(timestamp):
+    """Zamienia znacznik czasu ISO na sekundy epoki (None, gdy nie można go odczytać)."""
+    try:
+        return datetime.fromisoformat(timestamp).timestamp()
+    except (TypeError, ValueError):
+        return None
+
+def get_last_good_time(source):
+    """
+    Zwraca czas (sekundy epoki) ostatnich poprawnych danych źródła: ostatnie udane pobranie
+    w tym procesie, znacznik `timestamp` w danych lub czas ich zapisania w magazynie danych.
+    """
+    candidates = []
+    state = network_utils.get_source_states().get(source)
+    if state and state['last_success']:
+        candidates.append(state['last_success'])
+
+    name = SOURCE_DATA[source]
+    if data_store.get_version(name):
+        data_timestamp = _parse_timestamp(data_store.get(name).get('timestamp'))
+        candidates.append(data_timestamp or data_store.get_updated_at(name))
+    candidates = [candidate for candidate in candidates if candidate]
+    return max(candidates) if candidates else None
+
+def get_source_age(source, now=None):
+    """Zwraca wiek danych źródła w sekundach lub None, gdy nie ma jeszcze żadnych danych."""
+    last_good = get_last_good_time(source)
+    if last_good is None:
+        return None
+    return max(0, (now or time.time()) - last_good)
+
+def get_source_ages():
+    """Zwraca wiek danych (w sekundach) wszystkich źródeł."""
+    now = time.time()
+    return {source: get_source_age(source, now) for source in SOURCE_DATA}
+
+def is_stale(source, now=None):
+    """Sprawdza, czy dane źródła są starsze niż skonfigurowany maksymalny wiek."""
+    age = get_source_age(source, now)
+    return age is not None and age > MAX_AGE_MINUTES.get(source, 120) * 60
+
+def is_panel_stale(panel):
+    """Sprawdza, czy którekolwiek ze źródeł panelu ma nieaktualne dane."""
+    now = time.time()
+    return any(is_stale(source, now) for source in PANEL_SOURCES.get(panel, ()))
+
+def log_source_ages():
+    """Loguje wiek danych źródeł, wyróżniając źródła z nieaktualnymi danymi."""
+    ages = get_source_ages()
+    summary = ', '.join(f"{source}: {age / 60:.0f} min" if age is not None else f"{source}: brak" for source, age in ages.items())
+    # Źródła niepobierane (żaden włączony panel z nich nie korzysta) z czasem zawsze byłyby nieaktualne.
+    required_sources = panel_registry.get_required_sources()
+    stale_sources = [source for source in ages if source in required_sources and is_stale(source)]
+    if stale_sources:
+        logger.warning(f"Nieaktualne dane źródeł: {', '.join(stale_sources)} (wiek danych: {summary}).")
+    else:
+        logger.info(f"Wiek danych źródeł: {summary}.")
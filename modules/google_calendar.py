@@ -6,7 +6,8 @@ import logging
 import calendar
 import socket
 import ssl
-from filelock import FileLock
+import time
+import threading
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
@@ -20,14 +21,11 @@ if __name__ == '__main__' and __package__ is None:
     sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from modules.config_loader import config
-from modules import path_manager
-from modules.network_utils import retry
+from modules import data_store, event_index, polish_holidays, state_journal
 
 logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/calendar.readonly']
-JSON_PATH = os.path.join(path_manager.CACHE_DIR, 'calendar.json')
-LOCK_PATH = os.path.join(path_manager.CACHE_DIR, 'calendar.json.lock')
 GCAL_CONFIG = config['google_calendar']
 
 def get_google_creds():
@@ -60,202 +58,295 @@ def get_google_creds():
             token.write(creds.to_json())
     return creds
 
-@retry(exceptions=(socket.timeout, ssl.SSLError, TransportError, ConnectionResetError, HttpError), tries=3, delay=10, backoff=2, logger=logger)
-def _get_events(service, calendar_id, time_min, time_max=None, max_results=250, verbose_mode=False):
-    """Pomocnicza funkcja do pobierania wydarzeń z określonego kalendarza."""
+def _log_http_error(calendar_id, e):
+    """Loguje błąd API zwrócony dla pojedynczego kalendarza."""
+    if e.resp.status == 404:
+        logger.error(f"Nie znaleziono kalendarza o ID '{calendar_id}'. Sprawdź ID w config.yaml.")
+    else:
+        logger.error(f"Wystąpił błąd API ({e.resp.status}) podczas pobierania danych dla kalendarza {calendar_id}: {e}")
+
+def _events_list_request(service, query):
+    """Tworzy zapytanie `events().list` na podstawie opisu zapytania."""
+    return service.events().list(
+        calendarId=query['calendar_id'],
+        timeMin=query['time_min'],
+        timeMax=query.get('time_max'),
+        maxResults=query.get('max_results', 250),
+        singleEvents=True,
+        orderBy='startTime'
+    )
+
+def _get_events(service, query, verbose_mode=False):
+    """Pomocnicza funkcja do pobierania wydarzeń z określonego kalendarza. Zwraca None po błędzie API."""
+    calendar_id = query['calendar_id']
     try:
-        events_result = service.events().list(
-            calendarId=calendar_id,
-            timeMin=time_min,
-            timeMax=time_max,
-            maxResults=max_results,
-            singleEvents=True,
-            orderBy='startTime'
-        ).execute()
+        events_result = _events_list_request(service, query).execute()
         if verbose_mode:
             logger.debug(f"Pobrana odpowiedź JSON z Google Calendar dla {calendar_id}: {json.dumps(events_result, indent=4)}")
         return events_result.get('items', [])
     except HttpError as e:
-        if e.resp.status == 404:
-            logger.error(f"Nie znaleziono kalendarza o ID '{calendar_id}'. Sprawdź ID w config.yaml.")
-        else:
-            logger.error(f"Wystąpił błąd API ({e.resp.status}) podczas pobierania danych dla kalendarza {calendar_id}: {e}")
-        return []
+        _log_http_error(calendar_id, e)
+        return None
+
+def _get_events_batch(service, queries, verbose_mode=False):
+    """
+    Pobiera wydarzenia dla wszystkich zapytań w jednym żądaniu wsadowym (batch).
+    Błędy API pojedynczych zapytań są logowane osobno, a wynik takiego zapytania to None.
+    """
+    results = {key: None for key in queries}
+
+    def _callback(request_id, response, exception):
+        calendar_id = queries[request_id]['calendar_id']
+        if exception is not None:
+            if isinstance(exception, HttpError):
+                _log_http_error(calendar_id, exception)
+            else:
+                logger.error(f"Błąd podczas pobierania danych dla kalendarza {calendar_id}: {exception}")
+            return
+        if verbose_mode:
+            logger.debug(f"Pobrana odpowiedź JSON z Google Calendar dla {calendar_id}: {json.dumps(response, indent=4)}")
+        results[request_id] = response.get('items', [])
+
+    batch = service.new_batch_http_request(callback=_callback)
+    for key, query in queries.items():
+        batch.add(_events_list_request(service, query), request_id=key)
+    batch.execute()
+    return results
+
+_api_calls = {'date': None, 'calls': 0, 'http_requests': 0}
+_api_calls_lock = threading.Lock()
+
+def _count_api_calls(calls, http_requests):
+    """Zlicza zapytania do API (każde zapytanie w żądaniu wsadowym liczy się do limitu osobno) w bieżącym dniu. Zwraca dzisiejszą liczbę zapytań."""
+    today = datetime.date.today()
+    with _api_calls_lock:
+        if _api_calls['date'] != today:
+            if _api_calls['date'] is not None:
+                logger.info(f"Zapytania do Google Calendar w dniu {_api_calls['date']}: {_api_calls['calls']} (żądania HTTP: {_api_calls['http_requests']}).")
+            _api_calls.update({'date': today, 'calls': 0, 'http_requests': 0})
+        _api_calls['calls'] += calls
+        _api_calls['http_requests'] += http_requests
+        return _api_calls['calls']
+
+def get_api_call_stats():
+    """Zwraca liczbę zapytań do API i żądań HTTP wykonanych w bieżącym dniu."""
+    with _api_calls_lock:
+        return dict(_api_calls)
+
+def _fetch_all_events(service, queries, verbose_mode=False):
+    """
+    Pobiera wydarzenia dla wszystkich zapytań (wsadowo lub sekwencyjnie) i mierzy czas trwania.
+    Zwraca tylko wyniki zapytań zakończonych powodzeniem.
+    """
+    use_batch = GCAL_CONFIG.get('batch_requests', True)
+    start = time.perf_counter()
+    if use_batch:
+        results = _get_events_batch(service, queries, verbose_mode=verbose_mode)
+    else:
+        results = {key: _get_events(service, query, verbose_mode=verbose_mode) for key, query in queries.items()}
+    elapsed = time.perf_counter() - start
+    calls_today = _count_api_calls(len(queries), 1 if use_batch else len(queries))
+    logger.info(f"Pobrano {len(queries)} zapytań do Google Calendar w {elapsed:.2f}s (tryb: {'wsadowy' if use_batch else 'sekwencyjny'}, dzisiaj: {calls_today} zapytań).")
+    return {key: items for key, items in results.items() if items is not None}
+
+DEFAULT_CALENDAR_DATA = {'upcoming_events': [], 'unusual_holiday': '', 'unusual_holiday_desc': '', 'event_dates': [], 'holiday_dates': []}
 
 def _read_calendar_data():
-    """Bezpiecznie odczytuje dane kalendarza z pliku JSON."""
-    try:
-        with open(JSON_PATH, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {'upcoming_events': [], 'unusual_holiday': '', 'unusual_holiday_desc': '', 'month_calendar': [], 'event_dates': [], 'holiday_dates': []}
-
-def _write_calendar_data(data):
-    """Zapisuje dane kalendarza do pliku JSON."""
-    with open(JSON_PATH, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=4)
-
-def _update_json_data(update_dict):
-    """Bezpiecznie aktualizuje plik JSON z danymi."""
-    with FileLock(LOCK_PATH):
-        data = _read_calendar_data()
-        data.update(update_dict)
-        _write_calendar_data(data)
-
-def update_events(verbose_mode=False):
-    """Pobiera i aktualizuje wydarzenia osobiste oraz święta."""
-    logger.info("Aktualizowanie wydarzeń osobistych i świąt...")
+    """Zwraca bieżące dane kalendarza z magazynu danych."""
+    return data_store.get('calendar', DEFAULT_CALENDAR_DATA)
+
+def _update_calendar_data(update_dict):
+    """Atomowo aktualizuje dane kalendarza w magazynie danych."""
+    data_store.update('calendar', update_dict)
+
+def _build_event_queries():
+    """Zwraca opisy wszystkich zapytań `events().list` wykonywanych w jednym cyklu."""
+    calendar_ids = GCAL_CONFIG['calendar_ids']
+    max_upcoming = GCAL_CONFIG['max_upcoming_events']
+    now_utc_iso = datetime.datetime.utcnow().isoformat() + 'Z'
+
+    today_local = datetime.date.today()
+    start_of_month = today_local.replace(day=1)
+    _, num_days = calendar.monthrange(start_of_month.year, start_of_month.month)
+    end_of_month = start_of_month.replace(day=num_days)
+
+    return {
+        'personal': {'calendar_id': calendar_ids['personal'], 'time_min': now_utc_iso, 'max_results': max_upcoming},
+        'holidays': {'calendar_id': calendar_ids['holidays'], 'time_min': now_utc_iso, 'max_results': max_upcoming},
+        'shared': {'calendar_id': calendar_ids['shared'], 'time_min': now_utc_iso, 'max_results': max_upcoming},
+        'holidays_month': {
+            'calendar_id': calendar_ids['holidays'],
+            'time_min': datetime.datetime.combine(start_of_month, datetime.time.min).isoformat() + 'Z',
+            'time_max': datetime.datetime.combine(end_of_month, datetime.time.max).isoformat() + 'Z'
+        },
+        'unusual_today': {
+            'calendar_id': calendar_ids['unusual'],
+            'time_min': datetime.datetime.combine(today_local, datetime.time.min).isoformat() + 'Z',
+            'time_max': datetime.datetime.combine(today_local, datetime.time.max).isoformat() + 'Z',
+            'max_results': 5
+        }
+    }
+
+# Zbiory danych kalendarza i zapytania, z których powstają. Każdy zbiór ma własny czas ważności.
+DATASET_QUERIES = {
+    'events': ('personal', 'holidays', 'shared'),
+    'holidays_month': ('holidays_month',),
+    'unusual_today': ('unusual_today',)
+}
+TTL_CONFIG = GCAL_CONFIG.get('ttl', {})
+
+_valid_until = {}
+
+def _next_midnight(now):
+    """Zwraca lokalną północ następnego dnia."""
+    return datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+
+def _compute_valid_until(dataset, now):
+    """
+    Wyznacza czas ważności zbioru danych: wydarzenia po `events_minutes`, święta miesiąca do północy
+    lub do początku kolejnego miesiąca (`holidays: daily|monthly`), nietypowe święto do północy.
+    """
+    if dataset == 'events':
+        events_minutes = TTL_CONFIG.get('events_minutes', config.get('refresh_intervals', {}).get('google_calendar_minutes', 1))
+        return now + datetime.timedelta(minutes=events_minutes)
+    if dataset == 'holidays_month' and TTL_CONFIG.get('holidays', 'daily') == 'monthly':
+        next_month = (now.date().replace(day=1) + datetime.timedelta(days=32)).replace(day=1)
+        return datetime.datetime.combine(next_month, datetime.time.min)
+    return _next_midnight(now)
+
+def _save_valid_until():
+    """Zapisuje czasy ważności zbiorów danych w dzienniku stanu."""
+    state_journal.update_section('calendar_ttl', {dataset: valid_until.isoformat() for dataset, valid_until in _valid_until.items()})
+
+def restore_state():
+    """
+    Odtwarza czasy ważności zbiorów danych z dziennika stanu, jeśli dane kalendarza w magazynie
+    są tymi samymi danymi, które zostały zapisane w dzienniku.
+    """
+    if not state_journal.has_current_data('google_calendar'):
+        return
+    for dataset, valid_until in state_journal.get_section('calendar_ttl').items():
+        try:
+            _valid_until[dataset] = datetime.datetime.fromisoformat(valid_until)
+        except (TypeError, ValueError):
+            continue
+    logger.info(f"Odtworzono czasy ważności danych kalendarza: {', '.join(sorted(_valid_until))}.")
+
+def _due_datasets(now):
+    """Zwraca zbiory danych, których czas ważności minął. Przy lokalnym źródle świąt pomija święta miesiąca."""
+    return [
+        dataset for dataset in DATASET_QUERIES
+        if now >= _valid_until.get(dataset, datetime.datetime.min)
+        and not (dataset == 'holidays_month' and polish_holidays.HOLIDAY_SOURCE == 'local')
+    ]
+
+def _parse_upcoming_events(results):
+    """
+    Buduje indeks przedziałowy z wydarzeń osobistych, świąt i wspólnych.
+    Zwraca listę nadchodzących wydarzeń oraz dni z wydarzeniami w widocznej siatce miesiąca.
+    """
+    index = event_index.EventIndex.from_google_events(
+        results['personal'] + results['holidays'] + results['shared'],
+        GCAL_CONFIG['calendar_ids']['holidays']
+    )
+    today_local = datetime.date.today()
+    month_days = calendar.Calendar().monthdatescalendar(today_local.year, today_local.month)
+
+    return {
+        'upcoming_events': index.upcoming(GCAL_CONFIG['max_upcoming_events'], today_local),
+        'event_dates': index.event_dates(month_days[0][0], month_days[-1][-1])
+    }
+
+def _parse_month_holidays(results):
+    """Przetwarza święta bieżącego miesiąca."""
+    return {'holiday_dates': [event['start']['date'] for event in results['holidays_month'] if 'date' in event['start']]}
+
+def _parse_unusual_holiday(results):
+    """Przetwarza dzisiejsze nietypowe święto."""
+    unusual_holiday_title = 'Brak nietypowych świąt dzisiaj.'
+    unusual_holiday_desc = ''
+    if results['unusual_today']:
+        first_event = results['unusual_today'][0]
+        unusual_holiday_title = first_event.get('summary', 'Brak tytułu')
+        description = first_event.get('description')
+        if description:
+            if '•' in description:
+                unusual_holiday_desc = description.split('•')[0].strip()
+            else:
+                unusual_holiday_desc = description.splitlines()[0].strip()
+
+    return {
+        'unusual_holiday': unusual_holiday_title,
+        'unusual_holiday_desc': unusual_holiday_desc
+    }
+
+DATASET_PARSERS = {
+    'events': _parse_upcoming_events,
+    'holidays_month': _parse_month_holidays,
+    'unusual_today': _parse_unusual_holiday
+}
+
+def update_events_and_holidays(verbose_mode=False):
+    """
+    Pobiera jednym żądaniem zbiory danych kalendarza, których czas ważności minął, i aktualizuje je.
+    Zwraca True po udanej aktualizacji (lub gdy wszystkie dane są aktualne), False po błędzie
+    i None, gdy brak poświadczeń.
+    """
+    now = datetime.datetime.now()
+    due_datasets = _due_datasets(now)
+    if not due_datasets:
+        logger.info("Wszystkie dane kalendarza są aktualne. Pomijam zapytania do API.")
+        return True
+
+    logger.info(f"Aktualizowanie danych kalendarza: {', '.join(due_datasets)}...")
     creds = get_google_creds()
-    if not creds: return
+    if not creds: return None
 
     try:
         service = build('calendar', 'v3', credentials=creds)
-        now_utc_iso = datetime.datetime.utcnow().isoformat() + 'Z'
-        
-        personal_events_raw = _get_events(service, GCAL_CONFIG['calendar_ids']['personal'], now_utc_iso, max_results=GCAL_CONFIG['max_upcoming_events'], verbose_mode=verbose_mode)
-        holiday_events_raw = _get_events(service, GCAL_CONFIG['calendar_ids']['holidays'], now_utc_iso, max_results=GCAL_CONFIG['max_upcoming_events'], verbose_mode=verbose_mode)
-        shared_events_raw = _get_events(service, GCAL_CONFIG['calendar_ids']['shared'], now_utc_iso, max_results=GCAL_CONFIG['max_upcoming_events'], verbose_mode=verbose_mode)
-
-        all_events = []
-        for event_raw in personal_events_raw + holiday_events_raw + shared_events_raw:
-            start_info = event_raw.get('start')
-            end_info = event_raw.get('end')
-            if not start_info or not end_info:
-                continue
-
-            start_date_str = start_info.get('dateTime', start_info.get('date'))
-            end_date_str = end_info.get('dateTime', end_info.get('date'))
-
-            if not start_date_str or not end_date_str:
-                continue
-
-            start_dt = datetime.datetime.fromisoformat(start_date_str.split('T')[0])
-            end_dt = datetime.datetime.fromisoformat(end_date_str.split('T')[0])
-
-            # Google Calendar all-day events end at midnight of the next day, so adjust end_dt
-            if 'date' in start_info and 'date' in end_info:
-                end_dt -= datetime.timedelta(days=1)
-
-            current_dt = start_dt
-            while current_dt <= end_dt:
-                is_holiday_event = event_raw.get('organizer', {}).get('email') == GCAL_CONFIG['calendar_ids']['holidays']
-                all_events.append({
-                    'summary': event_raw.get('summary', 'Brak tytułu'),
-                    'start': current_dt.isoformat(),
-                    'is_holiday': is_holiday_event
-                })
-                current_dt += datetime.timedelta(days=1)
-
-        # Sort events by start time
-        all_events.sort(key=lambda x: x['start'])
-        
-        upcoming_events = []
-        event_dates = []
-        for event in all_events[:GCAL_CONFIG['max_upcoming_events']]:
-            upcoming_events.append(event)
-            event_dates.append(datetime.datetime.fromisoformat(event['start'].split('T')[0]).date().isoformat())
-
-        _update_json_data({
-            'upcoming_events': upcoming_events,
-            'event_dates': event_dates
-        })
-        logger.info("Zakończono aktualizację wydarzeń osobistych i świąt.")
+        all_queries = _build_event_queries()
+        queries = {key: all_queries[key] for dataset in due_datasets for key in DATASET_QUERIES[dataset]}
+        results = _fetch_all_events(service, queries, verbose_mode=verbose_mode)
+
+        update_dict = {}
+        updated_datasets = []
+        for dataset in due_datasets:
+            if all(key in results for key in DATASET_QUERIES[dataset]):
+                update_dict.update(DATASET_PARSERS[dataset](results))
+                _valid_until[dataset] = _compute_valid_until(dataset, now)
+                updated_datasets.append(dataset)
+            else:
+                logger.warning(f"Nie udało się pobrać zbioru danych '{dataset}'. Zostanie pobrany ponownie w kolejnym cyklu.")
+        if not updated_datasets:
+            return False
+
+        _update_calendar_data(update_dict)
+        _save_valid_until()
+        logger.info(f"Zakończono aktualizację danych kalendarza: {', '.join(updated_datasets)}.")
+        return True
+    except (socket.timeout, ssl.SSLError, TransportError, ConnectionResetError, HttpError) as e:
+        logger.warning(f"Błąd sieci podczas aktualizacji wydarzeń osobistych i świąt: {e}.")
     except Exception as e:
         logger.error(f"Błąd podczas aktualizacji wydarzeń osobistych i świąt: {e}", exc_info=True)
-
-def update_holidays(verbose_mode=False):
-    """Pobiera i aktualizuje tylko dane o świętach (raz dziennie)."""
-    logger.info("Aktualizowanie danych o świętach...")
-    creds = get_google_creds()
-    if not creds: return
-
-    try:
-        service = build('calendar', 'v3', credentials=creds)
-        today_local = datetime.date.today()
-        start_of_month = today_local.replace(day=1)
-        _, num_days = calendar.monthrange(start_of_month.year, start_of_month.month)
-        end_of_month = start_of_month.replace(day=num_days)
-
-        time_min_month_utc = datetime.datetime.combine(start_of_month, datetime.time.min).isoformat() + 'Z'
-        time_max_month_utc = datetime.datetime.combine(end_of_month, datetime.time.max).isoformat() + 'Z'
-
-        polish_holidays_raw = _get_events(service, GCAL_CONFIG['calendar_ids']['holidays'], time_min_month_utc, time_max_month_utc, verbose_mode=verbose_mode)
-        holiday_dates = [event['start']['date'] for event in polish_holidays_raw if 'date' in event['start']]
-
-        today_start_utc = datetime.datetime.combine(today_local, datetime.time.min).isoformat() + 'Z'
-        today_end_utc = datetime.datetime.combine(today_local, datetime.time.max).isoformat() + 'Z'
-        unusual_holidays_today_raw = _get_events(
-            service,
-            GCAL_CONFIG['calendar_ids']['unusual'],
-            time_min=today_start_utc,
-            time_max=today_end_utc,
-            max_results=5,
-            verbose_mode=verbose_mode
-        )
-
-        unusual_holiday_title = 'Brak nietypowych świąt dzisiaj.'
-        unusual_holiday_desc = ''
-        if unusual_holidays_today_raw:
-            first_event = unusual_holidays_today_raw[0]
-            unusual_holiday_title = first_event.get('summary', 'Brak tytułu')
-            description = first_event.get('description')
-            if description:
-                if '•' in description:
-                    unusual_holiday_desc = description.split('•')[0].strip()
-                else:
-                    unusual_holiday_desc = description.splitlines()[0].strip()
-
-        _update_json_data({
-            'holiday_dates': holiday_dates,
-            'unusual_holiday': unusual_holiday_title,
-            'unusual_holiday_desc': unusual_holiday_desc
-        })
-        logger.info("Zakończono aktualizację danych o świętach.")
-    except Exception as e:
-        logger.error(f"Błąd podczas aktualizacji świąt: {e}", exc_info=True)
-
-def build_calendar_grid():
-    """Generuje siatkę kalendarza na podstawie danych z pliku JSON."""
-    logger.info("Budowanie siatki kalendarza...")
-    with FileLock(LOCK_PATH):
-        data = _read_calendar_data()
-        holiday_dates_set = {datetime.date.fromisoformat(d) for d in data.get('holiday_dates', [])}
-        event_dates_set = {datetime.date.fromisoformat(d) for d in data.get('event_dates', [])}
-        today_local = datetime.date.today()
-        cal = calendar.Calendar()
-        month_days = cal.monthdatescalendar(today_local.year, today_local.month)
-        month_calendar = []
-        for week in month_days:
-            week_list = []
-            for day_date in week:
-                week_list.append({
-                    "day": day_date.day,
-                    "date": day_date.isoformat(),
-                    "is_today": day_date == today_local,
-                    "is_weekend": day_date.weekday() >= 5,
-                    "is_holiday": day_date in holiday_dates_set,
-                    "has_event": day_date in event_dates_set,
-                    "is_current_month": day_date.month == today_local.month
-                })
-            month_calendar.append(week_list)
-        data['month_calendar'] = month_calendar
-        _write_calendar_data(data)
-    logger.info("Zakończono budowanie siatki kalendarza.")
+    return False
 
 def update_calendar_data(verbose_mode=False):
-    """Uruchamia pełną aktualizację wszystkich danych kalendarza."""
+    """
+    Uruchamia pełną aktualizację wszystkich danych kalendarza.
+    Zwraca True po udanej aktualizacji, False po błędzie i None, gdy brak poświadczeń.
+    """
     logger.info("Uruchamianie pełnej aktualizacji danych kalendarza...")
     try:
-        update_holidays(verbose_mode)
-        update_events(verbose_mode)
-        build_calendar_grid()
+        return update_events_and_holidays(verbose_mode)
     except (socket.timeout, ssl.SSLError, TransportError, ConnectionResetError, HttpError) as e:
         logger.warning(f"Błąd sieci podczas aktualizacji danych kalendarza: {e}.")
     except Exception as e:
         logger.error(f"Wystąpił nieoczekiwany błąd w module kalendarza: {e}.", exc_info=True)
+    return False
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
     logger.info("Uruchamianie modułu kalendarza w celu autoryzacji i wstępnej synchronizacji...")
     update_calendar_data()
+    data_store.flush()
     logger.info("Autoryzacja i synchronizacja zakończona.")
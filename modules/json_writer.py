@@ -0,0 +1,79 @@
+import os
+import json
+import hashlib
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_last_hashes = {}
+_stats = {'writes': 0, 'skipped': 0, 'bytes_written': 0, 'files': {}}
+
+def serialize(data):
+    """Serializuje dane do zwartej postaci JSON (UTF-8, bez wcięć)."""
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def content_hash(data):
+    """Zwraca skrót SHA-1 zwartej serializacji danych."""
+    return hashlib.sha1(serialize(data)).hexdigest()
+
+def _file_hash(file_path):
+    """Zwraca skrót SHA-1 zawartości istniejącego pliku lub None."""
+    try:
+        with open(file_path, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    except OSError:
+        return None
+
+def write_json(file_path, data):
+    """
+    Atomowo zapisuje dane JSON do pliku (plik tymczasowy + os.replace).
+    Zapis jest pomijany, jeśli zawartość pliku nie zmieniła się.
+    Zwraca True, jeśli plik został zapisany.
+    """
+    payload = serialize(data)
+    digest = hashlib.sha1(payload).hexdigest()
+    file_name = os.path.basename(file_path)
+
+    with _lock:
+        if file_path not in _last_hashes:
+            _last_hashes[file_path] = _file_hash(file_path)
+        if _last_hashes[file_path] == digest:
+            _stats['skipped'] += 1
+            logger.debug(f"Zawartość {file_path} nie zmieniła się. Pomijam zapis.")
+            return False
+
+        directory = os.path.dirname(file_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{file_name}.", suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, file_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+        _last_hashes[file_path] = digest
+        _stats['writes'] += 1
+        _stats['bytes_written'] += len(payload)
+        _stats['files'][file_name] = _stats['files'].get(file_name, 0) + 1
+    logger.debug(f"Zapisano {len(payload)} B do {file_path}")
+    return True
+
+def get_write_stats():
+    """Zwraca liczniki zapisów: wykonane, pominięte, zapisane bajty oraz zapisy per plik."""
+    with _lock:
+        return {
+            'writes': _stats['writes'],
+            'skipped': _stats['skipped'],
+            'bytes_written': _stats['bytes_written'],
+            'files': dict(_stats['files'])
+        }
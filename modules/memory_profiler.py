@@ -0,0 +1,152 @@
+import gc
+import os
+import sys
+import time
+import signal
+import logging
+import datetime
+import threading
+import tracemalloc
+
+from modules.config_loader import config
+from modules import path_manager, scheduling
+
+logger = logging.getLogger(__name__)
+
+PROFILER_CONFIG = config.get('memory_profiler', {})
+INTERVAL_MINUTES = PROFILER_CONFIG.get('interval_minutes', 60)
+TOP_ALLOCATORS = PROFILER_CONFIG.get('top', 10)
+# Liczba ramek stosu zapamiętywanych przy każdej alokacji (więcej = dokładniej, ale drożej).
+TRACEBACK_FRAMES = PROFILER_CONFIG.get('frames', 5)
+
+# Alokacje samego mechanizmu śledzenia i importu modułów nie są interesujące.
+SNAPSHOT_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap>'),
+    tracemalloc.Filter(False, '<frozen importlib._bootstrap_external>'),
+    tracemalloc.Filter(False, '<unknown>')
+)
+
+_lock = threading.Lock()
+_state = {'started_at': None, 'start_rss': None, 'baseline': None, 'previous': None, 'previous_rss': None}
+
+def read_rss_bytes():
+    """Zwraca bieżące zużycie pamięci rezydentnej procesu (RSS) w bajtach lub None."""
+    try:
+        with open('/proc/self/status', 'r', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+def _format_mib(size):
+    return f"{size / (1024 * 1024):.1f} MiB" if size is not None else "brak"
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+
+def _lru_info(func):
+    info = func.cache_info()
+    return {'size': info.currsize, 'max': info.maxsize, 'hits': info.hits, 'misses': info.misses}
+
+def get_cache_sizes():
+    """Zwraca rozmiary wewnętrznych pamięci podręcznych aplikacji (liczba elementów, przybliżone bajty)."""
+    from modules import drawing_utils, calendar_grid, data_store, display, json_writer, metrics, render_scheduler, polish_holidays, network_utils
+
+    sizes = {
+        'fonts': _lru_info(drawing_utils.load_fonts),
+        'svg_icons': _lru_info(drawing_utils.render_svg_with_cache),
+        'month_grid': _lru_info(calendar_grid.build_month_grid),
+        'data_store': {'entries': len(data_store._entries), 'subscribers': len(data_store._subscribers)},
+        'display_layers': {
+            'layers': sum(1 for layer in display._layers.values() if layer is not None),
+            'bytes': sum(layer['image'].width * layer['image'].height for layer in display._layers.values() if layer is not None)
+        },
+        'json_writer_hashes': len(json_writer._last_hashes),
+        'metrics_stages': {'stages': len(metrics._recent), 'samples': sum(len(values) for values in metrics._recent.values())},
+        'render_latencies': len(render_scheduler._latencies),
+        'holiday_tables': len(polish_holidays._tables),
+        'breakers': len(network_utils._breakers)
+    }
+    # Obiekty usług googleapiclient są tworzone przy każdym pobraniu kalendarza - licznik żywych
+    # obiektów pokazuje, czy są zwalniane.
+    resource_class = getattr(sys.modules.get('googleapiclient.discovery'), 'Resource', None)
+    if resource_class is not None:
+        sizes['googleapiclient_resources'] = sum(1 for obj in gc.get_objects() if isinstance(obj, resource_class))
+    scheduler = scheduling.get_scheduler()
+    if scheduler is not None:
+        sizes['scheduler_jobs'] = len(scheduler.get_jobs())
+    return sizes
+
+def _format_stats(stats, limit):
+    return [str(stat) for stat in stats[:limit]]
+
+def report():
+    """Loguje RSS, jego przyrost na godzinę, największe przyrosty alokacji od poprzedniego raportu i rozmiary pamięci podręcznych."""
+    if not tracemalloc.is_tracing():
+        return
+    snapshot = _take_snapshot()
+    rss = read_rss_bytes()
+    with _lock:
+        previous, previous_rss = _state['previous'], _state['previous_rss']
+        started_at, start_rss = _state['started_at'], _state['start_rss']
+        _state['previous'], _state['previous_rss'] = snapshot, rss
+
+    hours = (time.monotonic() - started_at) / 3600
+    current, peak = tracemalloc.get_traced_memory()
+    if rss is not None and start_rss is not None:
+        # Przyrost na godzinę ma sens dopiero po godzinie pracy - wcześniej podawany jest przyrost od startu.
+        growth = f"{(rss - start_rss) / hours / 1024:+.0f} KiB/h od startu" if hours >= 1 else f"{(rss - start_rss) / 1024:+.0f} KiB od startu"
+        if previous_rss is not None:
+            growth += f", {(rss - previous_rss) / 1024:+.0f} KiB od poprzedniego raportu"
+    else:
+        growth = "brak danych o RSS"
+    logger.info(f"Pamięć: RSS {_format_mib(rss)} ({growth}), tracemalloc: bieżąca {_format_mib(current)}, szczyt {_format_mib(peak)}.")
+
+    top_stats = snapshot.compare_to(previous, 'lineno') if previous is not None else snapshot.statistics('lineno')
+    for line in _format_stats(top_stats, TOP_ALLOCATORS):
+        logger.info(f"  {line}")
+    logger.info(f"Rozmiary pamięci podręcznych: {get_cache_sizes()}")
+
+def dump_diff():
+    """Zapisuje do CACHE_DIR różnicę alokacji względem startu i poprzedniego raportu (wywoływane przez SIGUSR1)."""
+    if not tracemalloc.is_tracing():
+        return None
+    snapshot = _take_snapshot()
+    with _lock:
+        baseline, previous = _state['baseline'], _state['previous']
+    dump_path = os.path.join(path_manager.CACHE_DIR, f"memory_diff_{datetime.datetime.now().strftime('%Y%m%d_%H%M%S')}.txt")
+    lines = [f"RSS: {_format_mib(read_rss_bytes())}", f"Rozmiary pamięci podręcznych: {get_cache_sizes()}", ""]
+    lines.append("== Różnica względem startu (traceback) ==")
+    for stat in snapshot.compare_to(baseline, 'traceback')[:TOP_ALLOCATORS]:
+        lines.append(str(stat))
+        lines.extend(f"    {frame}" for frame in stat.traceback.format())
+    if previous is not None:
+        lines.append("")
+        lines.append("== Różnica względem poprzedniego raportu (lineno) ==")
+        lines.extend(_format_stats(snapshot.compare_to(previous, 'lineno'), TOP_ALLOCATORS * 5))
+    try:
+        with open(dump_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+    except OSError as e:
+        logger.error(f"Nie udało się zapisać zrzutu pamięci {dump_path}: {e}")
+        return None
+    logger.info(f"Zapisano różnicę alokacji pamięci w {dump_path}")
+    return dump_path
+
+def _on_sigusr1(signum, frame):
+    # Zrzut jest wykonywany w osobnym wątku, aby nie blokować głównego wątku w obsłudze sygnału.
+    threading.Thread(target=dump_diff, name="MemoryDumpThread", daemon=True).start()
+
+def start():
+    """Włącza śledzenie alokacji, zapamiętuje stan początkowy i rejestruje obsługę SIGUSR1 (wywoływać z głównego wątku)."""
+    tracemalloc.start(TRACEBACK_FRAMES)
+    with _lock:
+        _state['started_at'] = time.monotonic()
+        _state['start_rss'] = read_rss_bytes()
+        _state['baseline'] = _take_snapshot()
+    if hasattr(signal, 'SIGUSR1'):
+        signal.signal(signal.SIGUSR1, _on_sigusr1)
+    logger.info(f"Profilowanie pamięci włączone (RSS: {_format_mib(_state['start_rss'])}, raport co {INTERVAL_MINUTES} min, zrzut różnicy: kill -USR1 {os.getpid()}).")
@@ -0,0 +1,166 @@
+import os
+import time
+import datetime
+import logging
+import tempfile
+import threading
+import functools
+from collections import deque
+from contextlib import contextmanager
+
+from modules.config_loader import config
+from modules import path_manager
+
+logger = logging.getLogger(__name__)
+
+METRICS_CONFIG = config.get('metrics', {})
+ENABLED = METRICS_CONFIG.get('enabled', True)
+# Liczba ostatnich pomiarów każdego etapu, z których liczone są percentyle.
+WINDOW = METRICS_CONFIG.get('window', 200)
+TEXTFILE_PATH = os.path.join(path_manager.CACHE_DIR, 'metrics.prom') if METRICS_CONFIG.get('textfile', True) else None
+TEXTFILE_INTERVAL_MINUTES = METRICS_CONFIG.get('textfile_interval_minutes', 15)
+
+# Granice kubełków histogramu w formacie Prometheus (sekundy).
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_lock = threading.Lock()
+_recent = {}
+_totals = {}
+_local = threading.local()
+_last_textfile_write = {'time': None, 'day': None}
+
+def observe(stage, seconds):
+    """Zapisuje czas trwania etapu w oknie ostatnich pomiarów, histogramie i bieżącym cyklu."""
+    if not ENABLED:
+        return
+    with _lock:
+        recent = _recent.get(stage)
+        if recent is None:
+            recent = _recent[stage] = deque(maxlen=WINDOW)
+            _totals[stage] = {'count': 0, 'sum': 0.0, 'buckets': [0] * len(BUCKETS)}
+        recent.append(seconds)
+        totals = _totals[stage]
+        totals['count'] += 1
+        totals['sum'] += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                totals['buckets'][i] += 1
+    stages = getattr(_local, 'cycle', None)
+    if stages is not None:
+        stages[stage] = stages.get(stage, 0.0) + seconds
+
+@contextmanager
+def timer(stage):
+    """Mierzy czas wykonania bloku jako etap `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+def timed(stage):
+    """Dekorator mierzący czas wykonania funkcji jako etap `stage`."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def instrument_epd(epd):
+    """Mierzy czas transferu SPI (send_data2) i oczekiwania na wyświetlacz (ReadBusy) instancji sterownika."""
+    if ENABLED:
+        epd.send_data2 = timed('epd.spi')(epd.send_data2)
+        epd.ReadBusy = timed('epd.busy')(epd.ReadBusy)
+    return epd
+
+def _format_seconds(seconds):
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.2f}s"
+
+@contextmanager
+def cycle(name):
+    """
+    Grupuje etapy wykonane w tym wątku w jeden cykl. Po jego zakończeniu loguje jednoliniowe
+    podsumowanie i (najwyżej co `textfile_interval_minutes`) zapisuje plik tekstowy z metrykami dla Prometheusa.
+    """
+    if not ENABLED or getattr(_local, 'cycle', None) is not None:
+        yield
+        return
+    _local.cycle = {}
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        total = time.perf_counter() - start
+        stages, _local.cycle = _local.cycle, None
+        observe(f'cycle.{name}', total)
+        breakdown = ', '.join(f"{stage} {_format_seconds(seconds)}" for stage, seconds in stages.items())
+        logger.info(f"Cykl '{name}': {_format_seconds(total)} ({breakdown or 'brak etapów'})")
+        write_textfile_if_due()
+
+def _percentile(sorted_values, fraction):
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+def get_stage_stats():
+    """Zwraca statystyki etapów z okna ostatnich pomiarów (sekundy): liczba, p50, p90, max."""
+    with _lock:
+        recent = {stage: sorted(values) for stage, values in _recent.items()}
+    return {
+        stage: {
+            'count': len(values),
+            'p50': round(_percentile(values, 0.5), 4),
+            'p90': round(_percentile(values, 0.9), 4),
+            'max': round(values[-1], 4)
+        }
+        for stage, values in recent.items() if values
+    }
+
+def render_textfile():
+    """Zwraca metryki w formacie tekstowym Prometheusa (histogram czasu etapów od startu aplikacji)."""
+    with _lock:
+        totals = {stage: {'count': data['count'], 'sum': data['sum'], 'buckets': list(data['buckets'])} for stage, data in _totals.items()}
+    lines = [
+        '# HELP dashboard_stage_seconds Czas trwania etapów cyklu aktualizacji dashboardu.',
+        '# TYPE dashboard_stage_seconds histogram'
+    ]
+    for stage in sorted(totals):
+        data = totals[stage]
+        for bound, count in zip(BUCKETS, data['buckets']):
+            lines.append(f'dashboard_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {count}')
+        lines.append(f'dashboard_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {data["count"]}')
+        lines.append(f'dashboard_stage_seconds_sum{{stage="{stage}"}} {data["sum"]:.6f}')
+        lines.append(f'dashboard_stage_seconds_count{{stage="{stage}"}} {data["count"]}')
+    return '\n'.join(lines) + '\n'
+
+def write_textfile_if_due():
+    """Zapisuje plik metryk, jeśli od ostatniego zapisu minęło `textfile_interval_minutes` lub zmienił się dzień."""
+    with _lock:
+        last_time, last_day = _last_textfile_write['time'], _last_textfile_write['day']
+    if last_time is not None and last_day == datetime.date.today() and time.time() - last_time < TEXTFILE_INTERVAL_MINUTES * 60:
+        return
+    write_textfile()
+
+def write_textfile():
+    """Atomowo zapisuje metryki do pliku tekstowego w CACHE_DIR (np. dla node_exporter textfile collector)."""
+    if not TEXTFILE_PATH:
+        return
+    with _lock:
+        _last_textfile_write.update({'time': time.time(), 'day': datetime.date.today()})
+    directory = os.path.dirname(TEXTFILE_PATH)
+    try:
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(prefix='.metrics.', suffix='.tmp', dir=directory)
+    except OSError as e:
+        logger.warning(f"Nie udało się zapisać pliku metryk {TEXTFILE_PATH}: {e}")
+        return
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(render_textfile())
+        os.replace(tmp_path, TEXTFILE_PATH)
+    except OSError as e:
+        logger.warning(f"Nie udało się zapisać pliku metryk {TEXTFILE_PATH}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
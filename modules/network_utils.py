@@ -1,32 +1,191 @@
 import time
+import random
+import datetime
 import logging
-from functools import wraps
+import threading
 
-def retry(exceptions, tries=3, delay=5, backoff=2, logger=None):
+from modules.config_loader import config
+from modules import scheduling, state_journal, quota
+
+logger = logging.getLogger(__name__)
+
+NETWORK_CONFIG = config.get('network', {})
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+class CircuitBreaker:
     """
-    Decorator do ponawiania próby wykonania funkcji w przypadku wystąpienia określonych wyjątków.
+    Bezpiecznik dla pojedynczego źródła danych.
 
-    :param exceptions: Krotka wyjątków, które mają być przechwytywane.
-    :param tries: Maksymalna liczba prób.
-    :param delay: Początkowe opóźnienie między próbami w sekundach.
-    :param backoff: Mnożnik opóźnienia po każdej kolejnej próbie.
-    :param logger: Logger do zapisywania informacji o ponowieniu próby.
+    Kolejne błędy wydłużają opóźnienie ponowienia (wykładniczo, z losowym rozrzutem).
+    Po `failure_threshold` kolejnych błędach obwód zostaje otwarty i zapytania są
+    natychmiast odrzucane aż do czasu ponowienia, kiedy dopuszczana jest jedna próba (half-open).
     """
-    if logger is None:
-        logger = logging.getLogger(__name__)
-
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            mtries, mdelay = tries, delay
-            while mtries > 1:
-                try:
-                    return func(*args, **kwargs)
-                except exceptions as e:
-                    logger.warning(f"Błąd w '{func.__name__}': {e}. Ponawiam próbę za {mdelay}s... ({tries - mtries + 1}/{tries})")
-                    time.sleep(mdelay)
-                    mtries -= 1
-                    mdelay *= backoff
-            return func(*args, **kwargs) # Ostatnia próba
-        return wrapper
-    return decorator
+
+    def __init__(self, name, failure_threshold=3, retry_base_seconds=10, retry_max_seconds=600):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.retry_base_seconds = retry_base_seconds
+        self.retry_max_seconds = retry_max_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.retry_at = None
+        self.last_success = None
+        self.last_failure = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        """Sprawdza, czy można teraz wykonać zapytanie do źródła."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.time() >= self.retry_at:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._trial_in_progress:
+                self._trial_in_progress = True
+                return True
+            return False
+
+    def record_success(self):
+        """Zamyka obwód po udanym zapytaniu."""
+        with self._lock:
+            self.failures = 0
+            self.retry_at = None
+            self.last_success = time.time()
+            self._trial_in_progress = False
+            self._set_state(CLOSED)
+
+    def record_skipped(self):
+        """Zwalnia próbę half-open, gdy źródło zostało pominięte bez kontaktu z siecią."""
+        with self._lock:
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        """Rejestruje błąd i zwraca opóźnienie (w sekundach) do kolejnej próby."""
+        with self._lock:
+            self.failures += 1
+            self.last_failure = time.time()
+            self._trial_in_progress = False
+            delay = min(self.retry_max_seconds, self.retry_base_seconds * 2 ** (self.failures - 1))
+            delay = random.uniform(delay / 2, delay)
+            self.retry_at = self.last_failure + delay
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self._set_state(OPEN)
+            return delay
+
+    def _set_state(self, state):
+        if state != self.state:
+            logger.info(f"Bezpiecznik '{self.name}': {self.state} -> {state} (kolejne błędy: {self.failures}).")
+            self.state = state
+
+    def get_state(self):
+        """Zwraca bieżący stan bezpiecznika jako słownik."""
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'retry_at': self.retry_at,
+                'last_success': self.last_success,
+                'last_failure': self.last_failure
+            }
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(source):
+    """Zwraca (tworząc w razie potrzeby) bezpiecznik dla źródła danych."""
+    with _breakers_lock:
+        if source not in _breakers:
+            _breakers[source] = CircuitBreaker(
+                source,
+                failure_threshold=NETWORK_CONFIG.get('failure_threshold', 3),
+                retry_base_seconds=NETWORK_CONFIG.get('retry_base_seconds', 10),
+                retry_max_seconds=NETWORK_CONFIG.get('retry_max_seconds', 600)
+            )
+        return _breakers[source]
+
+def _retry_job_id(source):
+    return f'retry_{source}_job'
+
+def run_with_breaker(source, func, args=(), retry_until=None, quota_calls=None):
+    """
+    Wykonuje pojedynczą próbę pobrania danych ze źródła, chronioną bezpiecznikiem.
+
+    `func` zwraca True przy sukcesie, False przy błędzie lub None, gdy źródło zostało
+    pominięte (np. brak konfiguracji). Po błędzie ponowienie jest planowane w harmonogramie
+    zamiast usypiania wątku, ale tylko przed `retry_until` (sekundy epoki najbliższego
+    regularnego pobrania) - później źródło pobierze regularny cykl. Regularne pobranie
+    zastępuje zaplanowane ponowienie. Dla źródeł z limitem zapytań `quota_calls` to liczba
+    zapytań jednego pobrania - ponowienia przechodzą wtedy przez te same limity co regularne
+    pobranie (`quota.is_due`). Zwraca wynik `func` lub False, gdy obwód jest otwarty.
+    """
+    return _attempt(source, func, args, retry_until, quota_calls, regular=True)
+
+def _quota_check(source, quota_calls, last_attempt):
+    """Sprawdza limit zapytań przed ponowieniem. Zwraca (czy_pobrać, odstęp_w_sekundach) lub (True, 0) bez limitu."""
+    if quota_calls is None:
+        return True, 0
+    due, interval = quota.is_due(source, datetime.datetime.fromtimestamp(last_attempt), 0, quota_calls)
+    return due, interval * 60
+
+def _retry(source, func, args, retry_until, quota_calls=None):
+    """Ponowienie po błędzie, pomijane, gdy nadszedł już czas regularnego pobrania lub limit zapytań na to nie pozwala."""
+    if time.time() >= retry_until:
+        logger.info(f"Pomijam ponowienie pobierania '{source}' - regularne pobranie jest już należne.")
+        return False
+    if quota_calls is not None and quota.get_remaining(source) < quota_calls:
+        logger.warning(f"Pomijam ponowienie pobierania '{source}' - dzienny limit zapytań wyczerpany.")
+        return False
+    due, _ = _quota_check(source, quota_calls, get_breaker(source).last_failure or 0)
+    if not due:
+        logger.info(f"Pomijam ponowienie pobierania '{source}' - limit zapytań wymaga dłuższego odstępu.")
+        return False
+    return _attempt(source, func, args, retry_until, quota_calls)
+
+def _attempt(source, func, args, retry_until, quota_calls=None, regular=False):
+    breaker = get_breaker(source)
+    if not breaker.allow_request():
+        retry_in = max(0, (breaker.retry_at or time.time()) - time.time())
+        logger.info(f"Obwód źródła '{source}' jest otwarty. Pomijam pobieranie (kolejna próba za {retry_in:.0f}s).")
+        return False
+    if regular and scheduling.cancel(_retry_job_id(source)):
+        logger.debug(f"Regularne pobieranie '{source}' zastępuje zaplanowane ponowienie.")
+
+    try:
+        result = func(*args)
+    except Exception as e:
+        logger.error(f"Nieoczekiwany błąd podczas pobierania danych '{source}': {e}", exc_info=True)
+        result = False
+
+    if result is None:
+        # Źródło pominięte - nie jest to błąd sieci, więc nie wpływa na stan bezpiecznika.
+        breaker.record_skipped()
+        state_journal.record_fetch(source, state_journal.SKIPPED)
+        return None
+    if result:
+        breaker.record_success()
+        state_journal.record_fetch(source, state_journal.SUCCESS)
+        return result
+
+    state_journal.record_fetch(source, state_journal.FAILURE)
+    delay = breaker.record_failure()
+    if quota_calls is not None and quota.get_remaining(source) < quota_calls:
+        logger.warning(f"Pobieranie danych '{source}' nie powiodło się. Dzienny limit zapytań wyczerpany - bez ponowienia.")
+        return False
+    # Ponowienie zużywa zapytania jak regularne pobranie, więc nie może nastąpić szybciej, niż pozwala limit.
+    delay = max(delay, _quota_check(source, quota_calls, breaker.last_failure)[1])
+    retry_kwargs = {'source': source, 'func': func, 'args': args, 'retry_until': retry_until, 'quota_calls': quota_calls}
+    if retry_until is not None and time.time() + delay < retry_until and scheduling.schedule_once(_retry, delay, _retry_job_id(source), kwargs=retry_kwargs):
+        logger.warning(f"Pobieranie danych '{source}' nie powiodło się. Ponowna próba za {delay:.0f}s.")
+    else:
+        logger.warning(f"Pobieranie danych '{source}' nie powiodło się. Ponowna próba w kolejnym regularnym cyklu.")
+    return False
+
+def get_source_states():
+    """Zwraca stan bezpieczników wszystkich źródeł danych (np. do oznaczania nieaktualnych danych)."""
+    with _breakers_lock:
+        breakers = dict(_breakers)
+    return {source: breaker.get_state() for source, breaker in breakers.items()}
@@ -0,0 +1,96 @@
+import sys
+import argparse
+
+from modules.config_loader import config
+
+# Sposób odświeżania panelu: co minutę (zadanie zegara) lub po zmianie danych, od których zależy.
+MINUTE = 'minute'
+DATA = 'data'
+
+# Rejestr paneli. `data` to zbiory danych z magazynu danych, które panel rysuje (ich zmiana wymaga
+# przerysowania panelu), `sources` to źródła sieciowe, z których te dane pochodzą. Zegar korzysta
+# ze zbioru 'weather' tylko dla wschodu i zachodu słońca, które są liczone lokalnie, więc nie
+# wymaga pobierania AccuWeather. `stale_indicator` określa, czy panel pokazuje ikonę nieaktualnych danych.
+PANELS = {
+    'time': {'data': ('time', 'weather'), 'sources': (), 'cadence': MINUTE, 'stale_indicator': False},
+    'weather_and_air': {'data': ('weather', 'airly'), 'sources': ('accuweather', 'airly'), 'cadence': DATA, 'stale_indicator': True},
+    'events': {'data': ('calendar',), 'sources': ('google_calendar',), 'cadence': DATA, 'stale_indicator': True},
+    'calendar': {'data': ('calendar',), 'sources': ('google_calendar',), 'cadence': DATA, 'stale_indicator': True},
+    'unusual_holiday': {'data': ('calendar',), 'sources': ('google_calendar',), 'cadence': DATA, 'stale_indicator': False}
+}
+
+# Panele rysowane zawsze, niezależnie od ustawienia `enabled` w konfiguracji.
+ALWAYS_ENABLED = ('unusual_holiday',)
+
+def _derive_data_panels():
+    """Odwraca rejestr: zbiór danych -> panele odświeżane po jego zmianie (bez paneli odświeżanych co minutę dla ich własnych danych)."""
+    data_panels = {}
+    for panel, spec in PANELS.items():
+        for name in spec['data']:
+            if spec['cadence'] == MINUTE and name == 'time':
+                continue
+            data_panels.setdefault(name, ())
+            data_panels[name] += (panel,)
+    return data_panels
+
+# Panele, które trzeba przerysować po zmianie danego zbioru danych.
+DATA_PANELS = _derive_data_panels()
+# Źródła, od których zależy aktualność panelu pokazującego wskaźnik nieaktualnych danych.
+STALE_PANEL_SOURCES = {panel: spec['sources'] for panel, spec in PANELS.items() if spec['stale_indicator'] and spec['sources']}
+
+def is_enabled(panel, layout_config=None):
+    """Sprawdza, czy panel jest włączony w konfiguracji layoutu."""
+    if panel in ALWAYS_ENABLED:
+        return True
+    layout_config = config.get('panels', {}) if layout_config is None else layout_config
+    return layout_config.get(panel, {}).get('enabled', True)
+
+def get_enabled_panels(layout_config=None):
+    return [panel for panel in PANELS if is_enabled(panel, layout_config)]
+
+def get_required_sources(layout_config=None):
+    """Zwraca źródła sieciowe, z których korzysta przynajmniej jeden włączony panel."""
+    return {source for panel in get_enabled_panels(layout_config) for source in PANELS[panel]['sources']}
+
+def get_required_data(panels):
+    """Zwraca zbiory danych potrzebne do narysowania podanych paneli."""
+    return {name for panel in panels for name in PANELS[panel]['data']}
+
+def get_panels_with_cadence(cadence):
+    return {panel for panel, spec in PANELS.items() if spec['cadence'] == cadence}
+
+def describe(layout_config=None):
+    """Zwraca graf zależności jako listę wierszy tekstu: źródło -> dane -> panel (z kadencją i stanem)."""
+    lines = []
+    for panel, spec in PANELS.items():
+        state = 'włączony' if is_enabled(panel, layout_config) else 'wyłączony'
+        sources = ', '.join(spec['sources']) or 'lokalne'
+        lines.append(f"{panel} ({state}, odświeżanie: {spec['cadence']}): dane {', '.join(spec['data'])}; źródła: {sources}")
+    lines.append(f"Pobierane źródła: {', '.join(sorted(get_required_sources(layout_config))) or 'brak'}")
+    return lines
+
+def to_dot(layout_config=None):
+    """Zwraca graf zależności w formacie Graphviz DOT (wyłączone panele są szare)."""
+    lines = ['digraph panels {', '  rankdir=LR;']
+    for panel, spec in PANELS.items():
+        style = '' if is_enabled(panel, layout_config) else ', style=dashed, color=gray'
+        lines.append(f'  "panel:{panel}" [shape=box, label="{panel}\\n({spec["cadence"]})"{style}];')
+        for name in spec['data']:
+            lines.append(f'  "data:{name}" -> "panel:{panel}";')
+        for source in spec['sources']:
+            lines.append(f'  "source:{source}" -> "panel:{panel}" [style=dotted];')
+    lines.append('}')
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Graf zależności paneli od danych i źródeł")
+    parser.add_argument('--dot', action='store_true', help='Wypisuje graf w formacie Graphviz DOT.')
+    args = parser.parse_args()
+    if args.dot:
+        sys.stdout.write(to_dot() + '\n')
+        return
+    for line in describe():
+        print(line)
+
+if __name__ == '__main__':
+    main()
@@ -3,8 +3,8 @@ import textwrap
 import datetime
 from modules import drawing_utils
 
-def draw_panel(draw, calendar_data, fonts, box_info):
-    """Rysuje siatkę kalendarza."""
+def draw_panel(draw, month_grid, fonts, box_info):
+    """Rysuje siatkę kalendarza (krotki `CalendarDay` z modułu calendar_grid)."""
     logging.debug(f"Rysowanie panelu kalendarza w obszarze: {box_info['rect']}")
     rect = box_info['rect']
 
@@ -20,7 +20,6 @@ def draw_panel(draw, calendar_data, fonts, box_info):
     font_cal_day = fonts.get('calendar_day')
 
     # --- Przygotowanie siatki kalendarza ---
-    month_grid = calendar_data.get('month_calendar', [])
     grid_height = (len(month_grid) + 1) * cell_height if month_grid else 0
 
     # --- Wyśrodkowanie pionowe siatki ---
@@ -45,28 +44,26 @@ def draw_panel(draw, calendar_data, fonts, box_info):
 
     # --- Rysowanie Siatki Kalendarza ---
     if month_grid:
+        today = datetime.date.today()
         grid_body_y_start = grid_y_start + cell_height
         for week_idx, week in enumerate(month_grid):
             for day_idx, day_info in enumerate(week):
-                day_str = str(day_info.get('day', ''))
+                day_str = str(day_info.day)
                 cell_x = grid_x_start + (day_idx * cell_width)
                 cell_y = grid_body_y_start + (week_idx * cell_height)
 
-                is_today = day_info.get('is_today', False)
-                is_holiday = day_info.get('is_holiday', False)
-                has_event = day_info.get('has_event', False)
-                day_date_str = day_info.get('date')
-                day_date = None
-                if day_date_str:
-                    day_date = datetime.date.fromisoformat(day_date_str)
+                is_today = day_info.is_today
+                is_holiday = day_info.is_holiday
+                has_event = day_info.has_event
+                day_date = day_info.date
 
                 text_x = cell_x + cell_width // 2
                 text_y = cell_y + cell_height // 2
                 current_font = fonts['calendar_header'] if is_today else font_cal_day
                 
-                is_upcoming_holiday = is_holiday and day_date and day_date >= datetime.date.today()
+                is_upcoming_holiday = is_holiday and day_date >= today
 
-                if day_info.get('is_current_month'):
+                if day_info.is_current_month:
                     if has_event or is_upcoming_holiday:
                         # Black square, white text
                         draw.rectangle((cell_x, cell_y, cell_x + cell_width, cell_y + cell_height), fill=drawing_utils.BLACK)
@@ -76,7 +73,7 @@ def draw_panel(draw, calendar_data, fonts, box_info):
                         text_color = drawing_utils.BLACK # Default
                         if is_holiday: # Past holiday
                             text_color = drawing_utils.DARK_GRAY
-                        elif day_date and day_date < datetime.date.today(): # Past day
+                        elif day_date < today: # Past day
                             text_color = drawing_utils.LIGHT_GRAY
                         
                         draw.text((text_x, text_y), day_str, font=current_font, fill=text_color, anchor="mm")
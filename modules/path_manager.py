@@ -3,6 +3,8 @@ import logging
 
 from modules.config_loader import config
 
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 def _find_best_base_dir():
     preferred_dirs = [f'/tmp', '/opt']
     for dir_path in preferred_dirs:
@@ -10,8 +12,7 @@ def _find_best_base_dir():
             logging.debug(f"Znaleziono odpowiedni katalog bazowy w RAM: {dir_path}")
             return dir_path
 
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    fallback_dir = os.path.join(project_root, 'tmp')
+    fallback_dir = os.path.join(_PROJECT_ROOT, 'tmp')
     logging.warning(f"Nie znaleziono standardowego katalogu w RAM. Używam lokalnego katalogu awaryjnego: {fallback_dir}")
     return fallback_dir
 
@@ -19,4 +20,7 @@ _BASE_RAM_DIR = _find_best_base_dir()
 
 CACHE_DIR = os.path.join(_BASE_RAM_DIR, config['app']['cache_dir'])
 
-RUNTIME_ASSETS_DIR = os.path.join(CACHE_DIR, 'assets')
\ No newline at end of file
+RUNTIME_ASSETS_DIR = os.path.join(CACHE_DIR, 'assets')
+
+# Katalog trwałego stanu na karcie SD (ścieżka względna liczona od katalogu projektu) - w przeciwieństwie do CACHE_DIR przetrwa restart systemu.
+STATE_DIR = os.path.join(_PROJECT_ROOT, config['app'].get('state_dir', 'state'))
\ No newline at end of file
@@ -0,0 +1,112 @@
+import os
+import json
+import logging
+import calendar
+import datetime
+import threading
+
+from modules.config_loader import config
+from modules import path_manager, json_writer
+
+logger = logging.getLogger(__name__)
+
+HOLIDAYS_PATH = os.path.join(path_manager.CACHE_DIR, 'polish_holidays.json')
+
+# 'local' - tylko obliczone święta (bez zapytania do API), 'api' - tylko kalendarz świąt Google,
+# 'merge' - suma obu źródeł.
+HOLIDAY_SOURCE = config.get('google_calendar', {}).get('holiday_source', 'merge')
+
+FIXED_HOLIDAYS = {
+    (1, 1): 'Nowy Rok',
+    (1, 6): 'Święto Trzech Króli',
+    (5, 1): 'Święto Pracy',
+    (5, 3): 'Święto Konstytucji 3 Maja',
+    (8, 15): 'Wniebowzięcie Najświętszej Maryi Panny',
+    (11, 1): 'Wszystkich Świętych',
+    (11, 11): 'Narodowe Święto Niepodległości',
+    (12, 25): 'Boże Narodzenie (pierwszy dzień)',
+    (12, 26): 'Boże Narodzenie (drugi dzień)'
+}
+
+# Święta ruchome jako przesunięcie (w dniach) względem Niedzieli Wielkanocnej.
+EASTER_HOLIDAYS = {
+    0: 'Wielkanoc',
+    1: 'Poniedziałek Wielkanocny',
+    49: 'Zielone Świątki',
+    60: 'Boże Ciało'
+}
+
+_tables = {}
+_lock = threading.Lock()
+
+def easter_sunday(year):
+    """Zwraca datę Niedzieli Wielkanocnej w kalendarzu gregoriańskim (algorytm Meeusa/Jonesa/Butchera)."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+def compute_holidays(year):
+    """Oblicza ustawowe dni wolne od pracy w Polsce dla danego roku jako słownik {data ISO: nazwa}."""
+    holidays = {datetime.date(year, month, day): name for (month, day), name in FIXED_HOLIDAYS.items()}
+    if year >= 2025:
+        holidays[datetime.date(year, 12, 24)] = 'Wigilia Bożego Narodzenia'
+    easter = easter_sunday(year)
+    for offset, name in EASTER_HOLIDAYS.items():
+        holidays[easter + datetime.timedelta(days=offset)] = name
+    return {day.isoformat(): holidays[day] for day in sorted(holidays)}
+
+def _get_table(year):
+    """Zwraca tabelę świąt dla roku z pamięci, z pliku w CACHE_DIR lub obliczając ją na nowo."""
+    with _lock:
+        if year in _tables:
+            return _tables[year]
+
+        try:
+            with open(HOLIDAYS_PATH, 'r', encoding='utf-8') as f:
+                stored_tables = json.load(f)
+        except (IOError, json.JSONDecodeError):
+            stored_tables = {}
+
+        table = stored_tables.get(str(year))
+        if table is None:
+            table = compute_holidays(year)
+            stored_tables[str(year)] = table
+            try:
+                json_writer.write_json(HOLIDAYS_PATH, stored_tables)
+                logger.info(f"Zapisano tabelę świąt na rok {year} w {HOLIDAYS_PATH}")
+            except OSError as e:
+                logger.warning(f"Nie udało się zapisać tabeli świąt: {e}")
+        _tables[year] = table
+        return table
+
+def get_holiday_dates(first_day, last_day):
+    """Zwraca posortowaną listę dat świąt (ISO) z przedziału [first_day, last_day]."""
+    first_iso, last_iso = first_day.isoformat(), last_day.isoformat()
+    return [
+        day_iso
+        for year in range(first_day.year, last_day.year + 1)
+        for day_iso in _get_table(year)
+        if first_iso <= day_iso <= last_iso
+    ]
+
+def merge_holiday_dates(api_holiday_dates, today=None):
+    """
+    Łączy święta z API ze świętami obliczonymi lokalnie dla bieżącego miesiąca,
+    zgodnie z ustawieniem `holiday_source`.
+    """
+    if HOLIDAY_SOURCE == 'api':
+        return list(api_holiday_dates)
+    today = today or datetime.date.today()
+    _, num_days = calendar.monthrange(today.year, today.month)
+    local_dates = get_holiday_dates(today.replace(day=1), today.replace(day=num_days))
+    if HOLIDAY_SOURCE == 'local':
+        return local_dates
+    return sorted(set(local_dates) | set(api_holiday_dates))
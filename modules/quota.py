@@ -0,0 +1,156 @@
+import logging
+import datetime
+import threading
+
+from modules.config_loader import config
+from modules import state_journal
+
+logger = logging.getLogger(__name__)
+
+QUOTA_CONFIG = config.get('quota', {})
+
+# Dzienne limity zapytań dostawców (darmowe plany) i liczba zapytań zostawiana w rezerwie.
+DEFAULT_BUDGETS = {
+    'accuweather': {'daily_limit': 50, 'reserve': 4},
+    'airly': {'daily_limit': 100, 'reserve': 5}
+}
+
+# Nagłówki z limitami wysyłane przez dostawców: (limit dzienny, pozostało dzisiaj).
+RATE_LIMIT_HEADERS = {
+    'airly': ('x-ratelimit-limit-day', 'x-ratelimit-remaining-day'),
+    'accuweather': ('ratelimit-limit', 'ratelimit-remaining')
+}
+MINUTE_LIMIT_HEADERS = {
+    'airly': ('x-ratelimit-limit-minute', 'x-ratelimit-remaining-minute')
+}
+
+WAKING_HOURS = QUOTA_CONFIG.get('waking_hours', [6, 23])
+NIGHT_WEIGHT = QUOTA_CONFIG.get('night_weight', 0.25)
+
+_lock = threading.Lock()
+_state = {}
+
+def _budget(provider):
+    budget = dict(DEFAULT_BUDGETS.get(provider, {'daily_limit': 100, 'reserve': 0}))
+    budget.update(QUOTA_CONFIG.get(provider, {}))
+    return budget
+
+def _get_state(provider, today):
+    """Zwraca stan dostawcy na dany dzień (wymaga trzymania blokady)."""
+    state = _state.get(provider)
+    if state is None or state['date'] != today:
+        if state is not None:
+            logger.info(f"Zapytania do '{provider}' w dniu {state['date']}: {state['calls']}.")
+        state = {'date': today, 'calls': 0, 'header_limit': None, 'header_remaining': None, 'minute_remaining': None}
+        _state[provider] = state
+    return state
+
+def _read_int_header(headers, name):
+    """Odczytuje liczbowy nagłówek bez rozróżniania wielkości liter."""
+    for key, value in headers.items():
+        if key.lower() == name:
+            try:
+                return int(value)
+            except (TypeError, ValueError):
+                return None
+    return None
+
+def record_call(provider, headers=None):
+    """Rejestruje wykonane zapytanie do API i odczytuje limity z nagłówków odpowiedzi."""
+    with _lock:
+        state = _get_state(provider, datetime.date.today())
+        state['calls'] += 1
+        limit_header, remaining_header = RATE_LIMIT_HEADERS.get(provider, (None, None))
+        if headers and limit_header:
+            state['header_limit'] = _read_int_header(headers, limit_header) or state['header_limit']
+            remaining = _read_int_header(headers, remaining_header)
+            if remaining is not None:
+                state['header_remaining'] = remaining
+        if headers and provider in MINUTE_LIMIT_HEADERS:
+            state['minute_remaining'] = _read_int_header(headers, MINUTE_LIMIT_HEADERS[provider][1])
+    _save_state()
+
+def _save_state():
+    """Zapisuje dzisiejsze liczniki zapytań w dzienniku stanu, aby restart nie zerował budżetu."""
+    with _lock:
+        exported = {provider: dict(state, date=state['date'].isoformat()) for provider, state in _state.items()}
+    state_journal.update_section('quota', exported)
+
+def restore_state():
+    """Odtwarza dzisiejsze liczniki zapytań z dziennika stanu."""
+    today = datetime.date.today()
+    with _lock:
+        for provider, saved_state in state_journal.get_section('quota').items():
+            try:
+                saved_date = datetime.date.fromisoformat(saved_state['date'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if saved_date == today:
+                _state[provider] = dict(saved_state, date=saved_date)
+                logger.info(f"Odtworzono licznik zapytań '{provider}': {saved_state['calls']} dzisiaj.")
+
+def get_remaining(provider):
+    """Zwraca liczbę zapytań, które można jeszcze dzisiaj wykonać (po odjęciu rezerwy)."""
+    budget = _budget(provider)
+    with _lock:
+        state = _get_state(provider, datetime.date.today())
+        remaining = budget['daily_limit'] - state['calls']
+        if state['header_remaining'] is not None:
+            remaining = min(remaining, state['header_remaining'])
+        if state['minute_remaining'] == 0:
+            return 0
+    return max(0, remaining - budget['reserve'])
+
+def _hour_weight(hour):
+    """Waga godziny przy rozkładaniu zapytań: pełna w godzinach aktywności, mniejsza w nocy."""
+    return 1.0 if WAKING_HOURS[0] <= hour < WAKING_HOURS[1] else NIGHT_WEIGHT
+
+def _weighted_minutes_left(now):
+    """Zwraca ważoną liczbę minut pozostałych do północy."""
+    midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+    total = 0.0
+    current = now
+    while current < midnight:
+        hour_end = min(midnight, current.replace(minute=0, second=0, microsecond=0) + datetime.timedelta(hours=1))
+        total += (hour_end - current).total_seconds() / 60 * _hour_weight(current.hour)
+        current = hour_end
+    return total
+
+def get_interval_minutes(provider, calls_per_fetch=1, now=None):
+    """
+    Wyznacza odstęp między pobraniami, który rozkłada pozostałe dzisiaj zapytania do końca dnia,
+    z większą częstotliwością w godzinach aktywności.
+    """
+    now = now or datetime.datetime.now()
+    fetches_left = get_remaining(provider) / calls_per_fetch
+    if fetches_left < 1:
+        midnight = datetime.datetime.combine(now.date() + datetime.timedelta(days=1), datetime.time.min)
+        return (midnight - now).total_seconds() / 60
+    return _weighted_minutes_left(now) / fetches_left / _hour_weight(now.hour)
+
+def is_due(provider, last_fetch, min_interval_minutes, calls_per_fetch=1, now=None):
+    """
+    Sprawdza, czy można już pobrać dane dostawcy. Zwraca (czy_pobrać, odstęp_w_minutach).
+    Odstęp nie jest krótszy niż skonfigurowany `min_interval_minutes`.
+    """
+    now = now or datetime.datetime.now()
+    if get_remaining(provider) < calls_per_fetch:
+        return False, get_interval_minutes(provider, calls_per_fetch, now)
+    interval = max(min_interval_minutes, get_interval_minutes(provider, calls_per_fetch, now))
+    return now - last_fetch >= datetime.timedelta(minutes=interval), interval
+
+def get_quota_metrics():
+    """Zwraca liczniki zapytań: wykonane dzisiaj, pozostałe, limit oraz bieżący odstęp między pobraniami."""
+    metrics = {}
+    for provider in DEFAULT_BUDGETS:
+        budget = _budget(provider)
+        remaining = get_remaining(provider)
+        with _lock:
+            state = dict(_get_state(provider, datetime.date.today()))
+        metrics[provider] = {
+            'calls_today': state['calls'],
+            'remaining': remaining,
+            'daily_limit': state['header_limit'] or budget['daily_limit'],
+            'interval_minutes': round(get_interval_minutes(provider), 1)
+        }
+    return metrics
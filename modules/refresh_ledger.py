@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import datetime
+import functools
+import threading
+
+from modules.config_loader import config
+from modules import path_manager, json_writer
+
+logger = logging.getLogger(__name__)
+
+LEDGER_PATH = os.path.join(path_manager.CACHE_DIR, 'refresh_ledger.json')
+KEEP_DAYS = config.get('refresh_ledger', {}).get('keep_days', 90)
+SAVE_INTERVAL_MINUTES = config.get('refresh_ledger', {}).get('save_interval_minutes', 30)
+
+FULL = 'full'
+PARTIAL = 'partial'
+CLEAR = 'clear'
+
+# Komendy sterownika wybierające płaszczyznę pamięci RAM wyświetlacza, do której trafiają dane.
+RAM_PLANES = {0x10: 'old', 0x13: 'new'}
+
+_lock = threading.Lock()
+_ledger = None
+_last_save = {'time': None, 'day': None}
+
+def _empty_day():
+    return {
+        FULL: 0, PARTIAL: 0, CLEAR: 0,
+        'bytes': {plane: 0 for plane in RAM_PLANES.values()},
+        'partial_area_px': 0,
+        'busy_seconds': 0.0
+    }
+
+def _load_locked():
+    """Wczytuje dziennik odświeżeń z pliku przy pierwszym użyciu (wymaga trzymania blokady)."""
+    global _ledger
+    if _ledger is None:
+        try:
+            with open(LEDGER_PATH, 'r', encoding='utf-8') as f:
+                _ledger = json.load(f)
+        except FileNotFoundError:
+            _ledger = {}
+        except (IOError, json.JSONDecodeError) as e:
+            logger.warning(f"Nie można odczytać dziennika odświeżeń {LEDGER_PATH}: {e}. Zaczynam od pustego dziennika.")
+            _ledger = {}
+        _ledger.setdefault('days', {})
+        _ledger.setdefault('partial_area_since_full', 0)
+    return _ledger
+
+def _today_locked():
+    days = _load_locked()['days']
+    today = datetime.date.today().isoformat()
+    if today not in days:
+        days[today] = _empty_day()
+        for old_day in sorted(days)[:-KEEP_DAYS]:
+            del days[old_day]
+    return days[today]
+
+def _record(refresh_type=None, plane=None, byte_count=0, partial_area=0, busy_seconds=0.0):
+    with _lock:
+        day = _today_locked()
+        if refresh_type:
+            day[refresh_type] += 1
+            if refresh_type in (FULL, CLEAR):
+                _ledger['partial_area_since_full'] = 0
+        if plane:
+            day['bytes'][plane] += byte_count
+        if partial_area:
+            day['partial_area_px'] += partial_area
+            _ledger['partial_area_since_full'] += partial_area
+        day['busy_seconds'] = round(day['busy_seconds'] + busy_seconds, 3)
+
+def save():
+    """Zapisuje dzienne sumy do pliku w CACHE_DIR (np. przy zamknięciu aplikacji)."""
+    with _lock:
+        ledger = _load_locked()
+        try:
+            json_writer.write_json(LEDGER_PATH, ledger)
+        except OSError as e:
+            logger.error(f"Nie udało się zapisać dziennika odświeżeń: {e}")
+            return
+        _last_save.update({'time': time.time(), 'day': datetime.date.today()})
+
+def save_if_due():
+    """
+    Zapisuje dziennik po odświeżeniu wyświetlacza, ale nie częściej niż co `save_interval_minutes`.
+    Po zmianie dnia zapis następuje od razu, aby sumy z poprzedniego dnia trafiły do pliku.
+    """
+    with _lock:
+        last_time, last_day = _last_save['time'], _last_save['day']
+    if last_time is not None and last_day == datetime.date.today() and time.time() - last_time < SAVE_INTERVAL_MINUTES * 60:
+        return
+    save()
+
+def instrument_epd(epd):
+    """
+    Podpina liczniki pod instancję sterownika: rodzaje odświeżeń, bajty wysłane do każdej
+    płaszczyzny RAM, pole częściowych aktualizacji i czas oczekiwania na wyświetlacz (ReadBusy).
+    """
+    state = {'plane': None}
+    send_command, send_data2, read_busy = epd.send_command, epd.send_data2, epd.ReadBusy
+    display, display_partial, clear = epd.display, epd.display_Partial, epd.Clear
+
+    @functools.wraps(send_command)
+    def counted_send_command(command):
+        state['plane'] = RAM_PLANES.get(command)
+        return send_command(command)
+
+    @functools.wraps(send_data2)
+    def counted_send_data2(data):
+        _record(plane=state['plane'], byte_count=len(data))
+        return send_data2(data)
+
+    @functools.wraps(read_busy)
+    def counted_read_busy():
+        start = time.perf_counter()
+        try:
+            return read_busy()
+        finally:
+            _record(busy_seconds=time.perf_counter() - start)
+
+    @functools.wraps(display)
+    def counted_display(image):
+        _record(FULL)
+        return display(image)
+
+    @functools.wraps(display_partial)
+    def counted_display_partial(image, x_start, y_start, x_end, y_end):
+        _record(PARTIAL, partial_area=max(0, x_end - x_start) * max(0, y_end - y_start))
+        return display_partial(image, x_start, y_start, x_end, y_end)
+
+    @functools.wraps(clear)
+    def counted_clear():
+        _record(CLEAR)
+        return clear()
+
+    epd.send_command = counted_send_command
+    epd.send_data2 = counted_send_data2
+    epd.ReadBusy = counted_read_busy
+    epd.display = counted_display
+    epd.display_Partial = counted_display_partial
+    epd.Clear = counted_clear
+    return epd
+
+def get_day(day=None):
+    """Zwraca liczniki odświeżeń z danego dnia (domyślnie dzisiaj)."""
+    day_iso = (day or datetime.date.today()).isoformat()
+    with _lock:
+        return json.loads(json.dumps(_load_locked()['days'].get(day_iso, _empty_day())))
+
+def get_partial_area_since_full():
+    """Zwraca łączne pole (w pikselach) częściowych aktualizacji od ostatniego pełnego odświeżenia."""
+    with _lock:
+        return _load_locked()['partial_area_since_full']
+
+def get_days(limit=None):
+    """Zwraca słownik {data ISO: liczniki} z ostatnich `limit` dni (domyślnie wszystkich)."""
+    with _lock:
+        days = json.loads(json.dumps(_load_locked()['days']))
+    selected = sorted(days)[-limit:] if limit else sorted(days)
+    return {day: days[day] for day in selected}
+
+def format_day(day, counters):
+    """Zwraca jednoliniowy opis liczników odświeżeń z jednego dnia."""
+    return (f"{day}: pełne {counters[FULL]}, częściowe {counters[PARTIAL]}, Clear {counters[CLEAR]}, "
+            f"bajty old/new {counters['bytes']['old'] / 1024:.0f}/{counters['bytes']['new'] / 1024:.0f} KiB, "
+            f"pole częściowe {counters['partial_area_px']} px, BUSY {counters['busy_seconds']:.1f}s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Dziennik odświeżeń wyświetlacza (zużycie panelu)")
+    parser.add_argument('--days', type=int, default=7, help='Liczba ostatnich dni do wyświetlenia (0 = wszystkie).')
+    parser.add_argument('--json', action='store_true', help='Wypisuje dane w formacie JSON.')
+    args = parser.parse_args()
+
+    days = get_days(args.days or None)
+    if args.json:
+        json.dump({'days': days, 'partial_area_since_full': get_partial_area_since_full()}, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+        return
+    if not days:
+        print(f"Brak danych w {LEDGER_PATH}.")
+        return
+    for day, counters in days.items():
+        print(format_day(day, counters))
+    print(f"Pole częściowych aktualizacji od ostatniego pełnego odświeżenia: {get_partial_area_since_full()} px")
+
+if __name__ == '__main__':
+    main()
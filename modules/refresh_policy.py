@@ -0,0 +1,99 @@
+import logging
+import datetime
+import threading
+
+from modules.config_loader import config
+
+logger = logging.getLogger(__name__)
+
+POLICY_CONFIG = config.get('refresh_policy', {})
+
+# Ustawienia obowiązujące poza zdefiniowanymi okresami (dotychczasowe zachowanie).
+DEFAULT_PERIOD = {
+    'name': 'day',
+    'clock_minutes': 1,
+    'update_every_hours': 1,
+    'render_on_data_change': True
+}
+
+_stats_lock = threading.Lock()
+_stats = {'date': None, 'counts': {}}
+
+def _parse_time(value):
+    """Zamienia napis 'HH:MM' na obiekt datetime.time."""
+    hour, minute = (int(part) for part in str(value).split(':'))
+    return datetime.time(hour, minute)
+
+def _load_periods():
+    """Wczytuje okresy doby z konfiguracji, uzupełniając brakujące ustawienia wartościami domyślnymi."""
+    periods = []
+    for period_config in POLICY_CONFIG.get('periods', []):
+        period = dict(DEFAULT_PERIOD)
+        period.update(period_config)
+        period['start'] = _parse_time(period_config['start'])
+        period['end'] = _parse_time(period_config['end'])
+        periods.append(period)
+    return periods
+
+PERIODS = _load_periods()
+WAKE_UP_REFRESH = _parse_time(POLICY_CONFIG['wake_up_refresh']) if POLICY_CONFIG.get('wake_up_refresh') else None
+
+def _in_period(period, now_time):
+    """Sprawdza, czy godzina należy do okresu (okres może przechodzić przez północ)."""
+    if period['start'] <= period['end']:
+        return period['start'] <= now_time < period['end']
+    return now_time >= period['start'] or now_time < period['end']
+
+def get_active_period(now=None):
+    """Zwraca ustawienia okresu doby obowiązującego w danej chwili."""
+    now_time = (now or datetime.datetime.now()).time()
+    for period in PERIODS:
+        if _in_period(period, now_time):
+            return period
+    return DEFAULT_PERIOD
+
+def is_clock_due(now=None):
+    """Sprawdza, czy w tej minucie należy odświeżyć zegar (0 minut = zegar zamrożony)."""
+    now = now or datetime.datetime.now()
+    clock_minutes = get_active_period(now)['clock_minutes']
+    return bool(clock_minutes) and (now.hour * 60 + now.minute) % clock_minutes == 0
+
+def is_update_due(now=None):
+    """Sprawdza, czy o tej godzinie należy wykonać cogodzinną aktualizację danych i ekranu."""
+    now = now or datetime.datetime.now()
+    update_every_hours = get_active_period(now)['update_every_hours']
+    return bool(update_every_hours) and now.hour % update_every_hours == 0
+
+def allows_data_change_render(now=None):
+    """Sprawdza, czy zmiany danych mogą wywołać osobne przerysowanie ekranu."""
+    return get_active_period(now)['render_on_data_change']
+
+def record(event):
+    """Zlicza zdarzenie odświeżania (np. 'clock', 'clock_skipped', 'update', 'data_change') w bieżącym dniu."""
+    today = datetime.date.today()
+    with _stats_lock:
+        if _stats['date'] != today:
+            if _stats['date'] is not None:
+                logger.info(f"Statystyki odświeżania za {_stats['date']}: {_stats['counts']}")
+            _stats['date'] = today
+            _stats['counts'] = {}
+        _stats['counts'][event] = _stats['counts'].get(event, 0) + 1
+
+def get_daily_stats():
+    """Zwraca liczniki zdarzeń odświeżania w bieżącym dniu."""
+    with _stats_lock:
+        return {'date': _stats['date'], 'counts': dict(_stats['counts'])}
+
+def describe():
+    """Zwraca opis skonfigurowanych okresów doby do logów."""
+    if not PERIODS:
+        return "brak okresów (zegar co minutę, aktualizacja co godzinę)"
+    descriptions = [
+        f"{period['name']} {period['start'].strftime('%H:%M')}-{period['end'].strftime('%H:%M')}: "
+        f"zegar {'zamrożony' if not period['clock_minutes'] else 'co ' + str(period['clock_minutes']) + ' min'}, "
+        f"aktualizacja co {period['update_every_hours']} h"
+        for period in PERIODS
+    ]
+    if WAKE_UP_REFRESH:
+        descriptions.append(f"pełne odświeżenie o {WAKE_UP_REFRESH.strftime('%H:%M')}")
+    return '; '.join(descriptions)
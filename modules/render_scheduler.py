@@ -0,0 +1,125 @@
+import time
+import logging
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+from modules.config_loader import config
+from modules import data_store, scheduling, refresh_policy, panel_registry
+
+logger = logging.getLogger(__name__)
+
+# Panele, które trzeba przerysować po zmianie danego zbioru danych (z rejestru paneli).
+# Dane czasu nie są tu uwzględnione - zegar odświeża zadanie minutowe.
+SOURCE_PANELS = panel_registry.DATA_PANELS
+
+COALESCE_SECONDS = config.get('display', {}).get('change_coalesce_seconds', 5)
+JOB_ID = 'data_change_render_job'
+
+_lock = threading.Lock()
+_pending = {}
+_hold_depth = 0
+_flush_scheduled = False
+_render_callback = None
+_latencies = deque(maxlen=500)
+
+def start(render_callback):
+    """
+    Włącza przerysowywanie sterowane zmianami danych.
+    `render_callback(panels)` musi przerysować i wyświetlić wskazane panele.
+    """
+    global _render_callback
+    _render_callback = render_callback
+    data_store.subscribe(_on_data_changed)
+    logger.info(f"Włączono przerysowywanie paneli po zmianie danych (okno łączenia: {COALESCE_SECONDS}s).")
+
+def _on_data_changed(name, version, changed_at):
+    """Dodaje panele zależne od zmienionych danych do zbioru oczekujących i planuje ich przerysowanie."""
+    panels = [panel for panel in SOURCE_PANELS.get(name, ()) if panel_registry.is_enabled(panel)]
+    if not panels:
+        return
+    with _lock:
+        for panel in panels:
+            _pending.setdefault(panel, changed_at)
+        logger.debug(f"Zmiana danych '{name}' (wersja {version}). Oczekujące panele: {sorted(_pending)}")
+        if _hold_depth == 0:
+            _schedule_flush_locked()
+
+def _schedule_flush_locked():
+    """
+    Planuje jedno, połączone przerysowanie (wymaga trzymania blokady). Gdy polityka odświeżania
+    na to nie pozwala (np. w nocy), zmiany czekają na najbliższe odświeżenie zegara lub aktualizację.
+    """
+    global _flush_scheduled
+    if _flush_scheduled or _render_callback is None or not _pending:
+        return
+    if not refresh_policy.allows_data_change_render():
+        logger.debug("Polityka odświeżania wstrzymuje przerysowanie po zmianie danych.")
+        return
+    _flush_scheduled = scheduling.schedule_once(_flush, COALESCE_SECONDS, JOB_ID)
+
+@contextmanager
+def hold():
+    """
+    Wstrzymuje planowanie przerysowań, np. na czas pobierania danych przed pełnym odświeżeniem.
+    Zmiany zgłoszone w tym czasie nie są tracone.
+    """
+    global _hold_depth
+    with _lock:
+        _hold_depth += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _hold_depth -= 1
+            if _hold_depth == 0:
+                _schedule_flush_locked()
+
+def take_pending():
+    """Zwraca i czyści oczekujące panele jako słownik {panel: czas_zmiany}."""
+    with _lock:
+        pending = dict(_pending)
+        _pending.clear()
+    return pending
+
+def record_displayed(pending, displayed_at=None):
+    """Zapisuje opóźnienie od zmiany danych do pojawienia się ich na ekranie."""
+    if not pending:
+        return
+    displayed_at = displayed_at or time.time()
+    latency = displayed_at - min(pending.values())
+    with _lock:
+        _latencies.append(latency)
+    logger.info(f"Opóźnienie od zmiany danych do ekranu: {latency:.1f}s (panele: {', '.join(sorted(pending))}).")
+
+def get_latency_stats():
+    """Zwraca statystyki opóźnienia zmiana danych -> ekran (w sekundach)."""
+    with _lock:
+        if not _latencies:
+            return {'count': 0}
+        last = _latencies[-1]
+        latencies = sorted(_latencies)
+    return {
+        'count': len(latencies),
+        'avg': sum(latencies) / len(latencies),
+        'p50': latencies[len(latencies) // 2],
+        'max': latencies[-1],
+        'last': last
+    }
+
+def _flush():
+    """Przerysowuje wszystkie oczekujące panele jednym odświeżeniem ekranu."""
+    global _flush_scheduled
+    with _lock:
+        _flush_scheduled = False
+    pending = take_pending()
+    if not pending:
+        logger.debug("Brak oczekujących paneli - zmiany zostały już wyświetlone.")
+        return
+    logger.info(f"Przerysowywanie paneli po zmianie danych: {', '.join(sorted(pending))}")
+    try:
+        _render_callback(set(pending))
+        refresh_policy.record('data_change')
+        record_displayed(pending)
+    except Exception as e:
+        logger.error(f"Błąd podczas przerysowywania paneli po zmianie danych: {e}", exc_info=True)
@@ -0,0 +1,44 @@
+import logging
+import datetime
+
+logger = logging.getLogger(__name__)
+
+# Harmonogram aplikacji (APScheduler) udostępniany modułom, które planują zadania jednorazowe.
+_scheduler = None
+
+def set_scheduler(scheduler):
+    """Rejestruje harmonogram używany do planowania zadań jednorazowych."""
+    global _scheduler
+    _scheduler = scheduler
+
+def get_scheduler():
+    """Zwraca zarejestrowany harmonogram lub None, jeśli aplikacja jeszcze go nie utworzyła."""
+    return _scheduler
+
+def schedule_once(func, delay_seconds, job_id, kwargs=None):
+    """
+    Planuje jednorazowe wykonanie funkcji za `delay_seconds` sekund.
+    Zadanie o tym samym `job_id` jest zastępowane. Zwraca False, gdy harmonogram nie jest dostępny.
+    """
+    if _scheduler is None:
+        logger.debug(f"Brak harmonogramu. Nie zaplanowano zadania '{job_id}'.")
+        return False
+    run_date = datetime.datetime.now() + datetime.timedelta(seconds=delay_seconds)
+    _scheduler.add_job(func, 'date', run_date=run_date, id=job_id, kwargs=kwargs or {}, replace_existing=True, misfire_grace_time=None)
+    logger.debug(f"Zaplanowano zadanie '{job_id}' na {run_date.strftime('%H:%M:%S')}.")
+    return True
+
+def cancel(job_id):
+    """Usuwa zaplanowane zadanie. Zwraca True, jeśli zadanie istniało."""
+    if _scheduler is None or _scheduler.get_job(job_id) is None:
+        return False
+    _scheduler.remove_job(job_id)
+    logger.debug(f"Anulowano zadanie '{job_id}'.")
+    return True
+
+def get_next_run_time(job_id):
+    """Zwraca czas (sekundy epoki) najbliższego uruchomienia zadania lub None."""
+    job = _scheduler.get_job(job_id) if _scheduler is not None else None
+    # Przed uruchomieniem harmonogramu zadania nie mają jeszcze wyznaczonego czasu uruchomienia.
+    next_run_time = getattr(job, 'next_run_time', None)
+    return next_run_time.timestamp() if next_run_time else None
@@ -2,7 +2,7 @@ import logging
 import os
 from PIL import Image, ImageDraw, ImageChops
 
-from modules import drawing_utils, asset_manager
+from modules import drawing_utils, asset_manager, refresh_ledger, display_worker
 
 try:
     from waveshare_epd import epd7in5_V2 # Zmieniono na nowy sterownik
@@ -12,7 +12,19 @@ except (ImportError, RuntimeError):
     EPD_WIDTH = 800
     EPD_HEIGHT = 480
 
-def display_splash_screen(epd_lock, flip=False):
+def _show(image, description):
+    """Czyści ekran i wyświetla obraz z wyłącznym dostępem do wyświetlacza (w wątku wyświetlacza)."""
+    def show():
+        logging.info(f"Wyświetlanie: {description}...")
+        epd = refresh_ledger.instrument_epd(epd7in5_V2.EPD()) # Zmieniono na nowy sterownik
+        epd.init()
+        epd.Clear()
+        epd.display(epd.getbuffer(image)) # Wyświetlanie jednego obrazu
+        refresh_ledger.save_if_due()
+        return True
+    return display_worker.submit_exclusive(show, description).wait()
+
+def display_splash_screen(flip=False):
     """Wyświetla ekran powitalny (splash screen) podczas inicjalizacji."""
     try:
         waveshare_logo_path = asset_manager.get_path('splash_logo_waveshare')
@@ -22,13 +34,6 @@ def display_splash_screen(epd_lock, flip=False):
         return
 
     try:
-        logging.debug("Oczekiwanie na blokadę EPD dla ekranu powitalnego...")
-        with epd_lock:
-            logging.info("Wyświetlanie ekranu powitalnego...")
-            epd = epd7in5_V2.EPD() # Zmieniono na nowy sterownik
-            epd.init()
-            epd.Clear()
-
         fonts = drawing_utils.load_fonts()
         dashboard_font = fonts.get('medium')
 
@@ -73,13 +78,13 @@ def display_splash_screen(epd_lock, flip=False):
             logging.info("Obracanie ekranu powitalnego o 180 stopni.")
             image = image.rotate(180)
 
-        epd.display(epd.getbuffer(image)) # Wyświetlanie jednego obrazu
-        logging.info("Wyświetlanie ekranu powitalnego zakończone.")
+        if _show(image, "ekran powitalny"):
+            logging.info("Wyświetlanie ekranu powitalnego zakończone.")
 
     except Exception as e:
         logging.error(f"Wystąpił błąd podczas wyświetlania ekranu powitalnego: {e}", exc_info=True)
 
-def display_easter_egg(epd_lock, flip=False):
+def display_easter_egg(flip=False):
     """Wyświetla specjalny obraz 'easter egg'."""
     try:
         easter_egg_image_path = asset_manager.get_path('easter_egg_image')
@@ -88,13 +93,6 @@ def display_easter_egg(epd_lock, flip=False):
         return
 
     try:
-        logging.debug("Oczekiwanie na blokadę EPD dla Easter Egga...")
-        with epd_lock:
-            logging.info("Wyświetlanie Easter Egga...")
-            epd = epd7in5_V2.EPD() # Zmieniono na nowy sterownik
-            epd.init()
-            epd.Clear()
-
         fonts = drawing_utils.load_fonts()
         easter_egg_font = fonts.get('easter_egg', fonts['large'])
 
@@ -131,7 +129,7 @@ def display_easter_egg(epd_lock, flip=False):
             logging.info("Obracanie ekranu Easter Egg o 180 stopni.")
             image = image.rotate(180)
 
-        epd.display(epd.getbuffer(image)) # Wyświetlanie jednego obrazu
-        logging.info("Wyświetlanie Easter Egga zakończone.")
+        if _show(image, "Easter Egg"):
+            logging.info("Wyświetlanie Easter Egga zakończone.")
     except Exception as e:
         logging.error(f"Wystąpił błąd podczas wyświetlania Easter Egga: {e}", exc_info=True)
\ No newline at end of file
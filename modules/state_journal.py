@@ -0,0 +1,108 @@
+import os
+import json
+import logging
+import datetime
+import threading
+
+from modules import path_manager, json_writer, data_store
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_PATH = os.path.join(path_manager.STATE_DIR, 'state_journal.json')
+
+# Zbiór danych w magazynie odpowiadający każdemu źródłu.
+SOURCE_DATA = {
+    'airly': 'airly',
+    'accuweather': 'accuweather',
+    'google_calendar': 'calendar'
+}
+
+SUCCESS = 'success'
+FAILURE = 'failure'
+SKIPPED = 'skipped'
+
+_lock = threading.Lock()
+_journal = None
+_dirty = False
+
+def _load_locked():
+    """Wczytuje dziennik z pliku przy pierwszym użyciu (wymaga trzymania blokady)."""
+    global _journal
+    if _journal is not None:
+        return _journal
+    try:
+        with open(JOURNAL_PATH, 'r', encoding='utf-8') as f:
+            _journal = json.load(f)
+        logger.info(f"Wczytano dziennik stanu z {JOURNAL_PATH}.")
+    except FileNotFoundError:
+        _journal = {}
+    except (IOError, json.JSONDecodeError) as e:
+        logger.warning(f"Nie można odczytać dziennika stanu {JOURNAL_PATH}: {e}. Zaczynam od pustego stanu.")
+        _journal = {}
+    return _journal
+
+def flush():
+    """
+    Atomowo zapisuje zmieniony dziennik (plik tymczasowy + os.replace) - przetrwa awarię lub utratę zasilania.
+    Wywoływane raz na cykl pobierania danych i przy zamknięciu aplikacji, aby ograniczyć zapisy na kartę SD.
+    """
+    global _dirty
+    with _lock:
+        if not _dirty:
+            return
+        try:
+            json_writer.write_json(JOURNAL_PATH, _journal)
+        except OSError as e:
+            logger.error(f"Nie udało się zapisać dziennika stanu: {e}")
+            return
+        _dirty = False
+
+def get_section(name):
+    """Zwraca kopię sekcji dziennika (pusty słownik, gdy sekcja nie istnieje)."""
+    with _lock:
+        return json.loads(json.dumps(_load_locked().get(name, {})))
+
+def update_section(name, data):
+    """Zastępuje sekcję dziennika w pamięci. Na dysk trafi przy najbliższym `flush()`."""
+    global _dirty
+    with _lock:
+        _load_locked()[name] = data
+        _dirty = True
+
+def record_fetch(source, outcome, fetched_at=None):
+    """Zapisuje w pamięci czas, wynik i skrót zawartości danych ostatniego pobrania ze źródła."""
+    global _dirty
+    fetched_at = (fetched_at or datetime.datetime.now()).isoformat()
+    data_name = SOURCE_DATA.get(source)
+    content_hash = json_writer.content_hash(data_store.get(data_name)) if data_name and data_store.get_version(data_name) else None
+    with _lock:
+        sources = _load_locked().setdefault('sources', {})
+        entry = sources.setdefault(source, {})
+        entry.update({'last_fetch': fetched_at, 'outcome': outcome, 'content_hash': content_hash})
+        if outcome == SUCCESS:
+            entry['last_success'] = fetched_at
+        _dirty = True
+
+def has_current_data(source):
+    """Sprawdza, czy dane źródła w magazynie (np. z migawki) to te same dane, które zapisano w dzienniku."""
+    data_name = SOURCE_DATA.get(source)
+    entry = get_section('sources').get(source, {})
+    if not data_name or not data_store.get_version(data_name) or not entry.get('content_hash'):
+        return False
+    return json_writer.content_hash(data_store.get(data_name)) == entry['content_hash']
+
+def get_last_update_times():
+    """
+    Zwraca czasy ostatniego udanego pobrania źródeł (datetime) do wznowienia pracy po restarcie.
+    Źródła, których ostatnie pobranie się nie powiodło lub których migawka danych nie zgadza się
+    z dziennikiem (np. awaria przed jej zapisem), zostaną pobrane od razu.
+    """
+    last_update_times = {}
+    for source, entry in get_section('sources').items():
+        if entry.get('outcome') != SUCCESS or not has_current_data(source):
+            continue
+        try:
+            last_update_times[source] = datetime.datetime.fromisoformat(entry['last_fetch'])
+        except (KeyError, TypeError, ValueError):
+            continue
+    return last_update_times
@@ -1,13 +1,9 @@
 import os
-import json
 import logging
-from datetime import date, datetime, timezone
-from astral.sun import sun
-from astral import LocationInfo
-from dateutil import tz
+from datetime import datetime, timezone
 
 from modules.config_loader import config
-from modules import path_manager, asset_manager
+from modules import asset_manager, data_store, ephemeris, metrics
 
 WEATHER_ICON_MAP = {
     1: 'sun', 2: 'sun', 3: 'sun', 4: 'sun', 5: 'sun', 6: 'cloud', 7: 'cloud', 8: 'cloud',
@@ -28,50 +24,46 @@ def _select_weather_icon(icon_number):
     return os.path.join(asset_manager.get_path('icons_feather_path'), f'{icon_name}.svg')
 
 def _get_sunrise_sunset():
-    """Oblicza czas wschodu i zachodu słońca."""
+    """Zwraca czas wschodu i zachodu słońca z rocznej tabeli efemeryd."""
     try:
-        location_config = config['location']
-        loc = LocationInfo("Warsaw", "Poland", "Europe/Warsaw", location_config['latitude'], location_config['longitude'])
-        s = sun(loc.observer, date=date.today())
-        local_tz = tz.gettz("Europe/Warsaw")
-        sunrise = s['sunrise'].astimezone(local_tz).strftime('%H:%M')
-        sunset = s['sunset'].astimezone(local_tz).strftime('%H:%M')
-        return sunrise, sunset
+        sun_times = ephemeris.get_sun_times()
+        return sun_times['sunrise'], sun_times['sunset']
     except Exception as e:
         logging.error(f"Błąd podczas obliczania czasu wschodu/zachodu słońca: {e}")
         return "--:--", "--:--"
 
+def _latest_source_timestamp(*sources):
+    """
+    Zwraca najnowszy znacznik czasu spośród danych źródłowych. Dzięki temu
+    niezmienione dane wejściowe dają identyczny wynik i nie wymuszają zapisu.
+    """
+    timestamps = [source.get('timestamp') for source in sources if source and source.get('timestamp')]
+    if not timestamps:
+        return datetime.now(tz=timezone.utc).isoformat()
+    return max(timestamps, key=datetime.fromisoformat)
+
+@metrics.timed('weather.merge')
 def update_weather_data():
-    """Tworzy ujednolicony plik weather.json z danych Airly i AccuWeather."""
-    airly_file_path = os.path.join(path_manager.CACHE_DIR, 'airly.json')
-    airly_data = {}
+    """Tworzy ujednolicone dane pogodowe z danych Airly i AccuWeather dostępnych w magazynie danych."""
+    airly_data = data_store.get('airly')
     temp_real, humidity, pressure = "--", "--", "--"
 
-    try:
-        with open(airly_file_path, 'r', encoding='utf-8') as f:
-            airly_data = json.load(f)
-        
-        values = {item['name']: item['value'] for item in airly_data.get('current', {}).get('values', [])}
-        temp_real = round(values.get('TEMPERATURE', 0))
-        humidity = round(values.get('HUMIDITY', 0))
-        pressure = round(values.get('PRESSURE', 0))
-
-    except (IOError, json.JSONDecodeError, TypeError) as e:
-        logging.warning(f"Nie można odczytać lub przetworzyć pliku Airly: {e}.")
+    if airly_data:
+        try:
+            values = {item['name']: item['value'] for item in airly_data.get('current', {}).get('values', [])}
+            temp_real = round(values.get('TEMPERATURE', 0))
+            humidity = round(values.get('HUMIDITY', 0))
+            pressure = round(values.get('PRESSURE', 0))
+        except (AttributeError, KeyError, TypeError) as e:
+            logging.warning(f"Nie można przetworzyć danych Airly: {e}.")
+    else:
+        logging.warning("Dane Airly nie są dostępne.")
 
-    accuweather_file_path = os.path.join(path_manager.CACHE_DIR, 'accuweather.json')
-    accuweather_data = {}
-    current_icon_num, forecast_icon_num = None, None
-
-    try:
-        with open(accuweather_file_path, 'r', encoding='utf-8') as f:
-            accuweather_data = json.load(f)
-        
-        current_icon_num = accuweather_data.get('current', {}).get('WeatherIcon')
-        forecast_icon_num = accuweather_data.get('forecast', {}).get('Day', {}).get('Icon')
-
-    except (IOError, json.JSONDecodeError) as e:
-        logging.info(f"Plik AccuWeather nie jest dostępny: {e}.")
+    accuweather_data = data_store.get('accuweather')
+    if not accuweather_data:
+        logging.info("Dane AccuWeather nie są dostępne.")
+    current_icon_num = accuweather_data.get('current', {}).get('WeatherIcon')
+    forecast_icon_num = accuweather_data.get('forecast', {}).get('Day', {}).get('Icon')
 
     sunrise, sunset = _get_sunrise_sunset()
 
@@ -87,13 +79,13 @@ def update_weather_data():
         "cloud_cover": accuweather_data.get('current', {}).get('CloudCover', 0),
         "forecast_temp_min": round(accuweather_data.get('forecast', {}).get('Temperature', {}).get('Minimum', {}).get('Value', 0)) if accuweather_data else '--',
         "forecast_temp_max": round(accuweather_data.get('forecast', {}).get('Temperature', {}).get('Maximum', {}).get('Value', 0)) if accuweather_data else '--',
-        "timestamp": datetime.now(tz=timezone.utc).isoformat()
+        "timestamp": _latest_source_timestamp(airly_data, accuweather_data)
     }
-    
-    output_file_path = os.path.join(path_manager.CACHE_DIR, 'weather.json')
-    try:
-        with open(output_file_path, 'w', encoding='utf-8') as f:
-            json.dump(final_weather_data, f, ensure_ascii=False, indent=4)
-        logging.info("Pomyślnie zintegrowano dane z Airly i AccuWeather do weather.json.")
-    except IOError as e:
-        logging.error(f"Nie można zapisać finalnego pliku weather.json: {e}")
\ No newline at end of file
+
+    data_store.publish('weather', final_weather_data)
+    logging.info("Pomyślnie zintegrowano dane z Airly i AccuWeather.")
+
+def on_source_changed(name, version, changed_at):
+    """Ponownie scala dane pogodowe, gdy zmienią się dane Airly lub AccuWeather."""
+    if name in ('airly', 'accuweather'):
+        update_weather_data()